@@ -1,17 +1,41 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from generated_text_detector.utils.preprocessing import preprocessing_text  # type: ignore
 from generated_text_detector.utils.text_detector import GeneratedTextDetector  # type: ignore
+from collections import OrderedDict
+from typing import List
+import asyncio
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import torch
 import uvicorn
 import traceback
 
 app = FastAPI()
 
+# Most texts accepted by one /detect_batch request
+MAX_BATCH_TEXTS = int(os.getenv("AI_DETECTION_MAX_BATCH_TEXTS", "256"))
+# Most texts, and padded tokens (texts x longest text), per forward pass
+BATCH_SIZE = int(os.getenv("AI_DETECTION_BATCH_SIZE", "16"))
+BATCH_TOKENS = int(os.getenv("AI_DETECTION_BATCH_TOKENS", "4096"))
+# How long a /detect text waits for others to share its forward pass
+MAX_WAIT_MS = float(os.getenv("AI_DETECTION_MAX_WAIT_MS", "5"))
+MAX_LENGTH = 512
+# Scores kept in memory, and an optional sqlite file that keeps them all
+# across restarts
+CACHE_SIZE = int(os.getenv("AI_DETECTION_CACHE_SIZE", "100000"))
+CACHE_PATH = os.getenv("AI_DETECTION_CACHE_PATH", "")
+
+MODEL_ID = "samadpls/ai-detector"
+
 # Load detector once at startup
 try:
     print("Loading AI detection model...")
-    detector = GeneratedTextDetector(
-        "samadpls/ai-detector", device="cpu", preprocessing=True
-    )
+    detector = GeneratedTextDetector(MODEL_ID, device="cpu", preprocessing=True)
     print("AI detection model loaded successfully")
 except Exception as e:
     print(f"ERROR LOADING DETECTOR: {str(e)}")
@@ -23,6 +47,324 @@ class TextRequest(BaseModel):
     text: str
 
 
+class BatchRequest(BaseModel):
+    texts: List[str]
+
+
+def length_buckets(order, lengths):
+    """Cut positions sorted by token count into batches of similar length"""
+    batch = []
+    for position in order:
+        # Sorted ascending, so this text is the longest of the batch so far
+        if batch and (
+            len(batch) >= BATCH_SIZE
+            or (len(batch) + 1) * lengths[position] > BATCH_TOKENS
+        ):
+            yield batch
+            batch = []
+        batch.append(position)
+    if batch:
+        yield batch
+
+
+def detect_probabilities(texts):
+    """Generated-text probability of each text, in input order.
+
+    Texts are tokenized once, sorted by token count and run through the
+    model in padded batches of similar length, one forward pass per batch.
+    Gives the same scores as detect_report, which tokenizes and runs one
+    text at a time.
+    """
+    model = getattr(detector, "model", None)
+    tokenizer = getattr(detector, "tokenizer", None)
+    if model is None or tokenizer is None:
+        return [
+            detector.detect_report(text).get("generated_score", 0) for text in texts
+        ]
+
+    if getattr(detector, "preprocessing", True):
+        texts = [preprocessing_text(text) for text in texts]
+    encodings = tokenizer(
+        texts,
+        add_special_tokens=True,
+        max_length=MAX_LENGTH,
+        truncation=True,
+        return_token_type_ids=True,
+    )
+    lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+    device = next(model.parameters()).device
+
+    probabilities = [0.0] * len(texts)
+    for batch in length_buckets(order, lengths):
+        padded = tokenizer.pad(
+            {key: [encodings[key][i] for i in batch] for key in encodings.keys()},
+            padding="longest",
+            return_tensors="pt",
+        ).to(device)
+        with torch.inference_mode():
+            _, logits = model(**padded)
+        for position, probability in zip(
+            batch, torch.sigmoid(logits).squeeze(1).tolist()
+        ):
+            probabilities[position] = probability
+    return probabilities
+
+
+class MicroBatcher:
+    """Coalesce concurrent /detect calls into shared forward passes.
+
+    Each call queues its text with a future. A single worker takes the
+    first queued text, waits up to max_wait seconds for more (or until
+    max_batch_size), scores them with one detect_probabilities call in the
+    threadpool and resolves every future. While a batch runs, new texts
+    pile up and form the next batch, so batches grow with load. An
+    unexpected error fails the batch's futures, not the worker, and a
+    worker that stopped anyway is restarted by the next submit.
+    """
+
+    def __init__(self, score_batch, max_batch_size, max_wait):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = None
+        self.worker = None
+
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self.last_batch_size = 0
+
+    async def submit(self, text):
+        # Queue and worker are created on the serving event loop
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Callers that disconnected meanwhile are not scored
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            try:
+                await self._score(batch)
+            except Exception as e:
+                print(f"Error in detection batch: {str(e)}")
+                traceback.print_exc()
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self.batches += 1
+            self.texts += len(batch)
+            self.last_batch_size = len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    async def _score(self, batch):
+        try:
+            scores = await run_in_threadpool(
+                self.score_batch, [text for text, _ in batch]
+            )
+        except Exception:
+            # Retry one by one so only the failing text errors
+            await self._score_each(batch)
+        else:
+            if len(scores) != len(batch):
+                raise ValueError(f"Got {len(scores)} scores for {len(batch)} texts")
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+    async def _score_each(self, batch):
+        for text, future in batch:
+            try:
+                (score,) = await run_in_threadpool(self.score_batch, [text])
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(score)
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": (
+                round(self.texts / self.batches, 2) if self.batches else 0
+            ),
+            "last_batch_size": self.last_batch_size,
+            "largest_batch": self.largest_batch,
+        }
+
+
+batcher = MicroBatcher(detect_probabilities, BATCH_SIZE, MAX_WAIT_MS / 1000)
+
+
+class ResultCache:
+    """Detection scores keyed by a hash of the model id and preprocessed text.
+
+    The detector is deterministic, so an answer that was already scored
+    (by any evaluation) is answered from here without reaching the batcher.
+    The most recent max_entries scores stay in memory; with a path every
+    score is also kept in sqlite. Memory is checked inline, but sqlite is
+    never touched on the event loop: misses are read back in the threadpool
+    and new scores are queued for a writer thread that commits in batches.
+    """
+
+    def __init__(self, max_entries, path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.commits = 0
+
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.writer = None
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL)"
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"Could not open detection cache {path}: {str(e)}")
+                self.db = None
+            else:
+                self.writer = threading.Thread(target=self._write, daemon=True)
+                self.writer.start()
+
+    @staticmethod
+    def key(text):
+        if getattr(detector, "preprocessing", False):
+            text = preprocessing_text(text)
+        return hashlib.sha256(f"{MODEL_ID}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, score):
+        self.entries[key] = score
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_many(self, keys):
+        """Return {key: score} for the cached keys among keys"""
+        found = {}
+        with self.lock:
+            for key in keys:
+                score = self.entries.get(key)
+                if score is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = score
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.db is not None:
+            found.update(await run_in_threadpool(self._read, missing))
+
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _read(self, keys):
+        """Scores of keys stored in sqlite; runs in the threadpool"""
+        placeholders = ", ".join("?" * len(keys))
+        with self.db_lock:
+            rows = self.db.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        with self.lock:
+            for key, score in rows:
+                self._remember(key, score)
+        return dict(rows)
+
+    def put_many(self, scores_by_key):
+        rows = [(key, float(score)) for key, score in scores_by_key.items()]
+        with self.lock:
+            for key, score in rows:
+                self._remember(key, score)
+        if self.writer is not None:
+            self.pending.put(rows)
+
+    def _write(self):
+        """Writer thread: commit everything queued since the last commit"""
+        while True:
+            batches = [self.pending.get()]
+            while not self.pending.empty():
+                batches.append(self.pending.get_nowait())
+
+            rows = [row for batch in batches if batch for row in batch]
+            try:
+                with self.db_lock:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)",
+                        rows,
+                    )
+                    self.db.commit()
+                self.commits += 1
+            except sqlite3.Error as e:
+                print(f"Could not write detection cache: {str(e)}")
+
+            # None asks the writer to stop once the queue is flushed
+            if None in batches:
+                return
+
+    def close(self):
+        if self.writer is not None:
+            self.pending.put(None)
+            self.writer.join()
+            self.writer = None
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "persistent": self.db is not None,
+            "pending_writes": self.pending.qsize(),
+            "commits": self.commits,
+        }
+
+
+cache = ResultCache(CACHE_SIZE, CACHE_PATH or None)
+
+
+@app.on_event("shutdown")
+def flush_cache():
+    # Commit scores still queued for the sqlite cache
+    cache.close()
+
+
 @app.post("/detect")
 async def detect(request: TextRequest):
     if detector is None:
@@ -32,10 +374,12 @@ async def detect(request: TextRequest):
         raise HTTPException(status_code=400, detail="No text provided")
 
     try:
-        result = detector.detect_report(request.text)
-
-        # Extract probability from result
-        probability = result.get("generated_score", 0)
+        key = cache.key(request.text)
+        probability = (await cache.get_many([key])).get(key)
+        if probability is None:
+            # Scored together with other concurrent /detect texts
+            probability = await batcher.submit(request.text)
+            cache.put_many({key: probability})
 
         return {
             "probability": round(float(probability), 4),
@@ -48,11 +392,59 @@ async def detect(request: TextRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/detect_batch")
+async def detect_batch(request: BatchRequest):
+    """Score many texts at once; probabilities come back in request order"""
+    if detector is None:
+        raise HTTPException(status_code=500, detail="AI detector model not loaded")
+
+    if len(request.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_TEXTS} texts per request",
+        )
+
+    # Empty texts score zero without reaching the model
+    positions = [i for i, text in enumerate(request.texts) if text and text.strip()]
+    probabilities = [0.0] * len(request.texts)
+
+    try:
+        # Cached texts skip the model; repeats within the request run once
+        keys = {position: cache.key(request.texts[position]) for position in positions}
+        scores_by_key = await cache.get_many(list(dict.fromkeys(keys.values())))
+        missing = {}
+        for position, key in keys.items():
+            if key not in scores_by_key:
+                missing.setdefault(key, request.texts[position])
+
+        if missing:
+            scored = await run_in_threadpool(
+                detect_probabilities, list(missing.values())
+            )
+            scored = dict(zip(missing, scored))
+            cache.put_many(scored)
+            scores_by_key.update(scored)
+    except Exception as e:
+        print(f"Error in detect_batch endpoint: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for position, key in keys.items():
+        probabilities[position] = round(float(scores_by_key[key]), 4)
+
+    return {"probabilities": probabilities, "count": len(probabilities)}
+
+
 @app.get("/health")
 async def health_check():
     if detector is None:
         return {"status": "not ready", "detail": "Model not loaded.."}
-    return {"status": "healthy..", "model_loaded": True}
+    return {
+        "status": "healthy..",
+        "model_loaded": True,
+        "batching": batcher.metrics(),
+        "cache": cache.metrics(),
+    }
 
 
 @app.get("/")
@@ -2,6 +2,7 @@ import os
 from fastapi import APIRouter, Depends, File, HTTPException, Form, UploadFile
 from utils.mongodb import mongo_db
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from models.models import *
 from utils.dependencies import get_db
 from apis.auth import get_current_admin
@@ -441,6 +442,23 @@ async def update_assignment_submission(
         db.commit()
         db.refresh(existing_submission)
 
+        # Recheck plagiarism of classmates against the new answers only, off
+        # the event loop; the resubmission is saved whatever its outcome
+        try:
+            from evaluations.plagiarism import PlagiarismChecker
+
+            checker = PlagiarismChecker(
+                course_id=assignment.course_id, assignment_id=assignment_id
+            )
+            await run_in_threadpool(
+                checker.update_submission,
+                existing_submission.id,
+                parsed_dict,
+                student_id=existing_submission.student_id,
+            )
+        except Exception as e:
+            print(f"Incremental plagiarism check failed: {e}")
+
         return {
             "success": True,
             "status": 200,
@@ -491,10 +509,19 @@ async def delete_submission(
     if not delete_success:
         print(f"Failed to delete submission from S3: {submission.submission_pdf_url}")
 
+    submission_id = submission.id
+    course_id = submission.assignment.course_id if submission.assignment else None
+
     # Delete from database
     db.delete(submission)
     db.commit()
 
+    # Drop its answers from the plagiarism corpus and state
+    if course_id is not None:
+        from evaluations.plagiarism import PlagiarismChecker
+
+        PlagiarismChecker.forget(course_id, assignment_id, submission_id)
+
     return {
         "success": True,
         "status": 200,
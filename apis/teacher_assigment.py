@@ -1346,6 +1346,9 @@ async def get_total_scores(
                     ),
                     "feedback": feedback_content,
                     "report_url": evaluation_data.get("report_url", ""),
+                    # Set when a classmate's resubmission changed the
+                    # plagiarism score after this total was computed
+                    "needs_reevaluation": "needs_reevaluation" in evaluation_data,
                 }
 
                 total_scores_data.append(scores)
@@ -1766,6 +1769,12 @@ async def delete_assignment(
         db.delete(assignment)
         db.commit()
 
+        # Step 5: Drop its answers from the plagiarism corpus and state, so a
+        # recreated assignment is not matched against them
+        from evaluations.plagiarism import PlagiarismChecker
+
+        PlagiarismChecker.forget(course_id, assignment_id)
+
         return {
             "success": True,
             "status": 200,
@@ -1883,6 +1892,11 @@ async def delete_student_submission(
         db.delete(submission)
         db.commit()
 
+        # Step 5: Drop its answers from the plagiarism corpus and state
+        from evaluations.plagiarism import PlagiarismChecker
+
+        PlagiarismChecker.forget(course_id, assignment_id, submission_id)
+
         return {
             "success": True,
             "status": 200,
@@ -52,16 +52,16 @@ async def startup_event():
     print("Preloading ML models for DigitalOcean App Platform...")
     try:
         # Preload models to avoid loading them on each request
-        from evaluations.context_score import ContextScorer, TextSimilarity
-        from utils.bleurt.bleurt import score as bleurt_score
+        from evaluations.context_score import ContextScorer, TextSimilarity, load_scorer
 
         # Initialize singleton instances
         print("Loading TextSimilarity model...")
         text_sim = TextSimilarity()
+        text_sim.warm_up()
 
         print("Loading BLEURT scorer...")
         if ContextScorer._bleurt_scorer is None:
-            ContextScorer._bleurt_scorer = bleurt_score.BleurtScorer()
+            ContextScorer._bleurt_scorer = load_scorer()
 
         print("ML models preloaded successfully!")
     except Exception as e:
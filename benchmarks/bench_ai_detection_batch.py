@@ -0,0 +1,81 @@
+"""Benchmark batched AI detection against one request per answer.
+
+Usage:
+    python -m benchmarks.bench_ai_detection_batch --url http://localhost:5000 --answers 256 --sizes 1,8,32
+
+Needs a running AI detection service (Dockerfile.ai_detection). Synthetic
+answers of mixed length are scored once through /detect, one request each,
+and then through /detect_batch with each request size. The table shows
+answers per second and the largest score difference from /detect.
+"""
+
+import argparse
+import random
+import time
+
+import requests
+
+WORDS = (
+    "the process of data normalization reduces redundancy and improves "
+    "integrity in a relational database by splitting tables and defining "
+    "keys so that each fact is stored once and dependencies are explicit"
+).split()
+
+
+def make_answers(n_answers, seed=7):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(20, 300))) for _ in range(n_answers)
+    ]
+
+
+def single_scores(url, answers):
+    return [
+        requests.post(f"{url}/detect", json={"text": answer}, timeout=60).json()[
+            "probability"
+        ]
+        for answer in answers
+    ]
+
+
+def batch_scores(url, answers, size):
+    scores = []
+    for start in range(0, len(answers), size):
+        response = requests.post(
+            f"{url}/detect_batch",
+            json={"texts": answers[start : start + size]},
+            timeout=600,
+        )
+        response.raise_for_status()
+        scores.extend(response.json()["probabilities"])
+    return scores
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--answers", type=int, default=256)
+    parser.add_argument("--sizes", default="1,8,32")
+    args = parser.parse_args()
+
+    answers = make_answers(args.answers)
+    reference, seconds = timed(single_scores, args.url, answers)
+    print(f"{'endpoint':<14}{'size':>6}{'answers/s':>11}{'max diff':>10}")
+    print(f"{'/detect':<14}{1:>6}{len(answers) / seconds:>11.1f}{0:>10.4f}")
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        scores, seconds = timed(batch_scores, args.url, answers, size)
+        diff = max(abs(a - b) for a, b in zip(scores, reference))
+        print(
+            f"{'/detect_batch':<14}{size:>6}{len(answers) / seconds:>11.1f}{diff:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
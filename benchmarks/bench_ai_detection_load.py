@@ -0,0 +1,63 @@
+"""Benchmark /detect latency under concurrent callers.
+
+Usage:
+    AI_DETECTION_MAX_WAIT_MS=5 python ai_detection.py   # in the service container
+    python -m benchmarks.bench_ai_detection_load --url http://localhost:5000 --callers 1,8,32
+
+Needs a running AI detection service. Each caller thread sends answers from
+bench_ai_detection_batch.make_answers to /detect one at a time. The table
+shows throughput, median and 95th percentile latency, and the mean batch
+size the service coalesced, read from the batching metrics on /health.
+Start the service with AI_DETECTION_MAX_WAIT_MS=0 and AI_DETECTION_BATCH_SIZE=1
+to compare against uncoalesced scoring.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from benchmarks.bench_ai_detection_batch import make_answers
+
+
+def detect(url, answer):
+    start = time.perf_counter()
+    response = requests.post(f"{url}/detect", json={"text": answer}, timeout=600)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def batching(url):
+    return requests.get(f"{url}/health", timeout=10).json().get("batching", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--answers", type=int, default=256)
+    parser.add_argument("--callers", default="1,8,32")
+    args = parser.parse_args()
+
+    answers = make_answers(args.answers)
+    print(f"{'callers':>8}{'answers/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'batch':>7}")
+    for callers in (int(value) for value in args.callers.split(",")):
+        before = batching(args.url)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(callers) as pool:
+            latencies = list(pool.map(lambda answer: detect(args.url, answer), answers))
+        seconds = time.perf_counter() - start
+        after = batching(args.url)
+
+        batches = after.get("batches", 0) - before.get("batches", 0)
+        texts = after.get("texts", 0) - before.get("texts", 0)
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(
+            f"{callers:>8}{len(answers) / seconds:>11.1f}{p50:>9.0f}{p95:>9.0f}"
+            f"{texts / batches if batches else 0:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark the shared reference-text cleaner against the old per-token loop.
+
+Usage:
+    python -m benchmarks.bench_clean_text --chunks 2000 --repeat 5
+
+Reports chunks per second for the old loop, the precompiled cleaner on
+unseen chunks, and the cached path a repeated retrieval takes. It also checks
+that both cleaners keep the same tokens.
+"""
+
+import argparse
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from utils import clean_text
+
+WORDS = (
+    "Cloud computing, server storage network. virtual ● machine data ■ service "
+    "provider (scalable) elastic resource model: public private ○ hybrid "
+    "software platform infrastructure security access internet 2024 user-cost"
+).split()
+
+
+def make_chunks(n_chunks, seed=13):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(80, 200))) + "\n\n"
+        for _ in range(n_chunks)
+    ]
+
+
+def legacy_clean(raw_text):
+    cleaned_text = re.sub(r"[●■○]", "", raw_text)
+    cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
+    tokens = cleaned_text.split()
+    return " ".join(token.lower() for token in tokens if token.isalnum())
+
+
+def time_per_chunk(fn, chunks, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for chunk in chunks:
+            fn(chunk)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    for chunk in chunks:
+        assert legacy_clean(chunk) == clean_text.clean_chunk(chunk).text
+
+    def uncached(chunk):
+        return clean_text.clean_chunk.__wrapped__(chunk)
+
+    retrieval = SimpleNamespace(
+        points=[SimpleNamespace(payload={"text": chunk}) for chunk in chunks[:5]]
+    )
+
+    def repeated_retrieval(_):
+        return clean_text.clean_retrieval(retrieval)
+
+    rows = [
+        ("old loop", time_per_chunk(legacy_clean, chunks, args.repeat)),
+        ("precompiled", time_per_chunk(uncached, chunks, args.repeat)),
+        (
+            "cached retrieval (5 chunks)",
+            time_per_chunk(repeated_retrieval, chunks, args.repeat) / 5,
+        ),
+    ]
+
+    count = args.chunks * args.repeat
+    print(f"{'path':<32}{'chunks':>10}{'seconds':>10}{'chunks/s':>12}")
+    for name, seconds in rows:
+        print(f"{name:<32}{count:>10}{seconds:>10.3f}{count / seconds:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Benchmark the local context scorer against the LLM judge.
+
+Usage:
+    python -m benchmarks.bench_context_scorer --pairs 256 --batch-size 32
+
+The judge is only timed when GROQ_API_KEY and JUDGE_MODEL are set. It runs on a sample of
+pairs, once with one request per pair and once with packed requests, and
+reports how many requests each needed. The same sample is then used to
+check that the local scorer agrees with the judge: mean scores, mean
+absolute difference, correlation and the share of pairs within --tolerance.
+Pass --pairs-file (JSON list of [reference, answer]) to check agreement on
+real answers instead of synthetic ones, which only exercise throughput.
+
+The default cross-encoder is a relevance reranker whose raw scores are close
+to binary. With --calibration-out, a monotone map from its scores to the
+judge's is fit on half of the sample, checked on the other half, then refit
+on the whole sample and written for BleurtScorer (BLEURT_CALIBRATION).
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from utils.bleurt.bleurt import score as bleurt_score
+
+WORDS = (
+    "cloud computing server storage network virtual machine data service "
+    "provider scalable elastic resource model public private hybrid software "
+    "platform infrastructure security access internet application user cost"
+).split()
+
+
+def make_pairs(n_pairs, n_questions=10, seed=13):
+    rng = random.Random(seed)
+    references = [
+        f"QUESTION: question {q}\n\n" + " ".join(rng.choices(WORDS, k=120))
+        for q in range(n_questions)
+    ]
+    pairs = []
+    for i in range(n_pairs):
+        answer = " ".join(rng.choices(WORDS, k=rng.randint(15, 150)))
+        pairs.append((references[i % n_questions], answer))
+    return pairs
+
+
+def time_local(scorer, pairs, batch_size, one_call_per_pair=False):
+    start = time.perf_counter()
+    if one_call_per_pair:
+        for reference, candidate in pairs:
+            scorer.score(references=[reference], candidates=[candidate])
+    else:
+        scorer.score(
+            references=[reference for reference, _ in pairs],
+            candidates=[candidate for _, candidate in pairs],
+            batch_size=batch_size,
+        )
+    return time.perf_counter() - start
+
+
+def time_judge(pairs, batch_size):
+    from evaluations.llm_judge import LLMJudge
+
+    judge = LLMJudge(batch_size=batch_size)
+    start = time.perf_counter()
+    scores = judge.score(
+        references=[reference for reference, _ in pairs],
+        candidates=[candidate for _, candidate in pairs],
+    )
+    return time.perf_counter() - start, judge.requests_made, scores
+
+
+def agreement(local, judge, tolerance):
+    local, judge = np.asarray(local, dtype=float), np.asarray(judge, dtype=float)
+    differences = np.abs(local - judge)
+    correlation = (
+        float(np.corrcoef(local, judge)[0, 1])
+        if local.std() > 0 and judge.std() > 0
+        else float("nan")
+    )
+    return {
+        "local mean": float(local.mean()),
+        "judge mean": float(judge.mean()),
+        "mean abs diff": float(differences.mean()),
+        "correlation": correlation,
+        f"within {tolerance}": float((differences <= tolerance).mean()),
+    }
+
+
+def fit_calibration(local, judge, bins=10):
+    """Monotone piecewise-linear map from local scores to judge scores.
+
+    Pairs are cut into equal-count bins by local score; each knot is a bin's
+    mean local and judge score, with judge means made non-decreasing.
+    """
+    local, judge = np.asarray(local, dtype=float), np.asarray(judge, dtype=float)
+    order = np.argsort(local, kind="stable")
+    chunks = [chunk for chunk in np.array_split(order, bins) if len(chunk)]
+    raw = [float(local[chunk].mean()) for chunk in chunks]
+    mapped = np.maximum.accumulate([judge[chunk].mean() for chunk in chunks])
+    return {"raw": raw, "judge": mapped.tolist()}
+
+
+def print_agreement(title, local, judge, tolerance):
+    print(f"\n{title}")
+    for name, value in agreement(local, judge, tolerance).items():
+        print(f"{name:<40}{value:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--judge-samples", type=int, default=20)
+    parser.add_argument("--pairs-file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--calibration-out")
+    args = parser.parse_args()
+
+    if args.pairs_file:
+        with open(args.pairs_file) as f:
+            pairs = [tuple(pair) for pair in json.load(f)]
+    else:
+        pairs = make_pairs(args.pairs)
+    scorer = bleurt_score.BleurtScorer()
+    scorer.calibration = None  # Compare and calibrate the model's raw scores
+    scorer.score(references=[pairs[0][0]], candidates=[pairs[0][1]])  # warm-up
+
+    rows = [
+        ("local, one call per pair", time_local(scorer, pairs, 1, True), len(pairs)),
+        (
+            f"local, length-batched ({args.batch_size})",
+            time_local(scorer, pairs, args.batch_size),
+            len(pairs),
+        ),
+    ]
+
+    judge_scores = None
+    if os.getenv("GROQ_API_KEY") and os.getenv("JUDGE_MODEL"):
+        samples = pairs[: args.judge_samples]
+        for batch_size in (1, 10):
+            seconds, requests, judge_scores = time_judge(samples, batch_size)
+            rows.append(
+                (
+                    f"judge, {requests} requests (batch {batch_size})",
+                    seconds,
+                    len(samples),
+                )
+            )
+    else:
+        print("GROQ_API_KEY or JUDGE_MODEL not set, skipping the LLM judge")
+
+    print(f"{'path':<40}{'pairs':>8}{'seconds':>10}{'pairs/s':>10}")
+    for name, seconds, count in rows:
+        print(f"{name:<40}{count:>8}{seconds:>10.2f}{count / seconds:>10.1f}")
+
+    if judge_scores is not None:
+        local_scores = scorer.score(
+            references=[reference for reference, _ in samples],
+            candidates=[candidate for _, candidate in samples],
+            batch_size=args.batch_size,
+        )
+        print_agreement(
+            f"Local scorer vs judge on {len(samples)} pairs",
+            local_scores,
+            judge_scores,
+            args.tolerance,
+        )
+
+        if args.calibration_out:
+            local_scores, judge_scores = np.array(local_scores), np.array(judge_scores)
+            fit = fit_calibration(local_scores[::2], judge_scores[::2])
+            print_agreement(
+                f"Calibrated local scorer vs judge on {len(samples) // 2} held-out pairs",
+                np.interp(local_scores[1::2], fit["raw"], fit["judge"]),
+                judge_scores[1::2],
+                args.tolerance,
+            )
+            calibration = {
+                "checkpoint": scorer.checkpoint,
+                "pairs": len(samples),
+                **fit_calibration(local_scores, judge_scores),
+            }
+            with open(args.calibration_out, "w") as f:
+                json.dump(calibration, f, indent=2)
+            print(f"\nWrote calibration to {args.calibration_out}")
+
+
+if __name__ == "__main__":
+    main()
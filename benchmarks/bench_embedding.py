@@ -0,0 +1,69 @@
+"""Benchmark embedding throughput per ONNX Runtime thread and batch setting.
+
+Usage:
+    python -m benchmarks.bench_embedding --texts 512 --intra 0,1,2,4 --inter 0 \
+        --batch-sizes 1,16,64,256
+
+Each (intra, inter) pair loads the model once and is warmed up before timing.
+Zero means ONNX Runtime's default. Use the best row to set
+EMBEDDING_INTRA_OP_THREADS, EMBEDDING_INTER_OP_THREADS and EMBEDDING_BATCH_SIZE
+for a node shape.
+"""
+
+import argparse
+import random
+import time
+
+from evaluations.context_score import load_embedding_model
+
+WORDS = (
+    "cloud computing server storage network virtual machine data service "
+    "provider scalable elastic resource model public private hybrid software "
+    "platform infrastructure security access internet application user cost"
+).split()
+
+
+def make_texts(n_texts, seed=13):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(15, 150))) for _ in range(n_texts)
+    ]
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",")]
+
+
+def time_embedding(model, texts, batch_size):
+    start = time.perf_counter()
+    list(model.embed(texts, batch_size=batch_size))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default="BAAI/bge-small-en-v1.5")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--intra", type=int_list, default=[0, 1, 2, 4])
+    parser.add_argument("--inter", type=int_list, default=[0])
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 16, 64, 256])
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+
+    print(f"{'intra':>6}{'inter':>6}{'batch':>7}{'seconds':>10}{'texts/s':>10}")
+    for intra in args.intra:
+        for inter in args.inter:
+            model = load_embedding_model(args.model, intra, inter)
+            list(model.embed(texts[:16], batch_size=16))  # warm-up
+
+            for batch_size in args.batch_sizes:
+                seconds = time_embedding(model, texts, batch_size)
+                print(
+                    f"{intra:>6}{inter:>6}{batch_size:>7}"
+                    f"{seconds:>10.2f}{len(texts) / seconds:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark MinHash/LSH candidate plagiarism scoring against the exact method.
+
+Usage:
+    python -m benchmarks.bench_plagiarism_lsh --answers 500,2000,5000
+
+Synthetic answers to one question are drawn from a Zipf-like vocabulary, and
+a share of them are copies of another answer with some words replaced. Both
+methods run through top_k_similarities, the path plagiarism checks use. For
+each class size the table shows the pairs each method scored and the time it
+took. Recall is the share of exact top-k pairs at or above each similarity
+threshold that LSH also kept.
+"""
+
+import argparse
+import random
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from evaluations.plagiarism import PlagiarismChecker
+
+
+def make_answers(n_answers, copy_rate=0.1, max_edit_rate=0.3, seed=13):
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    answers = []
+    for _ in range(n_answers):
+        if answers and rng.random() < copy_rate:
+            words = rng.choice(answers).split()
+            edit_rate = rng.uniform(0, max_edit_rate)
+            words = [
+                rng.choices(vocabulary, weights)[0] if rng.random() < edit_rate else w
+                for w in words
+            ]
+        else:
+            words = rng.choices(vocabulary, weights, k=rng.randint(40, 120))
+        answers.append(" ".join(words))
+    return answers
+
+
+def timed_top_k(checker, answers, lsh_min_answers):
+    with patch.object(PlagiarismChecker, "LSH_MIN_ANSWERS", lsh_min_answers):
+        start = time.perf_counter()
+        peers, scores, _ = checker.top_k_similarities(answers)
+        return (peers, scores), time.perf_counter() - start
+
+
+def pair_set(top_k, threshold):
+    peers, scores = top_k
+    rows, slots = np.nonzero((peers >= 0) & (scores >= threshold))
+    columns = peers[rows, slots]
+    return set(
+        zip(np.minimum(rows, columns).tolist(), np.maximum(rows, columns).tolist())
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", default="500,2000,5000")
+    parser.add_argument("--thresholds", default="0.5,0.8,0.9")
+    args = parser.parse_args()
+
+    thresholds = [float(value) for value in args.thresholds.split(",")]
+    with patch("evaluations.plagiarism.mongo_db"):
+        checker = PlagiarismChecker(course_id=0, assignment_id=0)
+
+    header = f"{'answers':>8}{'method':>8}{'pairs':>12}{'seconds':>10}"
+    print(header + "".join(f"{f'recall@{t}':>13}" for t in thresholds))
+    for n in (int(value) for value in args.answers.split(",")):
+        answers = make_answers(n)
+        exact, exact_seconds = timed_top_k(checker, answers, n + 1)
+        approx, approx_seconds = timed_top_k(checker, answers, 0)
+        candidates = len(checker.lsh.candidate_pairs(checker.lsh.signatures(answers)))
+
+        print(f"{n:>8}{'exact':>8}{n * (n - 1) // 2:>12}{exact_seconds:>10.2f}")
+        recalls = []
+        for threshold in thresholds:
+            truth = pair_set(exact, threshold)
+            found = pair_set(approx, threshold)
+            recalls.append(len(truth & found) / len(truth) if truth else np.nan)
+        print(
+            f"{n:>8}{'lsh':>8}{candidates:>12}{approx_seconds:>10.2f}"
+            + "".join(f"{recall:>13.3f}" for recall in recalls)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark process-pool plagiarism scoring against a single process.
+
+Usage:
+    python -m benchmarks.bench_plagiarism_workers --answers 20000,50000 --workers 1,4,8
+
+Answers come from bench_plagiarism_lsh.make_answers. For each class size and
+worker count, top_k_similarities is timed on a warm process pool, the way
+run() reuses one pool across questions, and checked against the
+single-process result.
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from benchmarks.bench_plagiarism_lsh import make_answers
+from evaluations.plagiarism import PlagiarismChecker
+
+
+def timed_top_k(checker, answers, tfidf_matrix, workers):
+    with patch.object(PlagiarismChecker, "WORKERS", workers), patch.object(
+        PlagiarismChecker, "PARALLEL_MIN_ANSWERS", 0
+    ):
+        try:
+            # The first call starts the pool's processes
+            checker.top_k_similarities(answers, tfidf_matrix)
+            start = time.perf_counter()
+            result = checker.top_k_similarities(answers, tfidf_matrix)
+            return result, time.perf_counter() - start
+        finally:
+            checker.close_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", default="20000,50000")
+    parser.add_argument("--workers", default="1,2,4,8")
+    args = parser.parse_args()
+
+    with patch("evaluations.plagiarism.mongo_db"):
+        checker = PlagiarismChecker(course_id=0, assignment_id=0)
+
+    print(f"{'answers':>8}{'workers':>9}{'seconds':>10}{'speedup':>9}{'same':>6}")
+    for n in (int(value) for value in args.answers.split(",")):
+        answers = make_answers(n)
+        _, tfidf_matrix = checker.fit_tfidf(answers)
+        baseline, baseline_seconds = None, None
+        for workers in (int(value) for value in args.workers.split(",")):
+            result, seconds = timed_top_k(checker, answers, tfidf_matrix, workers)
+            if baseline is None:
+                baseline, baseline_seconds = result, seconds
+            same = (
+                np.array_equal(result[0], baseline[0])
+                and np.array_equal(result[1], baseline[1])
+                and result[2] == baseline[2]
+            )
+            print(
+                f"{n:>8}{workers:>9}{seconds:>10.2f}"
+                f"{baseline_seconds / seconds:>9.2f}{str(same):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Measure int8 embedding drift, memory and speed against the fp32 model.
+
+Usage:
+    python -m benchmarks.bench_quantized_embedding --course-id 1 --assignment-id 1
+    python -m benchmarks.bench_quantized_embedding --limit 200
+
+The corpus is read from stored `qa_extractions`. The teacher's answer to each
+question acts as the reference, so for every student answer the tool compares
+similarity (reference vs answer) and relevance (question vs answer) under both
+models. Each model runs in its own process, so the reported RSS is that
+model's own footprint.
+"""
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+import psutil
+
+MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+
+def load_corpus(course_id=None, assignment_id=None, limit=200):
+    """Return (question, reference, answer) triples from stored extractions"""
+    from utils.mongodb import mongo_db
+
+    query = {}
+    if course_id is not None:
+        query["course_id"] = course_id
+    if assignment_id is not None:
+        query["assignment_id"] = assignment_id
+
+    documents = {}
+    for document in mongo_db.db["qa_extractions"].find(query):
+        key = (document["course_id"], document["assignment_id"])
+        documents.setdefault(key, []).append(document)
+
+    triples = []
+    for assignment_documents in documents.values():
+        teacher = next((d for d in assignment_documents if d["is_teacher"]), None)
+        if teacher is None:
+            continue
+        teacher_pairs = teacher.get("qa_pairs", {})
+
+        for document in assignment_documents:
+            if document["is_teacher"]:
+                continue
+            for key, question in teacher_pairs.items():
+                if not key.startswith("Question#"):
+                    continue
+                number = key.split("#")[1]
+                reference = teacher_pairs.get(f"Answer#{number}", "")
+                answer = document.get("qa_pairs", {}).get(f"Answer#{number}", "")
+                if reference.strip() and len(answer.strip()) >= 5:
+                    triples.append((question, reference, answer))
+                if len(triples) >= limit:
+                    return triples
+    return triples
+
+
+def embed_in_child(quantized, texts, queue):
+    from evaluations.context_score import load_embedding_model
+
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    model = load_embedding_model(MODEL_NAME, quantized=quantized)
+    list(model.embed(texts[:8]))  # warm-up
+
+    start = time.perf_counter()
+    vectors = np.stack(list(model.embed(texts)))
+    seconds = time.perf_counter() - start
+    queue.put((vectors, seconds, process.memory_info().rss - baseline))
+
+
+def embed(quantized, texts):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    child = context.Process(target=embed_in_child, args=(quantized, texts, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    return result
+
+
+def pairwise_cosines(vectors, n_items):
+    """Similarity and relevance from [references, questions, answers] rows"""
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    references, questions, answers = np.split(vectors, [n_items, 2 * n_items])
+    return (
+        np.einsum("ij,ij->i", references, answers),
+        np.einsum("ij,ij->i", questions, answers),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--course-id", type=int)
+    parser.add_argument("--assignment-id", type=int)
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+
+    triples = load_corpus(args.course_id, args.assignment_id, args.limit)
+    if not triples:
+        print("No stored question/answer pairs found")
+        return
+    questions, references, answers = map(list, zip(*triples))
+    texts = references + questions + answers
+
+    results = {}
+    for quantized in (False, True):
+        vectors, seconds, rss = embed(quantized, texts)
+        results[quantized] = (pairwise_cosines(vectors, len(triples)), seconds, rss)
+
+    print(f"{len(triples)} answers, {len(texts)} texts")
+    print(f"{'model':<8}{'seconds':>10}{'texts/s':>10}{'RSS MB':>10}")
+    for quantized, (_, seconds, rss) in results.items():
+        name = "int8" if quantized else "fp32"
+        print(
+            f"{name:<8}{seconds:>10.2f}{len(texts) / seconds:>10.1f}{rss / 2**20:>10.1f}"
+        )
+
+    (fp32_sim, fp32_rel), (int8_sim, int8_rel) = (
+        results[False][0],
+        results[True][0],
+    )
+    # Contribution of both scores to the context score (see ContextScorer)
+    fp32_part = 0.2 * fp32_sim + 0.1 * fp32_rel
+    int8_part = 0.2 * int8_sim + 0.1 * int8_rel
+
+    print(f"\n{'score':<22}{'mean |drift|':>14}{'max |drift|':>14}")
+    for name, fp32, int8 in (
+        ("similarity", fp32_sim, int8_sim),
+        ("relevance", fp32_rel, int8_rel),
+        ("context contribution", fp32_part, int8_part),
+    ):
+        drift = np.abs(int8 - fp32)
+        print(f"{name:<22}{drift.mean():>14.4f}{drift.max():>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark submission-id resolution in the evaluation result loops.
+
+Usage:
+    python -m benchmarks.bench_submission_table --submissions 5000
+
+Compares resolving every submission's id by searching the key list, as the
+result loops used to, with a SubmissionTable, and times AIDetector.run end
+to end with the detection service off and MongoDB writes stubbed out, so
+only detection bookkeeping is measured.
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+from evaluations.submissions import SubmissionTable
+
+
+class NullCollection:
+    def update_one(self, *args, **kwargs):
+        pass
+
+    def bulk_write(self, *args, **kwargs):
+        class Result:
+            modified_count = 0
+
+        return Result()
+
+
+def make_submissions(n_submissions, n_questions=5):
+    teacher_questions = {}
+    for q in range(1, n_questions + 1):
+        teacher_questions[f"Question#{q}"] = f"question {q}"
+        teacher_questions[f"Answer#{q}"] = f"reference {q}"
+    qa_by_pdf = {
+        f"submission_{s}.pdf": {
+            **{f"Question#{q}": f"question {q}" for q in range(1, n_questions + 1)},
+            **{
+                f"Answer#{q}": f"answer {s} to question {q}"
+                for q in range(1, n_questions + 1)
+            },
+        }
+        for s in range(n_submissions)
+    }
+    return teacher_questions, qa_by_pdf, list(range(1000, 1000 + n_submissions))
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=5000)
+    args = parser.parse_args()
+
+    teacher_questions, qa_by_pdf, submission_ids = make_submissions(args.submissions)
+
+    def list_search():
+        keys = list(qa_by_pdf.keys())
+        return [submission_ids[keys.index(key)] for key in qa_by_pdf]
+
+    def table_lookup():
+        table = SubmissionTable(qa_by_pdf, submission_ids)
+        return [table.id_of(key) for key in qa_by_pdf]
+
+    assert list_search() == table_lookup()
+
+    with patch("evaluations.ai_detection.mongo_db"), patch(
+        "evaluations.ai_detection.AIDetector._wait_for_service", return_value=False
+    ), patch("evaluations.ai_detection.logger"):
+        from evaluations.ai_detection import AIDetector
+
+        detector = AIDetector(course_id=0, assignment_id=0)
+        detector.results_collection = NullCollection()
+        ai_seconds = timed(
+            lambda: detector.run(teacher_questions, qa_by_pdf, submission_ids)
+        )
+
+    rows = [
+        ("key list search", timed(list_search)),
+        ("SubmissionTable", timed(table_lookup)),
+        ("AIDetector.run, service off", ai_seconds),
+    ]
+    print(f"{'path':<32}{'submissions':>12}{'seconds':>10}")
+    for name, seconds in rows:
+        print(f"{name:<32}{args.submissions:>12}{seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ import os
 import requests
 from datetime import datetime, timezone
 from pymongo import UpdateOne
+from evaluations.submissions import SubmissionTable
 from utils.mongodb import mongo_db
+from utils.clean_text import normalize_answer
 import time
 import logging
 import random  # Add import for random
@@ -21,8 +23,13 @@ class AIDetector:
         # Replace with actual service URL
         self.ai_service_host = "https://ai-detection-service.example.com"
         self.ai_service_url = f"{self.ai_service_host}/detect"
+        self.ai_batch_url = f"{self.ai_service_host}/detect_batch"
         self.health_url = f"{self.ai_service_host}/health"
 
+        # Answers sent per /detect_batch request, and its timeout in seconds
+        self.batch_size = int(os.getenv("AI_DETECTION_REQUEST_SIZE", "32"))
+        self.batch_timeout = float(os.getenv("AI_DETECTION_BATCH_TIMEOUT", "60"))
+
         # Flag to track if service is available
         self.service_available = False
 
@@ -33,6 +40,7 @@ class AIDetector:
         self.questions_answers_by_pdf = {}
         self.teacher_questions = {}
         self.ai_detection_results = {}
+        self.submissions = None
 
         # Check if AI detection service is ready (just once at initialization)
         self.service_available = self._wait_for_service(max_retries=1, retry_interval=1)
@@ -101,6 +109,54 @@ class AIDetector:
             logger.error(f"Exception calling AI detection service: {str(e)}")
             return round(random.uniform(0.1, 0.5), 2)
 
+    def detect_ai_content_batch(self, texts, delay=0):
+        """Score many texts with one /detect_batch call per chunk of answers.
+
+        Scores come back in the order of texts. The delay is applied between
+        chunks rather than between answers. A chunk the batch endpoint fails
+        on is retried one answer at a time through detect_ai_content.
+        """
+        scores = [0] * len(texts)
+        positions = [
+            i for i, text in enumerate(texts) if text and len(text.strip()) >= 2
+        ]
+
+        if not self.service_available:
+            for i in positions:
+                scores[i] = self.detect_ai_content(texts[i])
+            return scores
+
+        for start in range(0, len(positions), self.batch_size):
+            chunk = positions[start : start + self.batch_size]
+            if start and delay > 0:
+                time.sleep(delay)
+
+            try:
+                response = requests.post(
+                    self.ai_batch_url,
+                    json={"texts": [texts[i] for i in chunk]},
+                    timeout=self.batch_timeout,
+                )
+                probabilities = (
+                    response.json().get("probabilities", [])
+                    if response.status_code == 200
+                    else []
+                )
+                if len(probabilities) != len(chunk):
+                    raise ValueError(
+                        f"batch detection returned {response.status_code} "
+                        f"with {len(probabilities)}/{len(chunk)} scores"
+                    )
+            except Exception as e:
+                logger.error(f"Batch AI detection failed, scoring one by one: {str(e)}")
+                probabilities = [self.detect_ai_content(texts[i]) for i in chunk]
+
+            for i, probability in zip(chunk, probabilities):
+                scores[i] = probability
+            logger.info(f"AI detection scored {len(chunk)} answers in one batch")
+
+        return scores
+
     def analyze_answers(self, delay=0):
         """Analyze answers for AI-generated content"""
         self.ai_detection_results = {
@@ -110,9 +166,13 @@ class AIDetector:
         if not self.service_available:
             logger.warning("AI detection service score")
 
+        # Identical answers (up to whitespace) are detected once and shared;
+        # the distinct ones are sent to the service together
+        answers_by_normalized = {}
+        answer_slots = []
+
         for pdf_file in self.questions_answers_by_pdf:
             qa_dict = self.questions_answers_by_pdf.get(pdf_file, {})
-            logger.info(f"Analyzing answers for PDF: {pdf_file}")
 
             for question_key in self.teacher_questions:
                 if not question_key.startswith("Question#"):
@@ -121,32 +181,29 @@ class AIDetector:
                 answer_key = f"Answer#{question_key.split('#')[1]}"
                 answer = qa_dict.get(answer_key, "").strip()
 
-                if not answer:
-                    ai_score = 0
-                    logger.info(f"Empty answer for {question_key}, skipping detection")
-                else:
-                    # Call AI detection service with delay
-                    logger.info(f"Detecting AI content for {pdf_file} - {question_key}")
-                    ai_score = self.detect_ai_content(answer, delay)
-                    logger.info(f"AI score for {pdf_file} - {question_key}: {ai_score}")
+                normalized = normalize_answer(answer) if answer else None
+                if normalized is not None:
+                    answers_by_normalized.setdefault(normalized, answer)
+                answer_slots.append((pdf_file, question_key, normalized))
 
-                self.ai_detection_results[pdf_file][question_key] = {
-                    "ai_score": ai_score
-                }
+        logger.info(
+            f"Detecting AI content for {len(answers_by_normalized)} distinct answers "
+            f"out of {len(answer_slots)}"
+        )
+        scores = self.detect_ai_content_batch(
+            list(answers_by_normalized.values()), delay
+        )
+        scores_by_answer = dict(zip(answers_by_normalized, scores))
+
+        for pdf_file, question_key, normalized in answer_slots:
+            ai_score = 0 if normalized is None else scores_by_answer[normalized]
+            self.ai_detection_results[pdf_file][question_key] = {"ai_score": ai_score}
 
     def save_results_to_mongo(self):
         """Save AI detection scores in unified evaluation document"""
-        pdf_files_list = list(self.questions_answers_by_pdf.keys())
-        for pdf_file, qa_results in self.questions_answers_by_pdf.items():
+        for pdf_file, submission_id, qa_results in self.submissions.items():
             ai_data = self.ai_detection_results.get(pdf_file, {})
 
-            # Get submission_id for this pdf_file, or use pdf_file as fallback
-            submission_id = (
-                self.submission_ids[pdf_files_list.index(pdf_file)]
-                if self.submission_ids
-                else pdf_file
-            )
-
             # Calculate overall AI score
             total_ai_score = 0
             question_count = 0
@@ -226,6 +283,7 @@ class AIDetector:
         self.teacher_questions = teacher_questions
         self.questions_answers_by_pdf = questions_answers_by_pdf
         self.submission_ids = submission_ids
+        self.submissions = SubmissionTable.of(questions_answers_by_pdf, submission_ids)
 
         logger.info(
             f"Starting AI detection for {len(questions_answers_by_pdf)} submissions with {delay}s delay between calls"
@@ -246,15 +304,8 @@ class AIDetector:
         }
 
         # Include results for all PDFs
-        pdf_files_list = list(self.questions_answers_by_pdf.keys())
-        for pdf_file in self.questions_answers_by_pdf:
-            qa_results = self.questions_answers_by_pdf.get(pdf_file, {})
+        for pdf_file, submission_id, qa_results in self.submissions.items():
             ai_data = self.ai_detection_results.get(pdf_file, {})
-            submission_id = (
-                self.submission_ids[pdf_files_list.index(pdf_file)]
-                if self.submission_ids
-                else pdf_file
-            )
 
             question_results = {}
             total_ai_score = 0
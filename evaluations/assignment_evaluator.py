@@ -1,10 +1,12 @@
-from models.models import AssignmentEvaluation
+from models.models import AssignmentEvaluation, AssignmentSubmission
 from utils.mongodb import mongo_db
 from evaluations.feedback import FeedbackGenerator
 from evaluations.assignment_score import AssignmentScoreCalculator
 from evaluations.grammar import GrammarChecker
 from evaluations.context_score import ContextScorer
 from evaluations.base_extractor import PDFQuestionAnswerExtractor
+from evaluations.submissions import SubmissionTable
+from utils.clean_text import normalize_answer
 from pymongo import UpdateOne
 from datetime import datetime, timezone
 import os
@@ -98,6 +100,18 @@ class AssignmentEvaluator:
 
         return teacher_questions, questions_answers_by_submission
 
+    def student_ids_of(self, submission_ids) -> dict:
+        """{submission_id: student_id} for the given submissions"""
+        try:
+            return dict(
+                self.db.query(AssignmentSubmission.id, AssignmentSubmission.student_id)
+                .filter(AssignmentSubmission.id.in_(list(submission_ids)))
+                .all()
+            )
+        except Exception as e:
+            print(f"Could not look up students of submissions: {e}")
+            return {}
+
     def run(self, pdf_files, total_grade, submission_ids=None):
         # Extract questions and answers from PDFs
         self.extract_qa_pairs(pdf_files, submission_ids=submission_ids)
@@ -139,36 +153,65 @@ class AssignmentEvaluator:
         if bulk_qa_updates:
             mongo_db.db["qa_extractions"].bulk_write(bulk_qa_updates)
 
-        # Context scoring (already optimized with batch BLEURT)
-        context_results = self.context_scorer.run(
-            teacher_questions,
-            questions_answers_by_submission,
-            submission_ids,
-            total_score=total_grade,
-        )
-        print(
-            f"Context scoring completed: {len(context_results['results'])} submissions processed"
+        # Initialize score calculator early
+        score_calculator = AssignmentScoreCalculator(
+            total_grade=total_grade,
+            # Divide by 2 since we have Q&A pairs
+            num_questions=len(teacher_questions) // 2,
+            db=self.db,
         )
 
-        # Plagiarism checking if enabled
+        # One id-indexed view of the submissions, shared by the stages below
+        submissions = SubmissionTable(questions_answers_by_submission, submission_ids)
+
+        # Answers whose score is already forced to zero, as
+        # {submission_id: {question_key: reason}}; later stages skip them
+        zeroed_answers = {}
+
+        # Plagiarism checking first: it is local and cheap, and answers it zeroes
+        # need no context or grammar scoring
         if self.request.enable_plagiarism:
             try:
                 from evaluations.plagiarism import PlagiarismChecker
 
                 self.plagiarism_checker = PlagiarismChecker(
-                    self.course_id, self.assignment_id, submission_ids=submission_ids
+                    self.course_id,
+                    self.assignment_id,
+                    submission_ids=submissions,
+                    student_ids=self.student_ids_of(submissions.ids),
                 )
                 plagiarism_results = self.plagiarism_checker.run(
                     teacher_questions,
                     questions_answers_by_submission,
-                    submission_ids=submission_ids,
+                    submission_ids=submissions,
                 )
                 print(
                     f"Plagiarism checking completed: {len(plagiarism_results['results'])} submissions processed"
                 )
+
+                for result in plagiarism_results["results"]:
+                    for q_key, scores in result["question_results"].items():
+                        if score_calculator.is_zeroed(
+                            plagiarism_score=scores["plagiarism_score"]
+                        ):
+                            zeroed_answers.setdefault(result["pdf_file"], {})[
+                                q_key
+                            ] = "plagiarism"
             except Exception as e:
                 print(f"Error in plagiarism checking: {str(e)}")
 
+        # Context scoring (already optimized with batch BLEURT)
+        context_results = self.context_scorer.run(
+            teacher_questions,
+            questions_answers_by_submission,
+            submission_ids,
+            total_score=total_grade,
+            skipped_answers=zeroed_answers,
+        )
+        print(
+            f"Context scoring completed: {len(context_results['results'])} submissions processed"
+        )
+
         # AI detection if enabled
         if self.request.enable_ai_detection:
             try:
@@ -184,12 +227,19 @@ class AssignmentEvaluator:
                 ai_results = self.ai_detector.run(
                     teacher_questions,
                     questions_answers_by_submission,
-                    submission_ids=submission_ids,
+                    submission_ids=submissions,
                     delay=ai_delay,
                 )
                 print(
                     f"AI detection completed: {len(ai_results['results']) if ai_results else 0} submissions processed"
                 )
+
+                for submission_id, result in ai_results["results"].items():
+                    for q_key, scores in result["question_results"].items():
+                        if score_calculator.is_zeroed(ai_score=scores["ai_score"]):
+                            zeroed_answers.setdefault(submission_id, {}).setdefault(
+                                q_key, "ai_detection"
+                            )
             except Exception as e:
                 print(f"Error in AI detection: {str(e)}")
 
@@ -211,23 +261,43 @@ class AssignmentEvaluator:
                     f"📊 Processing {len(questions_answers_by_submission)} submissions for grammar"
                 )
 
+                # Check each distinct answer once (up to whitespace) and share the
+                # result with every submission that contains it
+                grammar_jobs = {}
+                answers_by_submission = {}
                 for submission_id, qa_pairs in questions_answers_by_submission.items():
-                    print(f"📝 Processing grammar for submission {submission_id}")
-
-                    # Collect all answers for this submission
                     answers_to_check = {}
+                    skipped = zeroed_answers.get(submission_id, {})
                     for key, text in qa_pairs.items():
                         if key.startswith("Answer#"):
-                            answers_to_check[key] = text
-
-                    print(
-                        f"📝 Found {len(answers_to_check)} answers to check for submission {submission_id}"
-                    )
+                            if f"Question#{key.split('#')[1]}" in skipped:
+                                continue
+                            normalized = normalize_answer(text)
+                            grammar_jobs.setdefault(normalized, text)
+                            answers_to_check[key] = normalized
+                    answers_by_submission[submission_id] = answers_to_check
+
+                total_answers = sum(len(a) for a in answers_by_submission.values())
+                print(
+                    f"📝 Checking {len(grammar_jobs)} distinct answers of {total_answers}"
+                )
+                job_keys = {
+                    normalized: f"Answer#{i}"
+                    for i, normalized in enumerate(grammar_jobs)
+                }
+                job_results = self.grammar_checker.evaluate_batch(
+                    {
+                        job_keys[normalized]: text
+                        for normalized, text in grammar_jobs.items()
+                    },
+                    grammar_delay,
+                )
 
-                    # Batch process all answers for this submission
-                    grammar_results = self.grammar_checker.evaluate_batch(
-                        answers_to_check, grammar_delay
-                    )
+                for submission_id, answers_to_check in answers_by_submission.items():
+                    grammar_results = {
+                        key: job_results[job_keys[normalized]]
+                        for key, normalized in answers_to_check.items()
+                    }
                     print(
                         f"📝 Grammar results for submission {submission_id}: {grammar_results}"
                     )
@@ -257,6 +327,31 @@ class AssignmentEvaluator:
                             )
                         )
 
+                    # Answers already scored zero are marked skipped, not checked
+                    for q_key, reason in zeroed_answers.get(submission_id, {}).items():
+                        all_grammar_updates.append(
+                            UpdateOne(
+                                {
+                                    "course_id": self.course_id,
+                                    "assignment_id": self.assignment_id,
+                                    "submission_id": submission_id,
+                                    "questions.question_number": int(
+                                        q_key.split("#")[1]
+                                    ),
+                                },
+                                {
+                                    "$set": {
+                                        "questions.$.scores.grammar": {
+                                            "score": 0.0,
+                                            "skipped": True,
+                                            "skip_reason": reason,
+                                            "evaluated_at": datetime.now(timezone.utc),
+                                        }
+                                    }
+                                },
+                            )
+                        )
+
                     # Calculate average grammar score for submission
                     avg_grammar = (
                         sum(grammar_scores) / len(grammar_scores)
@@ -307,237 +402,211 @@ class AssignmentEvaluator:
                 f"Running feedback generation with {feedback_delay}s delay between API calls"
             )
 
-            for i, pdf_file in enumerate(pdf_files[1:]):  # Skip teacher PDF
-                if i < len(submission_ids):
-                    submission_id = submission_ids[i]
-                    feedback_result = self.feedback_generator.run(
-                        [pdf_file], [submission_id], delay=feedback_delay
-                    )
-                    print(
-                        f"Feedback generated for submission {submission_id}: {feedback_result}"
-                    )
+            # Student PDFs come in the same order as the submission ids
+            pdf_file_of = dict(zip(submission_ids or [], pdf_files[1:]))
+            for _, submission_id, _ in submissions.items():
+                feedback_result = self.feedback_generator.run(
+                    [pdf_file_of.get(submission_id, submission_id)],
+                    [submission_id],
+                    delay=feedback_delay,
+                )
+                print(
+                    f"Feedback generated for submission {submission_id}: {feedback_result}"
+                )
         except Exception as e:
             print(f"Error generating feedback: {str(e)}")
 
-        # Initialize score calculator early
-        score_calculator = AssignmentScoreCalculator(
-            total_grade=total_grade,
-            # Divide by 2 since we have Q&A pairs
-            num_questions=len(teacher_questions) // 2,
-            db=self.db,
-        )
-
         # Calculate total scores for all submissions - OPTIMIZED
         total_scores = []
         final_score_updates = []
 
-        for i, pdf_file in enumerate(pdf_files[1:]):  # Skip teacher PDF
-            if i < len(submission_ids):
-                submission_id = submission_ids[i]
+        for _, submission_id, _ in submissions.items():
+            # Get evaluation data from MongoDB
+            eval_doc = mongo_db.db["evaluation_results"].find_one(
+                {
+                    "course_id": self.course_id,
+                    "assignment_id": self.assignment_id,
+                    "submission_id": submission_id,
+                }
+            )
 
-                # Get evaluation data from MongoDB
-                eval_doc = mongo_db.db["evaluation_results"].find_one(
-                    {
-                        "course_id": self.course_id,
-                        "assignment_id": self.assignment_id,
-                        "submission_id": submission_id,
-                    }
-                )
+            if eval_doc:
+                questions = eval_doc.get("questions", [])
+                question_results = {}
 
-                if eval_doc:
-                    questions = eval_doc.get("questions", [])
-                    question_results = {}
+                # Calculate score for each question
+                for question in questions:
+                    q_num = question.get("question_number")
+                    scores = question.get("scores", {})
 
-                    # Calculate score for each question
-                    for question in questions:
-                        q_num = question.get("question_number")
-                        scores = question.get("scores", {})
+                    print(
+                        f"Processing question {q_num}, scores type: {type(scores)}, scores: {scores}"
+                    )
 
+                    # Safely extract scores, handling both dict and float formats
+                    try:
+                        context_score = (
+                            scores.get("context", {})
+                            if isinstance(scores, dict)
+                            else {}
+                        )
                         print(
-                            f"Processing question {q_num}, scores type: {type(scores)}, scores: {scores}"
+                            f"Context score raw: {context_score}, type: {type(context_score)}"
                         )
 
-                        # Safely extract scores, handling both dict and float formats
-                        try:
+                        if isinstance(context_score, dict):
+                            context_score = context_score.get("score", 0)
+                        else:
                             context_score = (
-                                scores.get("context", {})
-                                if isinstance(scores, dict)
-                                else {}
-                            )
-                            print(
-                                f"Context score raw: {context_score}, type: {type(context_score)}"
+                                float(context_score) if context_score is not None else 0
                             )
 
-                            if isinstance(context_score, dict):
-                                context_score = context_score.get("score", 0)
-                            else:
-                                context_score = (
-                                    float(context_score)
-                                    if context_score is not None
-                                    else 0
-                                )
-
+                        plagiarism_score = (
+                            scores.get("plagiarism", {})
+                            if isinstance(scores, dict)
+                            else {}
+                        )
+                        if isinstance(plagiarism_score, dict):
+                            plagiarism_score = plagiarism_score.get("score", 0)
+                        else:
                             plagiarism_score = (
-                                scores.get("plagiarism", {})
-                                if isinstance(scores, dict)
-                                else {}
-                            )
-                            if isinstance(plagiarism_score, dict):
-                                plagiarism_score = plagiarism_score.get("score", 0)
-                            else:
-                                plagiarism_score = (
-                                    float(plagiarism_score)
-                                    if plagiarism_score is not None
-                                    else 0
-                                )
-
-                            ai_score = (
-                                scores.get("ai_detection", {})
-                                if isinstance(scores, dict)
-                                else {}
+                                float(plagiarism_score)
+                                if plagiarism_score is not None
+                                else 0
                             )
-                            if isinstance(ai_score, dict):
-                                ai_score = ai_score.get("score", 0)
-                            else:
-                                ai_score = (
-                                    float(ai_score) if ai_score is not None else 0
-                                )
 
+                        ai_score = (
+                            scores.get("ai_detection", {})
+                            if isinstance(scores, dict)
+                            else {}
+                        )
+                        if isinstance(ai_score, dict):
+                            ai_score = ai_score.get("score", 0)
+                        else:
+                            ai_score = float(ai_score) if ai_score is not None else 0
+
+                        grammar_score = (
+                            scores.get("grammar", {})
+                            if isinstance(scores, dict)
+                            else {}
+                        )
+                        if isinstance(grammar_score, dict):
+                            grammar_score = grammar_score.get("score", 0)
+                        else:
                             grammar_score = (
-                                scores.get("grammar", {})
-                                if isinstance(scores, dict)
-                                else {}
-                            )
-                            if isinstance(grammar_score, dict):
-                                grammar_score = grammar_score.get("score", 0)
-                            else:
-                                grammar_score = (
-                                    float(grammar_score)
-                                    if grammar_score is not None
-                                    else 0
-                                )
-
-                            print(
-                                f"Extracted scores - context: {context_score}, plagiarism: {plagiarism_score}, ai: {ai_score}, grammar: {grammar_score}"
+                                float(grammar_score) if grammar_score is not None else 0
                             )
 
-                            question_score = score_calculator.calculate_question_score(
-                                context_score=context_score,
-                                plagiarism_score=plagiarism_score,
-                                ai_score=ai_score,
-                                grammar_score=grammar_score,
-                            )
+                        print(
+                            f"Extracted scores - context: {context_score}, plagiarism: {plagiarism_score}, ai: {ai_score}, grammar: {grammar_score}"
+                        )
 
-                            question_results[f"Question#{q_num}"] = {
-                                "context_score": context_score,
-                                "plagiarism_score": plagiarism_score,
-                                "ai_score": ai_score,
-                                "grammar_score": grammar_score,
-                                "total_score": question_score,
-                            }
-
-                        except Exception as e:
-                            logger.error(
-                                f"Error processing scores for question {q_num}: {e}"
-                            )
-                            logger.error(f"Scores object: {scores}")
-                            # Set default values
-                            question_results[f"Question#{q_num}"] = {
-                                "context_score": 0,
-                                "plagiarism_score": 0,
-                                "ai_score": 0,
-                                "grammar_score": 0,
-                                "total_score": 0,
-                            }
-
-                    # Calculate final evaluation
-                    evaluation_result = (
-                        score_calculator.calculate_submission_evaluation(
-                            question_results=question_results
+                        question_score = score_calculator.calculate_question_score(
+                            context_score=context_score,
+                            plagiarism_score=plagiarism_score,
+                            ai_score=ai_score,
+                            grammar_score=grammar_score,
                         )
-                    )
 
-                    # Prepare bulk update for total scores and question scores
-                    update_fields = {
-                        "overall_scores.total": {
-                            "score": evaluation_result["total_score"],
-                            "evaluated_at": datetime.now(timezone.utc),
+                        question_results[f"Question#{q_num}"] = {
+                            "context_score": context_score,
+                            "plagiarism_score": plagiarism_score,
+                            "ai_score": ai_score,
+                            "grammar_score": grammar_score,
+                            "total_score": question_score,
                         }
-                    }
 
-                    # Add other scores if they exist
-                    if "avg_context_score" in evaluation_result:
-                        update_fields["overall_scores.context"] = {
-                            "score": evaluation_result["avg_context_score"],
-                            "evaluated_at": datetime.now(timezone.utc),
+                    except Exception as e:
+                        logger.error(
+                            f"Error processing scores for question {q_num}: {e}"
+                        )
+                        logger.error(f"Scores object: {scores}")
+                        # Set default values
+                        question_results[f"Question#{q_num}"] = {
+                            "context_score": 0,
+                            "plagiarism_score": 0,
+                            "ai_score": 0,
+                            "grammar_score": 0,
+                            "total_score": 0,
                         }
 
-                    # Prepare question score updates
-                    question_score_updates = []
-                    for question in questions:
-                        q_num = question.get("question_number")
-                        q_key = f"Question#{q_num}"
-                        if q_key in question_results:
-                            question_score_updates.append(
-                                UpdateOne(
-                                    {
-                                        "course_id": self.course_id,
-                                        "assignment_id": self.assignment_id,
-                                        "submission_id": submission_id,
-                                        "questions.question_number": q_num,
-                                    },
-                                    {
-                                        "$set": {
-                                            "questions.$.scores.total": {
-                                                "score": round(
-                                                    question_results[q_key][
-                                                        "total_score"
-                                                    ],
-                                                    4,
-                                                ),
-                                                "evaluated_at": datetime.now(
-                                                    timezone.utc
-                                                ),
-                                            }
-                                        }
-                                    },
-                                )
-                            )
+                # Calculate final evaluation
+                evaluation_result = score_calculator.calculate_submission_evaluation(
+                    question_results=question_results
+                )
 
-                    # Add to bulk operations
-                    final_score_updates.append(
-                        UpdateOne(
-                            {
-                                "course_id": self.course_id,
-                                "assignment_id": self.assignment_id,
-                                "submission_id": submission_id,
-                            },
-                            {"$set": update_fields},
-                        )
-                    )
+                # Prepare bulk update for total scores and question scores
+                update_fields = {
+                    "overall_scores.total": {
+                        "score": evaluation_result["total_score"],
+                        "evaluated_at": datetime.now(timezone.utc),
+                    }
+                }
+
+                # Add other scores if they exist
+                if "avg_context_score" in evaluation_result:
+                    update_fields["overall_scores.context"] = {
+                        "score": evaluation_result["avg_context_score"],
+                        "evaluated_at": datetime.now(timezone.utc),
+                    }
 
-                    # Execute question score updates
-                    if question_score_updates:
-                        mongo_db.db["evaluation_results"].bulk_write(
-                            question_score_updates
+                # Prepare question score updates
+                question_score_updates = []
+                for question in questions:
+                    q_num = question.get("question_number")
+                    q_key = f"Question#{q_num}"
+                    if q_key in question_results:
+                        question_score_updates.append(
+                            UpdateOne(
+                                {
+                                    "course_id": self.course_id,
+                                    "assignment_id": self.assignment_id,
+                                    "submission_id": submission_id,
+                                    "questions.question_number": q_num,
+                                },
+                                {
+                                    "$set": {
+                                        "questions.$.scores.total": {
+                                            "score": round(
+                                                question_results[q_key]["total_score"],
+                                                4,
+                                            ),
+                                            "evaluated_at": datetime.now(timezone.utc),
+                                        }
+                                    }
+                                },
+                            )
                         )
 
-                    total_scores.append(
+                # Add to bulk operations
+                final_score_updates.append(
+                    UpdateOne(
                         {
+                            "course_id": self.course_id,
+                            "assignment_id": self.assignment_id,
                             "submission_id": submission_id,
-                            "total_score": evaluation_result["total_score"],
-                            "context_score": evaluation_result.get(
-                                "avg_context_score", 0
-                            ),
-                            "plagiarism_score": evaluation_result.get(
-                                "avg_plagiarism_score", 0
-                            ),
-                            "ai_score": evaluation_result.get("avg_ai_score", 0),
-                            "grammar_score": evaluation_result.get(
-                                "avg_grammar_score", 0
-                            ),
-                        }
+                        },
+                        # A fresh total clears a plagiarism recheck's mark
+                        {"$set": update_fields, "$unset": {"needs_reevaluation": ""}},
                     )
+                )
+
+                # Execute question score updates
+                if question_score_updates:
+                    mongo_db.db["evaluation_results"].bulk_write(question_score_updates)
+
+                total_scores.append(
+                    {
+                        "submission_id": submission_id,
+                        "total_score": evaluation_result["total_score"],
+                        "context_score": evaluation_result.get("avg_context_score", 0),
+                        "plagiarism_score": evaluation_result.get(
+                            "avg_plagiarism_score", 0
+                        ),
+                        "ai_score": evaluation_result.get("avg_ai_score", 0),
+                        "grammar_score": evaluation_result.get("avg_grammar_score", 0),
+                    }
+                )
 
         # Execute all final score updates in one operation
         if final_score_updates:
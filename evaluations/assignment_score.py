@@ -21,6 +21,12 @@ class AssignmentScoreCalculator:
         )
         self.ai_threshold = 0.9  # If AI score is above 90%, zero the score
 
+    def is_zeroed(self, plagiarism_score=None, ai_score=None) -> bool:
+        """Whether a question scores zero regardless of its context score"""
+        plagiarism = float(plagiarism_score) if plagiarism_score is not None else 0.0
+        ai = float(ai_score) if ai_score is not None else 0.0
+        return plagiarism > self.plagiarism_threshold or ai > self.ai_threshold
+
     def calculate_question_score(
         self, context_score, plagiarism_score=None, ai_score=None, grammar_score=None
     ):
@@ -44,7 +50,7 @@ class AssignmentScoreCalculator:
             base_score = context * score_per_question
 
             # Apply penalties for high plagiarism/AI scores
-            if plagiarism > self.plagiarism_threshold or ai > self.ai_threshold:
+            if self.is_zeroed(plagiarism, ai):
                 return 0.0  # Zero score for high plagiarism/AI
 
             # Apply graduated penalties
@@ -1,21 +1,102 @@
 from utils.mongodb import mongo_db
+from utils.embedding_cache import EmbeddingCache
+from utils.score_cache import ScoreCache
+from utils.clean_text import clean_and_tokenize_text, normalize_answer
 from utils.bleurt.bleurt import score as bleurt_score
-import re
+from evaluations.llm_judge import LLMJudge
 import sys
 import os
+import threading
+import time
 import numpy as np
+import onnxruntime as ort
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from pathlib import Path
 from pymongo import UpdateOne
 from fastembed import TextEmbedding
-from sklearn.metrics.pairwise import cosine_similarity
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(PROJECT_ROOT)
 
 
+def normalize_rows(matrix):
+    """L2-normalize each row of a matrix, leaving all-zero rows untouched"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def load_embedding_model(
+    model_name, intra_op_threads=0, inter_op_threads=0, quantized=False
+):
+    """Load a fastembed model, optionally with explicit ONNX Runtime threading.
+
+    fastembed's `threads` sets intra- and inter-op threads to the same value,
+    so whenever a thread count is given the ONNX session is rebuilt with its
+    own options. Zero keeps ONNX Runtime's default for that setting. With
+    `quantized`, the session runs an int8 copy of the model (see
+    quantize_embedding_model).
+    """
+    if not intra_op_threads and not inter_op_threads and not quantized:
+        return TextEmbedding(model_name)
+
+    model = TextEmbedding(model_name)
+    inner = model.model
+    description = inner.model_description
+    model_file = (
+        description["model_file"]
+        if isinstance(description, dict)
+        else description.model_file
+    )
+    model_path = Path(inner._model_dir) / model_file
+    if quantized:
+        model_path = quantize_embedding_model(model_path)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        options.inter_op_num_threads = inter_op_threads
+    if inter_op_threads > 1:
+        # Inter-op threads are only used when independent nodes run in parallel
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+    inner.model = ort.InferenceSession(
+        str(model_path),
+        sess_options=options,
+        providers=inner.model.get_providers(),
+    )
+    return model
+
+
+def quantize_embedding_model(model_path):
+    """Write a dynamically int8-quantized copy next to an ONNX model, once.
+
+    Weights are stored as int8 and activations are quantized at run time, so
+    no calibration data is needed. Returns the path of the int8 model.
+    """
+    model_path = Path(model_path)
+    quantized_path = model_path.with_name(f"{model_path.stem}_int8.onnx")
+    if not quantized_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {model_path.name} to int8 (one time only)...")
+        partial_path = quantized_path.with_suffix(".partial")
+        quantize_dynamic(
+            str(model_path), str(partial_path), weight_type=QuantType.QInt8
+        )
+        partial_path.replace(quantized_path)
+    return quantized_path
+
+
 class TextSimilarity:
     _instance = None
     _model = None
+    _cache = None
+
+    DEFAULT_BATCH_SIZE = 64
 
     def __new__(cls, model_name="BAAI/bge-small-en-v1.5"):
         if cls._instance is None:
@@ -23,26 +104,134 @@ class TextSimilarity:
         return cls._instance
 
     def __init__(self, model_name="BAAI/bge-small-en-v1.5"):
+        quantized = os.getenv("EMBEDDING_QUANTIZED", "false").lower() == "true"
         if TextSimilarity._model is None:
             print("Loading Text Embedding Model (one time only)...")
-            TextSimilarity._model = TextEmbedding(model_name)
+            TextSimilarity._model = load_embedding_model(
+                model_name,
+                intra_op_threads=int(os.getenv("EMBEDDING_INTRA_OP_THREADS", "0")),
+                inter_op_threads=int(os.getenv("EMBEDDING_INTER_OP_THREADS", "0")),
+                quantized=quantized,
+            )
+        if TextSimilarity._cache is None:
+            # int8 vectors differ slightly from fp32 ones, so never share entries
+            TextSimilarity._cache = EmbeddingCache(
+                f"{model_name}:int8" if quantized else model_name
+            )
         self.dense_model = TextSimilarity._model
+        self.cache = TextSimilarity._cache
+        self.model_name = model_name
+        self.batch_size = int(
+            os.getenv("EMBEDDING_BATCH_SIZE", str(self.DEFAULT_BATCH_SIZE))
+        )
+
+    def warm_up(self):
+        """Run one full batch through the model, bypassing the cache.
+
+        The first inference pays for ONNX Runtime allocations and thread pool
+        start-up; doing it at startup keeps that off the first evaluation.
+        """
+        start = time.perf_counter()
+        texts = ["warm-up text for the embedding model"] * self.batch_size
+        list(self.dense_model.embed(texts, batch_size=self.batch_size))
+        print(f"Embedding model warmed up in {time.perf_counter() - start:.2f}s")
+
+    def embed_many(self, texts, batch_size=None):
+        """Embed texts in fastembed batches, running each distinct text once.
+
+        Vectors are looked up in the embedding cache first, so only texts
+        never seen before reach the model. Returns a float32 matrix with one
+        row per input text, in input order.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        keys = [self.cache.key(text) for text in texts]
+        text_of = dict(zip(keys, texts))
+        vectors = self.cache.get_many(list(text_of))
+
+        missing = [key for key in text_of if key not in vectors]
+        if missing:
+            embedded = self.dense_model.embed(
+                [text_of[key] for key in missing],
+                batch_size=batch_size or self.batch_size,
+            )
+            new_vectors = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, embedded)
+            }
+            self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return np.stack([vectors[key] for key in keys]).astype(np.float32, copy=False)
 
     def get_text_embedding(self, text):
-        embedding = np.array(list(self.dense_model.embed([text]))[0])
-        return embedding
+        return self.embed_many([text])[0]
+
+    def pairwise_cosine_similarity(self, texts1, texts2):
+        """Cosine similarity of texts1[i] and texts2[i] for every i.
+
+        All texts are embedded in one batched call and the similarities are
+        computed as a single row-wise dot product of normalized embeddings.
+        """
+        texts1, texts2 = list(texts1), list(texts2)
+        assert len(texts1) == len(texts2), "Both text lists must have equal length"
+        if not texts1:
+            return np.zeros(0, dtype=np.float32)
+
+        embeddings = normalize_rows(self.embed_many(texts1 + texts2))
+        left, right = embeddings[: len(texts1)], embeddings[len(texts1) :]
+        return np.einsum("ij,ij->i", left, right)
 
     def compute_cosine_similarity(self, text1, text2):
-        embedding1 = self.get_text_embedding(text1)
-        embedding2 = self.get_text_embedding(text2)
-        similarity = cosine_similarity([embedding1], [embedding2])
-        return similarity[0][0]
+        return self.pairwise_cosine_similarity([text1], [text2])[0]
+
+
+def load_scorer():
+    """Create the context scorer selected by CONTEXT_SCORER ("llm" or "local").
+
+    The LLM judge is the default. The local cross-encoder is a relevance
+    reranker, so it is opt-in and its scores are only on the judge's scale
+    once benchmarks/bench_context_scorer.py has calibrated it against the
+    judge on real answers (BLEURT_CALIBRATION). When the judge is not
+    configured, the local scorer is used instead of failing.
+    """
+    if os.getenv("CONTEXT_SCORER", "llm").lower() != "local":
+        try:
+            return LLMJudge()
+        except ValueError as e:
+            print(f"LLM judge unavailable ({e}), using the local context scorer")
+
+    scorer = bleurt_score.BleurtScorer()
+    if scorer.calibration is None:
+        print(
+            "WARNING: local context scorer is not calibrated against the "
+            "judge; set BLEURT_CALIBRATION"
+        )
+    return scorer
 
 
 class ContextScorer:
     _bleurt_scorer = None
     _text_similarity = None
 
+    # Shared by all scorers, since they share the local scorer and the
+    # embedding model. The LLM judge bounds its own requests instead
+    # (JUDGE_MAX_CONCURRENCY).
+    _judge_slots = threading.BoundedSemaphore(
+        int(os.getenv("CONTEXT_JUDGE_CONCURRENCY", "4"))
+    )
+    _embedding_slots = threading.BoundedSemaphore(
+        int(os.getenv("CONTEXT_EMBEDDING_CONCURRENCY", "1"))
+    )
+
+    # Cascade fits per scorer_id, {scorer_id: (fitted_at, fit or None)},
+    # shared by every scorer of the process and refreshed after a TTL
+    _cascade_fits = {}
+    _cascade_lock = threading.Lock()
+    _cascade_index_ready = False
+
     def __init__(self, course_id: int, assignment_id: int, rag):
         self.course_id = course_id
         self.assignment_id = assignment_id
@@ -56,66 +245,418 @@ class ContextScorer:
 
         if ContextScorer._bleurt_scorer is None:
             print("Loading BLEURT scorer (cached for all future evaluations)...")
-            ContextScorer._bleurt_scorer = bleurt_score.BleurtScorer()
+            ContextScorer._bleurt_scorer = load_scorer()
         self.scorer = ContextScorer._bleurt_scorer
 
         # MongoDB setup
         self.db = mongo_db.db
         self.results_collection = self.db["evaluation_results"]
+        self.score_cache = ScoreCache()
 
         # Scoring weights
         self.BLEURT_WEIGHT = 0.7
         self.SIMILARITY_WEIGHT = 0.2
         self.RELEVANCE_WEIGHT = 0.1
 
-    def calculate_score(
-        self, question: str, answer: str, total_score_per_question: float
-    ) -> float:
-        # Check for empty or very short answers first
-        if not answer or len(answer.strip()) < 5:
-            print(f"Empty or very short answer detected - assigning zero score")
-            return 0.0
-
-        # Get reference from RAG
+        # Pairs per scorer forward pass
+        self.SCORER_BATCH_SIZE = int(os.getenv("CONTEXT_SCORER_BATCH_SIZE", "32"))
+
+        # Threads for retrieval, embedding and judge chunks of one run
+        self.MAX_WORKERS = int(os.getenv("CONTEXT_MAX_WORKERS", "8"))
+
+        # Cascade mode: only answers whose similarity falls inside the
+        # uncertainty band go to the judge; the rest get an estimate from
+        # similarity. A small audit sample of confident answers is judged
+        # anyway so agreement with full-judge scoring stays measurable.
+        self.CASCADE_ENABLED = os.getenv("CONTEXT_CASCADE", "false").lower() == "true"
+        self.CASCADE_LOW = float(os.getenv("CONTEXT_CASCADE_LOW", "0.5"))
+        self.CASCADE_HIGH = float(os.getenv("CONTEXT_CASCADE_HIGH", "0.9"))
+        self.CASCADE_TOLERANCE = float(os.getenv("CONTEXT_CASCADE_TOLERANCE", "0.1"))
+        self.CASCADE_MIN_SAMPLES = int(os.getenv("CONTEXT_CASCADE_MIN_SAMPLES", "50"))
+        self.CASCADE_AUDIT_RATE = float(os.getenv("CONTEXT_CASCADE_AUDIT_RATE", "0.05"))
+        self.CASCADE_CALIBRATION_TTL = float(
+            os.getenv("CONTEXT_CASCADE_CALIBRATION_TTL", "3600")
+        )
+        self.cascade_slope = 1.0
+        self.cascade_intercept = 0.0
+        self._cascade_calibrated = False
+        self._audit_rng = np.random.default_rng()
+        self.cascade_stats = self._empty_cascade_stats()
+
+    def retrieve_reference(self, question: str):
+        """Fetch the cleaned RAG reference for a question, or None if nothing matched"""
         rag_results = self.rag.search(question)
         if not rag_results:
-            return 0.0
-
-        reference = self.clean_and_tokenize_text(rag_results)
+            return None
+        return self.clean_and_tokenize_text(rag_results)
+
+    def retrieve_references(self, teacher_questions: dict) -> dict:
+        """Fetch references once per teacher question, searching concurrently"""
+        questions = {
+            q_key: question
+            for q_key, question in teacher_questions.items()
+            if q_key.startswith("Question#")
+        }
+        if not questions:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            references = executor.map(self.retrieve_reference, questions.values())
+            return dict(zip(questions, references))
+
+    def score_items(self, items: list) -> list:
+        """Score (question, reference, answer) triples as one batch.
+
+        Similarity and relevance for all items come from a single batched
+        embedding pass. Returns one dict per item with the normalized (0-1)
+        `context_score` and the components it was built from.
+        """
+        if not items:
+            return []
+
+        # Embedding runs alongside the judge chunks unless the cascade needs
+        # similarities first to decide which answers to judge
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            similarity_future = executor.submit(self._similarities, items)
+
+            if self.CASCADE_ENABLED:
+                similarities, relevances = similarity_future.result()
+                judge_mask, audit_mask = self._cascade_masks(similarities)
+            else:
+                judge_mask = np.ones(len(items), dtype=bool)
+                audit_mask = np.zeros(len(items), dtype=bool)
 
-        try:
-            # Calculate BLEURT score
-            bleurt_result = self.scorer.score(
-                references=[f"QUESTION: {question}\n\n{reference}"], candidates=[answer]
+            judge_positions = np.flatnonzero(judge_mask)
+            judge_scores = self._judge_concurrently(
+                executor, [items[i] for i in judge_positions]
             )
+            similarities, relevances = similarity_future.result()
+
+        estimates = self._estimate_judge(similarities)
+        judged = iter(judge_scores)
 
-            if isinstance(bleurt_result, (list, np.ndarray)):
-                bleurt = float(np.round(bleurt_result[0], 4))
+        results = []
+        for i in range(len(items)):
+            if judge_mask[i]:
+                bleurt, source = next(judged), "judge"
             else:
-                bleurt = float(np.round(bleurt_result, 4))
+                bleurt, source = estimates[i], "estimate"
+            if audit_mask[i]:
+                self.cascade_stats["audit_errors"].append(abs(bleurt - estimates[i]))
+
+            similarity, relevance = float(similarities[i]), float(relevances[i])
+            results.append(
+                {
+                    "context_score": self._combine(bleurt, similarity, relevance),
+                    "similarity": similarity,
+                    "relevance": relevance,
+                    "judge": bleurt,
+                    "judge_source": source,
+                }
+            )
 
-        except Exception as e:
-            print(f"BLEURT scoring error: {e}")
-            bleurt = 0.0
+        if self.CASCADE_ENABLED:
+            self.cascade_stats["total"] += len(items)
+            self.cascade_stats["judged"] += int(judge_mask.sum())
+            self.cascade_stats["audited"] += int(audit_mask.sum())
+
+        return results
+
+    def score_items_cached(self, items: list) -> list:
+        """score_items, reusing stored outputs for previously scored items.
+
+        Only judge-scored results are stored, so cascade estimates are always
+        recomputed. The weighted score is rebuilt from the cached components.
+        """
+        scorer_id = self.scorer_id()
+        weights = (self.BLEURT_WEIGHT, self.SIMILARITY_WEIGHT, self.RELEVANCE_WEIGHT)
+        keys = [
+            self.score_cache.key(
+                question, reference, normalize_answer(answer), scorer_id, weights
+            )
+            for question, reference, answer in items
+        ]
+        cached = self.score_cache.get_many(set(keys))
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if len(missing) < len(items):
+            print(
+                f"Context score cache: {len(items) - len(missing)} of {len(items)} hit"
+            )
+
+        results = [None] * len(items)
+        fresh = {}
+        for i, scored in zip(missing, self.score_items([items[i] for i in missing])):
+            results[i] = scored
+            if scored["judge_source"] == "judge":
+                fresh[keys[i]] = scored
+        self.score_cache.put_many(fresh)
+
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                scored = cached[key]
+                results[i] = {
+                    "context_score": self._combine(
+                        scored["judge"], scored["similarity"], scored["relevance"]
+                    ),
+                    **scored,
+                }
+        return results
 
+    def scorer_id(self) -> str:
+        """Identify the judge and embedding models behind cached scores"""
+        model = getattr(self.scorer, "checkpoint", None) or getattr(
+            self.scorer, "model", ""
+        )
+        calibration = getattr(self.scorer, "calibration", None)
+        if calibration:
+            # Recalibrating changes the scores, so it gets its own id
+            model += f"@{hash(tuple(calibration['raw'] + calibration['judge']))}"
+        embedding = self.text_similarity.cache.model_name
+        return f"{type(self.scorer).__name__}:{model}|{embedding}"
+
+    def _similarities(self, items: list):
+        """Reference-answer similarity and question-answer relevance per item.
+
+        Every distinct text is embedded once. Then, per question, the answers
+        form an N x D matrix that is multiplied by the normalized [reference,
+        question] vectors, giving both scores for all answers in one product.
+        """
         try:
-            # Calculate similarity scores
-            similarity = float(
-                np.round(
-                    self.text_similarity.compute_cosine_similarity(reference, answer), 4
+            texts = list(dict.fromkeys(text for item in items for text in item))
+            row_of = {text: row for row, text in enumerate(texts)}
+            with self._embedding_slots:
+                vectors = normalize_rows(self.text_similarity.embed_many(texts))
+
+            positions_by_question = {}
+            for position, (question, reference, _) in enumerate(items):
+                positions_by_question.setdefault((question, reference), []).append(
+                    position
                 )
+
+            cosines = np.empty((len(items), 2), dtype=np.float32)
+            for (question, reference), positions in positions_by_question.items():
+                answers = vectors[[row_of[items[p][2]] for p in positions]]
+                anchors = vectors[[row_of[reference], row_of[question]]]
+                cosines[positions] = answers @ anchors.T
+
+            return np.round(cosines[:, 0], 4), np.round(cosines[:, 1], 4)
+        except Exception as e:
+            print(f"Similarity calculation error: {e}")
+            return np.zeros(len(items)), np.zeros(len(items))
+
+    def _judge_concurrently(self, executor, items: list) -> list:
+        """Judge items in per-question chunks on the pool, in input order.
+
+        Chunks keep answers to one question together so the local scorer can
+        still batch them; at most CONTEXT_JUDGE_CONCURRENCY chunks run at
+        once. The LLM judge gets all items in one call, since it packs
+        answers into requests and limits requests in flight itself.
+        """
+        if isinstance(self.scorer, LLMJudge):
+            return self._bleurt_scores(items)
+
+        positions_by_question = {}
+        for position, (question, _, _) in enumerate(items):
+            positions_by_question.setdefault(question, []).append(position)
+
+        chunks = [
+            positions[start : start + self.SCORER_BATCH_SIZE]
+            for positions in positions_by_question.values()
+            for start in range(0, len(positions), self.SCORER_BATCH_SIZE)
+        ]
+        futures = [
+            executor.submit(self._judge_chunk, [items[p] for p in chunk])
+            for chunk in chunks
+        ]
+
+        scores = [0.0] * len(items)
+        for chunk, future in zip(chunks, futures):
+            for position, score in zip(chunk, future.result()):
+                scores[position] = score
+        return scores
+
+    def _judge_chunk(self, items: list) -> list:
+        with self._judge_slots:
+            return self._bleurt_scores(items)
+
+    def _estimate_judge(self, similarities) -> list:
+        """Predict the judge score from similarity with the calibrated line"""
+        estimates = np.clip(
+            self.cascade_slope * np.asarray(similarities) + self.cascade_intercept,
+            0.0,
+            1.0,
+        )
+        return [float(np.round(estimate, 4)) for estimate in estimates]
+
+    def _cascade_masks(self, similarities):
+        """Return (judge, audit) masks; audited items are judged too"""
+        if not self._cascade_calibrated:
+            self.calibrate_cascade()
+
+        similarities = np.asarray(similarities)
+        uncertain = (similarities > self.CASCADE_LOW) & (
+            similarities < self.CASCADE_HIGH
+        )
+        audit = ~uncertain & (
+            self._audit_rng.random(len(similarities)) < self.CASCADE_AUDIT_RATE
+        )
+        return uncertain | audit, audit
+
+    def calibrate_cascade(self):
+        """Fit the judge estimate and the uncertainty band from stored results.
+
+        Uses past questions that were scored by the judge (not estimated) with
+        the current scorer and embedding model (scorer_id). The configured
+        band is replaced by one fitted from that history: it leaves out the
+        widest low/high similarity tails where the estimate's mean absolute
+        error stays within CASCADE_TOLERANCE, so it can end up wider or
+        narrower than configured. With too little history the configured band
+        and an identity estimate are kept. The fit is shared by all scorers
+        with the same scorer_id and redone after CASCADE_CALIBRATION_TTL
+        seconds.
+        """
+        self._cascade_calibrated = True
+        scorer_id = self.scorer_id()
+        with ContextScorer._cascade_lock:
+            cached = ContextScorer._cascade_fits.get(scorer_id)
+            if (
+                cached is None
+                or time.monotonic() - cached[0] > self.CASCADE_CALIBRATION_TTL
+            ):
+                try:
+                    cached = (time.monotonic(), self._fit_cascade(scorer_id))
+                except Exception as e:
+                    print(f"Cascade calibration skipped: {e}")
+                    return
+                ContextScorer._cascade_fits[scorer_id] = cached
+
+        if cached[1] is not None:
+            (
+                self.cascade_slope,
+                self.cascade_intercept,
+                self.CASCADE_LOW,
+                self.CASCADE_HIGH,
+            ) = cached[1]
+
+    def _ensure_cascade_index(self):
+        if not ContextScorer._cascade_index_ready:
+            self.results_collection.create_index(
+                [
+                    ("questions.scores.context.scorer", 1),
+                    ("questions.scores.context.judge_source", 1),
+                ]
             )
+            ContextScorer._cascade_index_ready = True
+
+    def _fit_cascade(self, scorer_id):
+        """Return (slope, intercept, low, high) fitted on judged history, or
+        None when there is too little of it"""
+        self._ensure_cascade_index()
+        judged = {
+            "questions.scores.context.judge_source": "judge",
+            "questions.scores.context.scorer": scorer_id,
+        }
+        pipeline = [
+            # Indexed pre-filter on documents, then the exact per-question match
+            {"$match": judged},
+            {"$unwind": "$questions"},
+            {"$match": judged},
+            {"$sort": {"questions.scores.context.evaluated_at": -1}},
+            {"$limit": 5000},
+            {
+                "$project": {
+                    "similarity": "$questions.scores.context.similarity",
+                    "judge": "$questions.scores.context.judge",
+                }
+            },
+        ]
+        history = list(self.results_collection.aggregate(pipeline))
 
-            relevance = float(
-                np.round(
-                    self.text_similarity.compute_cosine_similarity(question, answer), 4
-                )
+        if len(history) < max(2, self.CASCADE_MIN_SAMPLES):
+            print(
+                f"Cascade calibration: {len(history)} stored results, "
+                f"keeping band ({self.CASCADE_LOW}, {self.CASCADE_HIGH})"
             )
+            return None
+
+        similarities = np.array([doc["similarity"] for doc in history], dtype=float)
+        judges = np.array([doc["judge"] for doc in history], dtype=float)
+        slope, intercept = (
+            float(value) for value in np.polyfit(similarities, judges, 1)
+        )
+
+        order = np.argsort(similarities)
+        similarities = similarities[order]
+        estimates = np.clip(slope * similarities + intercept, 0.0, 1.0)
+        errors = np.abs(np.round(estimates, 4) - judges[order])
+        n = len(similarities)
+
+        # Widen each confident tail in 5% steps while the estimate stays close
+        low, high = similarities[0] - 1e-6, similarities[-1] + 1e-6
+        # (at least one result per step, so small histories still work)
+        for fraction in np.arange(0.05, 0.5, 0.05):
+            k = max(1, int(n * fraction))
+            if errors[:k].mean() > self.CASCADE_TOLERANCE:
+                break
+            low = similarities[k - 1]
+        for fraction in np.arange(0.05, 0.5, 0.05):
+            k = max(1, int(n * fraction))
+            if errors[n - k :].mean() > self.CASCADE_TOLERANCE:
+                break
+            high = similarities[n - k]
+
+        print(
+            f"Cascade calibrated on {n} results: band ({low:.4f}, {high:.4f}), "
+            f"estimate = {slope:.3f} * sim + {intercept:.3f}"
+        )
+        return slope, intercept, float(low), float(high)
+
+    def _empty_cascade_stats(self) -> dict:
+        return {"total": 0, "judged": 0, "audited": 0, "audit_errors": []}
+
+    def cascade_report(self) -> dict:
+        """Summarize judge savings and audited agreement for the current run"""
+        stats = self.cascade_stats
+        errors = np.array(stats["audit_errors"])
+        return {
+            "enabled": self.CASCADE_ENABLED,
+            "band": [self.CASCADE_LOW, self.CASCADE_HIGH],
+            "answers": stats["total"],
+            "judged": stats["judged"],
+            "skipped": stats["total"] - stats["judged"],
+            "audited": stats["audited"],
+            "audit_mae": round(float(errors.mean()), 4) if len(errors) else None,
+            "audit_within_tolerance": (
+                round(float((errors <= self.CASCADE_TOLERANCE).mean()), 4)
+                if len(errors)
+                else None
+            ),
+        }
+
+    def _bleurt_scores(self, items: list) -> list:
+        """Run the scorer over all items in one length-batched call"""
+        try:
+            bleurt_results = self.scorer.score(
+                references=[
+                    f"QUESTION: {question}\n\n{reference}"
+                    for question, reference, _ in items
+                ],
+                candidates=[answer for _, _, answer in items],
+                # The judge sizes its requests with JUDGE_BATCH_SIZE
+                batch_size=(
+                    None
+                    if isinstance(self.scorer, LLMJudge)
+                    else self.SCORER_BATCH_SIZE
+                ),
+            )
+            return [float(np.round(result, 4)) for result in bleurt_results]
+
         except Exception as e:
-            print(f"Similarity calculation error: {e}")
-            similarity = 0.0
-            relevance = 0.0
+            print(f"BLEURT scoring error: {e}")
+            return [0.0] * len(items)
 
+    def _combine(self, bleurt: float, similarity: float, relevance: float) -> float:
         # Calculate weighted score and KEEP IT NORMALIZED (0-1)
         combined_score = (
             bleurt * self.BLEURT_WEIGHT
@@ -126,113 +667,118 @@ class ContextScorer:
         # Return normalized score (0-1), NOT multiplied by total_score_per_question
         return round(max(0.0, min(1.0, combined_score)), 4)
 
-    def process_submission(
-        self, teacher_questions: dict, qa_pairs: dict, total_score: float = 100.0
-    ) -> dict:
-        num_questions = len([k for k in teacher_questions if k.startswith("Question#")])
+    def calculate_score(
+        self, question: str, answer: str, total_score_per_question: float
+    ) -> float:
+        # Check for empty or very short answers first
+        if not answer or len(answer.strip()) < 5:
+            print(f"Empty or very short answer detected - assigning zero score")
+            return 0.0
 
-        question_scores = []
-        total_normalized_score = 0
+        reference = self.retrieve_reference(question)
+        if reference is None:
+            return 0.0
 
-        # Process each question individually
-        for q_num in range(1, num_questions + 1):
-            q_key = f"Question#{q_num}"
-            a_key = f"Answer#{q_num}"
+        return self.score_items([(question, reference, answer)])[0]["context_score"]
 
-            if q_key in teacher_questions:
-                question = teacher_questions[q_key]
-                answer = qa_pairs.get(a_key, "")
+    def score_submissions(
+        self,
+        teacher_questions: dict,
+        questions_answers_by_submission: dict,
+        skipped_answers: dict = None,
+    ) -> dict:
+        """Score every submission of an assignment with one batched pass.
+
+        Answers, questions and references of all submissions are collected
+        first, so each distinct text is embedded once for the whole run.
+        Identical answers to the same question (up to whitespace) are scored
+        once and the result is shared by every submission that gave them.
+        Answers listed in skipped_answers ({submission_id: {question_key:
+        reason}}) already score zero elsewhere and are marked skipped.
+        """
+        num_questions = len([k for k in teacher_questions if k.startswith("Question#")])
+        references = self.retrieve_references(teacher_questions)
 
-                if not answer or len(answer.strip()) < 5:
-                    question_scores.append(
-                        {
-                            "question_key": q_key,
-                            "context_score": 0.0,  # Normalized score (0-1)
-                        }
-                    )
-                    continue
+        question_scores = {}
+        items = []
+        owners = []
+        item_index = {}
 
-                # Get reference from RAG
-                rag_results = self.rag.search(question)
-                if not rag_results:
-                    question_scores.append(
-                        {
-                            "question_key": q_key,
-                            "context_score": 0.0,  # Normalized score (0-1)
-                        }
-                    )
-                    continue
+        for submission_id, qa_pairs in questions_answers_by_submission.items():
+            scores = question_scores.setdefault(submission_id, {})
+            skipped = (skipped_answers or {}).get(submission_id, {})
 
-                reference = self.clean_and_tokenize_text(rag_results)
+            for q_num in range(1, num_questions + 1):
+                q_key = f"Question#{q_num}"
+                a_key = f"Answer#{q_num}"
 
-                # Calculate BLEURT score
-                try:
-                    bleurt_result = self.scorer.score(
-                        references=[f"QUESTION: {question}\n\n{reference}"],
-                        candidates=[answer],
-                    )
+                if q_key not in teacher_questions:
+                    continue
 
-                    if isinstance(bleurt_result, (list, np.ndarray)):
-                        bleurt = float(np.round(bleurt_result[0], 4))
-                    else:
-                        bleurt = float(np.round(bleurt_result, 4))
+                answer = qa_pairs.get(a_key, "")
+                reference = references.get(q_key)
 
-                except Exception as e:
-                    print(f"BLEURT scoring error for question {q_num}: {e}")
-                    bleurt = 0.0
+                # Empty answers and questions without a reference score zero
+                if not answer or len(answer.strip()) < 5 or reference is None:
+                    scores[q_key] = {"context_score": 0.0}
+                    continue
 
-                # Calculate similarity scores
-                try:
-                    similarity = float(
-                        np.round(
-                            self.text_similarity.compute_cosine_similarity(
-                                reference, answer
-                            ),
-                            4,
-                        )
-                    )
+                if q_key in skipped:
+                    scores[q_key] = {
+                        "context_score": 0.0,
+                        "skipped": True,
+                        "skip_reason": skipped[q_key],
+                    }
+                    continue
 
-                    relevance = float(
-                        np.round(
-                            self.text_similarity.compute_cosine_similarity(
-                                question, answer
-                            ),
-                            4,
-                        )
-                    )
-                except Exception as e:
-                    print(f"Similarity calculation error for question {q_num}: {e}")
-                    similarity = 0.0
-                    relevance = 0.0
-
-                # Calculate weighted score - KEEP NORMALIZED (0-1)
-                combined_score = (
-                    bleurt * self.BLEURT_WEIGHT
-                    + similarity * self.SIMILARITY_WEIGHT
-                    + relevance * self.RELEVANCE_WEIGHT
-                )
+                # Placeholder keeps question order until the batch is scored
+                scores[q_key] = None
+                job = (q_key, normalize_answer(answer))
+                if job not in item_index:
+                    item_index[job] = len(items)
+                    items.append((teacher_questions[q_key], reference, answer))
+                owners.append((submission_id, q_key, item_index[job]))
+
+        if len(items) < len(owners):
+            print(f"Context scoring {len(items)} distinct answers of {len(owners)}")
+
+        scored_items = self.score_items_cached(items)
+        for submission_id, q_key, index in owners:
+            question_scores[submission_id][q_key] = dict(scored_items[index])
+
+        results = {}
+        for submission_id, scores in question_scores.items():
+            total_normalized_score = sum(
+                scored["context_score"] for scored in scores.values()
+            )
 
-                # Store normalized score (0-1)
-                normalized_score = round(max(0.0, min(1.0, combined_score)), 4)
-                total_normalized_score += normalized_score
+            # Calculate average normalized score (0-1)
+            avg_normalized_score = (
+                total_normalized_score / num_questions if num_questions > 0 else 0.0
+            )
 
-                question_scores.append(
-                    {
-                        "question_key": q_key,
-                        "context_score": normalized_score,  # This is 0-1
-                    }
-                )
+            results[submission_id] = {
+                "questions": [
+                    # context_score is 0-1; components are kept for calibration
+                    {"question_key": q_key, **scored}
+                    for q_key, scored in scores.items()
+                ],
+                # This is 0-1
+                "context_overall_score": round(avg_normalized_score, 4),
+            }
 
-        # Calculate average normalized score (0-1)
-        avg_normalized_score = (
-            total_normalized_score / num_questions if num_questions > 0 else 0.0
-        )
+        return results
 
-        return {
-            "questions": question_scores,
-            # This is 0-1
-            "context_overall_score": round(avg_normalized_score, 4),
-        }
+    def process_submission(
+        self,
+        teacher_questions: dict,
+        qa_pairs: dict,
+        total_score: float = 100.0,
+        skipped: dict = None,
+    ) -> dict:
+        return self.score_submissions(
+            teacher_questions, {None: qa_pairs}, {None: skipped or {}}
+        )[None]
 
     def save_results_to_mongo(self, submission_id: str, results: dict):
         """Update evaluation document with context scores using bulk operations"""
@@ -279,6 +825,7 @@ class ContextScorer:
                                 "questions.$.scores.context": {
                                     "score": round(question["context_score"], 4),
                                     "evaluated_at": datetime.now(timezone.utc),
+                                    **self._score_components(question),
                                 }
                             }
                         },
@@ -289,27 +836,59 @@ class ContextScorer:
             if updates:
                 self.results_collection.bulk_write(updates)
 
+    def _score_components(self, question: dict) -> dict:
+        """Fields stored next to the score so later runs can calibrate the cascade"""
+        if question.get("skipped"):
+            return {"skipped": True, "skip_reason": question["skip_reason"]}
+        if "judge" not in question:
+            return {}
+        return {
+            "similarity": question["similarity"],
+            "relevance": question["relevance"],
+            "judge": question["judge"],
+            "judge_source": question["judge_source"],
+            "scorer": self.scorer_id(),
+        }
+
     def run(
         self,
         teacher_questions,
         questions_answers_by_submission,
         submission_ids,
         total_score: float = 100.0,
+        skipped_answers: dict = None,
     ) -> dict:
+        skipped_answers = skipped_answers or {}
         final_results = {
             "course_id": self.course_id,
             "assignment_id": self.assignment_id,
             "results": [],
         }
 
+        self.cascade_stats = self._empty_cascade_stats()
+
+        # Score all submissions together so embeddings are computed in batches
+        try:
+            batched_results = self.score_submissions(
+                teacher_questions, questions_answers_by_submission, skipped_answers
+            )
+        except Exception as e:
+            print(f"Batched context scoring failed, scoring one by one: {e}")
+            batched_results = {}
+
         for submission_id, qa_pairs in questions_answers_by_submission.items():
             print("submission_id>>>", submission_id)
 
             try:
                 # Process submission with error handling
-                results = self.process_submission(
-                    teacher_questions, qa_pairs, total_score=total_score
-                )
+                results = batched_results.get(submission_id)
+                if results is None:
+                    results = self.process_submission(
+                        teacher_questions,
+                        qa_pairs,
+                        total_score=total_score,
+                        skipped=skipped_answers.get(submission_id),
+                    )
 
                 # Save to MongoDB
                 self.save_results_to_mongo(submission_id, results)
@@ -344,20 +923,14 @@ class ContextScorer:
                     }
                 )
 
+        if self.CASCADE_ENABLED:
+            final_results["cascade"] = self.cascade_report()
+            print(f"Context cascade: {final_results['cascade']}")
+
         return final_results
 
     def clean_and_tokenize_text(self, data):
-        cleaned_texts = ""
-        for point in data.points:
-            if "text" in point.payload:
-                raw_text = point.payload["text"]
-                cleaned_text = re.sub(r"[●■○]", "", raw_text)
-                cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
-                tokens = cleaned_text.split()
-                filtered_tokens = [token.lower() for token in tokens if token.isalnum()]
-                cleaned_text = " ".join(filtered_tokens)
-                cleaned_texts += cleaned_text
-        return cleaned_texts
+        return clean_and_tokenize_text(data)
 
 
 if __name__ == "__main__":
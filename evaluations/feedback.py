@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from pymongo import UpdateOne
 from groq import Groq
 from utils.mongodb import mongo_db
+from utils.clean_text import normalize_answer
 
 
 class FeedbackGenerator:
@@ -28,6 +29,9 @@ class FeedbackGenerator:
         # Default delay between API calls (in seconds)
         self.default_delay = 1.0
 
+        # Feedback for identical answers with identical scores is generated once
+        self._question_feedback_memo = {}
+
         # Prompt templates - updated to include question and answer content
         self.question_prompt = """Provide brief, constructive feedback (2-3 sentences only) for this student's answer.
 
@@ -159,6 +163,14 @@ Target 1-2 key areas for improvement based on the weakest scores."""
             print(f"Failed to generate feedback for question {q_num}: {str(e)}")
             return "Feedback generation failed. Please review the scores manually."
 
+    def _feedback_memo_key(self, q_num, scores: Dict[str, Any], student_answer: str):
+        """Key question feedback by answer text and the scores shown in the prompt"""
+        shown_scores = tuple(
+            round(scores.get(name, {}).get("score", 0), 4)
+            for name in ("context", "plagiarism", "ai_detection", "grammar")
+        )
+        return q_num, normalize_answer(student_answer), shown_scores
+
     def generate_overall_feedback(
         self,
         overall_scores: Dict[str, Any],
@@ -369,9 +381,16 @@ Target 1-2 key areas for improvement based on the weakest scores."""
                         f"Using fallback text: Q: '{question_text}', A: '{student_answer}'"
                     )
 
-                feedback = self.generate_question_feedback(
-                    q_num, scores, question_text, student_answer, delay
-                )
+                memo_key = self._feedback_memo_key(q_num, scores, student_answer)
+                feedback = self._question_feedback_memo.get(memo_key)
+                if feedback is None:
+                    feedback = self.generate_question_feedback(
+                        q_num, scores, question_text, student_answer, delay
+                    )
+                    if not feedback.startswith("Feedback generation failed"):
+                        self._question_feedback_memo[memo_key] = feedback
+                else:
+                    print(f"Reusing feedback for duplicate answer to Q{q_num}")
                 question_feedback[q_num] = feedback
                 print(f"Generated feedback for Q{q_num}: {feedback[:50]}...")
 
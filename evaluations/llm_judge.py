@@ -0,0 +1,222 @@
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from groq import Groq
+
+logger = logging.getLogger(__name__)
+
+
+class LLMJudge:
+    """Scores candidate answers against a reference text with an LLM.
+
+    Answers that share a reference (i.e. answers to the same question) are
+    packed into one request, each tagged with an id, and the model replies
+    with a JSON array of {"id", "score"} objects. Items missing from or
+    invalid in a reply are retried on their own; everything else is kept.
+
+    At most max_concurrency requests are in flight per judge, however many
+    score() calls run at once, so a judge shared by concurrent evaluations
+    stays within the provider's limits.
+
+    The model comes from JUDGE_MODEL and the key from GROQ_API_KEY; without
+    either the constructor raises ValueError, so callers can fall back to
+    the local scorer instead of sending requests that can only fail.
+
+    Exposes the same `score(references=..., candidates=...)` interface as
+    BleurtScorer so ContextScorer can use either.
+    """
+
+    SYSTEM_PROMPT = "You are a text alignment scorer. You reply with JSON only."
+
+    PROMPT = """Your role is to evaluate candidate texts based on their alignment with the reference text and how contextually relevant they are to the question posed.
+
+### Instructions
+- Evaluate each candidate on its semantic similarity to the reference text.
+- Assess the accuracy of the information the candidate provides.
+- Measure the completeness of the answer: all critical aspects of the reference should be addressed.
+- Focus on how contextually aligned the answer is with the reference text.
+
+### Scoring Guidelines
+- Score strictly between 0 and 1, never exactly 1.
+- 0 indicates no meaningful alignment with the reference or complete irrelevance.
+- A score closer to 1 indicates high relevance, accuracy, and alignment with the reference.
+- Penalize answers that contain incorrect information, lack depth or completeness, or do not align with the reference.
+- Score every candidate independently of the others.
+
+### Reference Text
+The first line contains the question under "QUESTION:", the following lines provide reference context.
+
+{reference}
+
+### Candidates
+{candidates}
+
+### Response Format
+Respond with a JSON array holding one object per candidate, in any order:
+[{{"id": 1, "score": 0.85}}, {{"id": 2, "score": 0.4}}]"""
+
+    # Rough prompt size estimate; good enough to keep requests under budget
+    CHARS_PER_TOKEN = 4
+    RESPONSE_TOKENS_PER_ITEM = 16
+
+    def __init__(
+        self,
+        model: str = None,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        max_prompt_tokens: int = None,
+        max_retries: int = None,
+        client=None,
+    ):
+        self.model = model or os.getenv("JUDGE_MODEL")
+        if not self.model:
+            raise ValueError("JUDGE_MODEL is not set")
+        if client is None and not os.getenv("GROQ_API_KEY"):
+            raise ValueError("GROQ_API_KEY is not set")
+        self.batch_size = batch_size or int(os.getenv("JUDGE_BATCH_SIZE", "10"))
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("JUDGE_MAX_CONCURRENCY", "4")
+        )
+        self.max_prompt_tokens = max_prompt_tokens or int(
+            os.getenv("JUDGE_MAX_PROMPT_TOKENS", "6000")
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else int(os.getenv("JUDGE_MAX_RETRIES", "2"))
+        )
+        self.client = client or Groq(api_key=os.getenv("GROQ_API_KEY"), timeout=30.0)
+
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        # Number of chat-completion requests sent, for monitoring
+        self.requests_made = 0
+        self._requests_lock = threading.Lock()
+
+    def score(self, *args, references=[], candidates=[], batch_size=None):
+        """Score candidates[i] against references[i]; returns a list of floats.
+
+        Items the judge never scores validly fall back to 0.0.
+        """
+        assert not args, "score() only accepts keyword arguments"
+        references, candidates = list(references), list(candidates)
+        assert len(references) == len(
+            candidates
+        ), "The number of candidates must match the number of references."
+        if not candidates:
+            return []
+
+        batch_size = batch_size or self.batch_size
+        scores = {}
+
+        positions_by_reference = {}
+        for position, reference in enumerate(references):
+            positions_by_reference.setdefault(reference, []).append(position)
+        pending = positions_by_reference
+
+        for attempt in range(self.max_retries + 1):
+            requests = [
+                (reference, chunk)
+                for reference, positions in pending.items()
+                for chunk in self._pack(reference, positions, candidates, batch_size)
+            ]
+            if not requests:
+                break
+            if attempt:
+                logger.info(f"Retrying {len(requests)} judge requests for failed items")
+
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                replies = list(
+                    executor.map(
+                        lambda request: self._request(
+                            request[0], request[1], candidates
+                        ),
+                        requests,
+                    )
+                )
+            for reply in replies:
+                scores.update(reply)
+
+            pending = {}
+            for reference, positions in positions_by_reference.items():
+                failed = [position for position in positions if position not in scores]
+                if failed:
+                    pending[reference] = failed
+
+        if pending:
+            failed_count = sum(len(positions) for positions in pending.values())
+            logger.warning(f"Judge failed to score {failed_count} items, using 0.0")
+
+        return [scores.get(position, 0.0) for position in range(len(candidates))]
+
+    def _estimate_tokens(self, text: str) -> int:
+        return len(text) // self.CHARS_PER_TOKEN + 1
+
+    def _pack(self, reference, positions, candidates, batch_size):
+        """Split positions into requests bounded by item count and token budget"""
+        budget = self.max_prompt_tokens - self._estimate_tokens(self.PROMPT + reference)
+        chunk, chunk_tokens = [], 0
+
+        for position in positions:
+            tokens = self._estimate_tokens(candidates[position])
+            if chunk and (len(chunk) >= batch_size or chunk_tokens + tokens > budget):
+                yield chunk
+                chunk, chunk_tokens = [], 0
+            chunk.append(position)
+            chunk_tokens += tokens
+
+        if chunk:
+            yield chunk
+
+    def _request(self, reference, positions, candidates) -> dict:
+        """Send one packed request; returns {position: score} for valid items"""
+        candidate_block = "\n\n".join(
+            f"[id {item_id}]\n{candidates[position]}"
+            for item_id, position in enumerate(positions, start=1)
+        )
+        prompt = self.PROMPT.format(reference=reference, candidates=candidate_block)
+
+        try:
+            with self._request_slots:
+                with self._requests_lock:
+                    self.requests_made += 1
+                response = self.client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": self.SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt},
+                    ],
+                    model=self.model,
+                    temperature=0,
+                    max_tokens=self.RESPONSE_TOKENS_PER_ITEM * len(positions) + 32,
+                )
+            content = response.choices[0].message.content
+        except Exception as e:
+            logger.error(f"Judge request failed: {e}")
+            return {}
+
+        return self._parse(content, positions)
+
+    def _parse(self, content: str, positions) -> dict:
+        """Validate a JSON array reply, keeping only well-formed, in-range items"""
+        try:
+            start, end = content.find("["), content.rfind("]") + 1
+            items = json.loads(content[start:end])
+        except (ValueError, AttributeError):
+            logger.warning("Judge reply was not a JSON array")
+            return {}
+
+        scores = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                item_id = int(item["id"])
+                score = float(item["score"])
+            except (TypeError, KeyError, ValueError):
+                continue
+            if 1 <= item_id <= len(positions) and 0.0 <= score <= 1.0:
+                scores[positions[item_id - 1]] = score
+        return scores
+
+    def close(self):
+        pass
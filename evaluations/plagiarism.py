@@ -1,110 +1,1126 @@
+from collections import Counter
+from contextlib import ExitStack, closing
 from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from multiprocessing import get_context, resource_tracker, shared_memory
+import hashlib
+import os
+import re
+import zlib
+from typing import NamedTuple
+import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from pymongo import UpdateOne
 
+from evaluations.submissions import SubmissionTable
 from utils.mongodb import mongo_db
 
+_WORD = re.compile(r"\w+")
+
+
+class MinHashLSH:
+    """MinHash signatures over word shingles, bucketed by LSH banding.
+
+    Two answers become a candidate pair when every row of at least one band
+    matches. With b bands of r rows, a pair whose shingle sets have Jaccard
+    similarity s is found with probability 1 - (1 - s^r)^b.
+    """
+
+    MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+    MAX_HASH = np.uint64((1 << 32) - 1)
+
+    def __init__(self, num_perm=126, bands=42, shingle_size=2, seed=1):
+        assert num_perm % bands == 0, "num_perm must be a multiple of bands"
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        words = _WORD.findall(text.lower())
+        k = min(self.shingle_size, len(words)) or 1
+        shingles = {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+        return np.array(
+            [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles or {""}],
+            dtype=np.uint64,
+        )
+
+    def signature(self, text):
+        hashes = self.shingle_hashes(text)
+        # Universal hashing; uint64 overflow just wraps, which is fine for a hash
+        permuted = (np.outer(hashes, self.a) + self.b) % self.MERSENNE_PRIME
+        return (permuted & self.MAX_HASH).min(axis=0)
+
+    def signatures(self, texts):
+        return np.stack([self.signature(text) for text in texts])
+
+    def signatures_in(self, pool, texts, chunk_size=1024):
+        """signatures() of texts computed in chunks on a process pool"""
+        chunks = [texts[i : i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        params = (self.num_perm, self.bands, self.shingle_size, self.seed)
+        return np.concatenate(
+            list(pool.map(_signatures_task, [params] * len(chunks), chunks))
+        )
+
+    def candidate_pairs(self, signatures):
+        """Return an (M, 2) array of index pairs i < j sharing a band bucket"""
+        return _band_candidates(signatures, self.bands)
+
+
+class HyperplaneLSH:
+    """Random-hyperplane LSH for the cosine similarity of dense vectors.
+
+    Each band holds `rows` sign bits of random projections. Two vectors at
+    angle theta agree on a bit with probability 1 - theta / pi, so they
+    become a candidate pair with probability 1 - (1 - (1 - theta/pi)^r)^b.
+    """
+
+    def __init__(self, bands=24, rows=16, seed=1):
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+
+    def candidate_pairs(self, vectors):
+        planes = np.random.default_rng(self.seed).standard_normal(
+            (vectors.shape[1], self.bands * self.rows)
+        )
+        bits = (vectors @ planes.astype(vectors.dtype)) > 0
+        signatures = np.packbits(
+            bits.reshape(len(vectors), self.bands, self.rows), axis=2
+        ).reshape(len(vectors), -1)
+        return _band_candidates(signatures, self.bands)
+
+
+def _band_candidates(signatures, bands):
+    """(M, 2) index pairs i < j whose signatures agree on a whole band"""
+    rows = signatures.shape[1] // bands
+    pairs = set()
+    for band in range(bands):
+        band_rows = np.ascontiguousarray(signatures[:, band * rows : (band + 1) * rows])
+        buckets = {}
+        for index, row in enumerate(band_rows):
+            buckets.setdefault(row.tobytes(), []).append(index)
+        for members in buckets.values():
+            if len(members) > 1:
+                pairs.update(combinations(members, 2))
+
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+class Fingerprint(NamedTuple):
+    """Winnowing fingerprint of one text"""
+
+    selected: set  # Winnowed k-gram hashes
+    spans: dict  # {hash: [(start, end), ...]} character spans of every k-gram
+
+
+class Winnower:
+    """Winnowing fingerprints over word k-grams (Schleimer et al., 2003).
+
+    Words are lowercased and stripped of punctuation, every run of k words
+    is hashed, and the rightmost minimum hash of each window of `window`
+    consecutive k-grams is kept. Any passage of at least k + window - 1
+    shared words yields a shared fingerprint, so copies survive punctuation
+    changes and small edits outside that run. Every text uses the same k:
+    texts of fewer than k words have no fingerprint, and texts with fewer
+    than `window` k-grams keep all of them. Fingerprints only decide that
+    two answers overlap; passages then cover every k-gram the answers
+    share, so highlights reach the ends of each copied run.
+    """
+
+    def __init__(self, k=5, window=4):
+        self.k = k
+        self.window = window
+
+    def fingerprint(self, text):
+        """Return the text's Fingerprint: winnowed hashes and all k-gram spans"""
+        words = list(_WORD.finditer(text))
+        k = self.k
+        if len(words) < k:
+            return Fingerprint(set(), {})
+
+        tokens = [word.group().lower() for word in words]
+        hashes = [
+            zlib.crc32(" ".join(tokens[i : i + k]).encode("utf-8"))
+            for i in range(len(words) - k + 1)
+        ]
+
+        if len(hashes) < self.window:
+            selected = set(range(len(hashes)))
+        else:
+            selected = set()
+            for start in range(len(hashes) - self.window + 1):
+                best = start
+                for position in range(start + 1, start + self.window):
+                    if hashes[position] <= hashes[best]:
+                        best = position
+                selected.add(best)
+
+        spans = {}
+        for position, value in enumerate(hashes):
+            spans.setdefault(value, []).append(
+                (words[position].start(), words[position + k - 1].end())
+            )
+        return Fingerprint({hashes[position] for position in selected}, spans)
+
+    @staticmethod
+    def passages(fingerprint, other_fingerprint):
+        """Merged [start, end] spans of the text shared with the other.
+
+        Nothing is returned unless a winnowed hash of either text occurs in
+        the other; then every k-gram found in both texts is covered.
+        """
+        if fingerprint.selected.isdisjoint(
+            other_fingerprint.spans
+        ) and other_fingerprint.selected.isdisjoint(fingerprint.spans):
+            return []
+        spans = sorted(
+            span
+            for shared in fingerprint.spans.keys() & other_fingerprint.spans.keys()
+            for span in fingerprint.spans[shared]
+        )
+        merged = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+
+def _signatures_task(params, texts):
+    """Pool task: MinHash signatures of texts; equal params give equal hashes"""
+    return MinHashLSH(*params).signatures(texts)
+
+
+class PlagiarismCorpus:
+    """Persistent MinHash index of past answers, shared across assignments.
+
+    Each answer is stored once per (scope, assignment, submission, question)
+    with its text, its student and LSH band keys. A multikey index on
+    (scope, band_keys) lets new answers fetch their candidates without
+    scanning old documents. Entries are removed with their assignment or
+    submission. Like the other MongoDB caches here it is best-effort: errors
+    are logged and the check continues without history.
+    """
+
+    def __init__(
+        self, scope: str, lsh: MinHashLSH, collection_name="plagiarism_corpus"
+    ):
+        self.scope = scope
+        self.lsh = lsh
+        self.collection = mongo_db.db[collection_name]
+        self._index_ready = False
+
+    def band_keys(self, signature):
+        rows = self.lsh.rows
+        return [
+            f"{band}:"
+            + hashlib.blake2b(
+                signature[band * rows : (band + 1) * rows].tobytes(), digest_size=8
+            ).hexdigest()
+            for band in range(self.lsh.bands)
+        ]
+
+    def _ensure_index(self):
+        if not self._index_ready:
+            self.collection.create_index([("scope", 1), ("band_keys", 1)])
+            self._index_ready = True
+
+    def candidates(self, signatures, exclude_assignment_id, student_ids=None):
+        """Return (documents, pairs) for stored answers sharing a band.
+
+        documents lists each matching stored answer once; pairs holds
+        (row, column) for every signature row and the document it matched.
+        Answers of the assignment being evaluated are excluded, since they
+        are compared with each other directly, and so are a student's own
+        past answers when student_ids gives the student of each row.
+        """
+        rows_by_key = {}
+        for row, signature in enumerate(signatures):
+            for key in self.band_keys(signature):
+                rows_by_key.setdefault(key, set()).add(row)
+        if not rows_by_key:
+            return [], []
+
+        try:
+            self._ensure_index()
+            cursor = self.collection.find(
+                {
+                    "scope": self.scope,
+                    "assignment_id": {"$ne": exclude_assignment_id},
+                    "band_keys": {"$in": list(rows_by_key)},
+                },
+                {
+                    "text": 1,
+                    "band_keys": 1,
+                    "assignment_id": 1,
+                    "submission_id": 1,
+                    "question_key": 1,
+                    "student_id": 1,
+                },
+            )
+            stored = list(cursor)
+        except Exception as e:
+            print(f"Plagiarism corpus lookup failed: {e}")
+            return [], []
+
+        documents, pairs = [], []
+        for document in stored:
+            rows = set()
+            for key in document["band_keys"]:
+                rows |= rows_by_key.get(key, set())
+            student_id = document.get("student_id")
+            rows = [
+                row
+                for row in sorted(rows)
+                if student_id is None
+                or student_ids is None
+                or student_ids[row] != student_id
+            ]
+            if rows:
+                pairs.extend((row, len(documents)) for row in rows)
+                documents.append(document)
+        return documents, pairs
+
+    def add(self, assignment_id, entries):
+        """Store (submission_id, question_key, text, signature, student_id) entries"""
+        if not entries:
+            return
+
+        now = datetime.now(timezone.utc)
+        updates = [
+            UpdateOne(
+                {
+                    "scope": self.scope,
+                    "assignment_id": assignment_id,
+                    "submission_id": submission_id,
+                    "question_key": question_key,
+                },
+                {
+                    "$set": {
+                        "text": text,
+                        "student_id": student_id,
+                        "band_keys": self.band_keys(signature),
+                        "indexed_at": now,
+                    }
+                },
+                upsert=True,
+            )
+            for submission_id, question_key, text, signature, student_id in entries
+        ]
+        try:
+            self._ensure_index()
+            self.collection.bulk_write(updates, ordered=False)
+        except Exception as e:
+            print(f"Plagiarism corpus update failed: {e}")
+
+    def remove(self, assignment_id, submission_id=None):
+        """Drop an assignment's answers, or one submission's, from every scope"""
+        query = {"assignment_id": assignment_id}
+        if submission_id is not None:
+            query["submission_id"] = submission_id
+        try:
+            self.collection.delete_many(query)
+        except Exception as e:
+            print(f"Plagiarism corpus cleanup failed: {e}")
+
+
+class TopMatches(NamedTuple):
+    """The k most similar classmates of each answer to one question"""
+
+    pdf_files: list  # Answer of each row
+    rows: dict  # {pdf_file: row}
+    peers: np.ndarray  # (n, k) int32 rows of the peers, best first, -1 if unused
+    scores: np.ndarray  # (n, k) float32 similarities, 0.0 if unused
+    passages: dict  # {(row, slot): copied offsets} for pairs above the threshold
+    approximate: bool = False  # Only LSH candidate pairs were scored
+
+
+class PlagiarismState:
+    """TF-IDF state of an assignment's last full plagiarism run.
+
+    Per question, the fitted vocabulary and IDF are stored once, and every
+    answer is stored with its TF-IDF vector, its closest classmate and the
+    similarity to it. This lets a single resubmitted answer be compared
+    with the rest of the class without refitting anything.
+    """
+
+    def __init__(
+        self,
+        course_id: int,
+        assignment_id: int,
+        vocabulary_collection="plagiarism_vocabularies",
+        vector_collection="plagiarism_vectors",
+    ):
+        self.scope = {"course_id": course_id, "assignment_id": assignment_id}
+        self.vocabularies = mongo_db.db[vocabulary_collection]
+        self.vectors = mongo_db.db[vector_collection]
+
+    def save(self, vocabularies, vectors):
+        """Replace the assignment's state with the documents of a full run"""
+        try:
+            self.vocabularies.delete_many(self.scope)
+            self.vectors.delete_many(self.scope)
+            if vocabularies:
+                self.vocabularies.insert_many(
+                    [{**self.scope, **document} for document in vocabularies]
+                )
+            if vectors:
+                self.vectors.insert_many(
+                    [{**self.scope, **document} for document in vectors]
+                )
+        except Exception as e:
+            print(f"Saving plagiarism state failed: {e}")
+
+    def load(self):
+        """Return ({question_key: vocabulary}, {question_key: [vectors]})"""
+        vocabularies = {
+            document["question_key"]: document
+            for document in self.vocabularies.find(self.scope)
+        }
+        vectors = {}
+        for document in self.vectors.find(self.scope):
+            vectors.setdefault(document["question_key"], []).append(document)
+        return vocabularies, vectors
+
+    def remove(self, submission_id=None):
+        """Drop the whole state, or one submission's answer vectors"""
+        try:
+            if submission_id is None:
+                self.vocabularies.delete_many(self.scope)
+                self.vectors.delete_many(self.scope)
+            else:
+                self.vectors.delete_many({**self.scope, "submission_id": submission_id})
+        except Exception as e:
+            print(f"Plagiarism state cleanup failed: {e}")
+
+    def update(self, vectors):
+        """Upsert the given answer vectors"""
+        if not vectors:
+            return
+        self.vectors.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        **self.scope,
+                        "question_key": document["question_key"],
+                        "submission_id": document["submission_id"],
+                    },
+                    {"$set": document},
+                    upsert=True,
+                )
+                for document in vectors
+            ],
+            ordered=False,
+        )
+
+
+def _top_k_rows(block, start, k):
+    """Reduce a CSR block of similarity rows, starting at row `start`, to
+    the k best other columns of each row, best first"""
+    peers = np.full((block.shape[0], k), -1, dtype=np.int32)
+    scores = np.zeros((block.shape[0], k), dtype=np.float32)
+    for offset in range(block.shape[0]):
+        row_start, row_end = block.indptr[offset : offset + 2]
+        columns = block.indices[row_start:row_end]
+        data = block.data[row_start:row_end]
+
+        keep = (columns != start + offset) & (data > 0)
+        columns, data = columns[keep], data[keep]
+        if len(data) > k:
+            top = np.argpartition(-data, k - 1)[:k]
+            columns, data = columns[top], data[top]
+
+        # Best first; equal scores go to the earlier answer
+        order = np.lexsort((columns, -data))
+        peers[offset, : len(order)] = columns[order]
+        scores[offset, : len(order)] = np.clip(data[order], 0.0, 1.0)
+    return peers, scores
+
+
+def _fingerprints(winnower, text):
+    """fingerprint(row) of a question's answers, computed once per answer.
+
+    text(row) gives the answer of a row.
+    """
+    fingerprints = {}
+
+    def fingerprint(row):
+        if row not in fingerprints:
+            fingerprints[row] = winnower.fingerprint(text(row))
+        return fingerprints[row]
+
+    return fingerprint
+
+
+def _block_passages(fingerprint, start, peers, scores, threshold, known=None):
+    """{(row, slot): copied offsets} for a block's kept pairs above threshold.
+
+    fingerprint(row) gives an answer's Fingerprint; known maps (row, peer)
+    to offsets already extracted for that pair.
+    """
+    passages, known = {}, known or {}
+
+    for offset in range(len(peers)):
+        for slot in range(peers.shape[1]):
+            peer = int(peers[offset, slot])
+            if peer < 0 or scores[offset, slot] < threshold:
+                break
+            offsets = known.get((start + offset, peer))
+            if offsets is None:
+                offsets = Winnower.passages(
+                    fingerprint(start + offset), fingerprint(peer)
+                )
+            passages[start + offset, slot] = offsets
+    return passages
+
+
+def _share(array):
+    """Copy an array into a new shared memory block; returns (block, spec)"""
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=memory.buf)[:] = array
+    return memory, (memory.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    try:
+        memory = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block for cleanup too,
+        # and the worker would unlink it on exit
+        memory = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory, np.ndarray(shape, np.dtype(dtype), buffer=memory.buf)
+
+
+# Shared question a pool worker is attached to
+_worker_question = {}
+
+
+def _top_k_task(question, start, stop):
+    """Pool task: top-k peers and passages for rows start..stop of a question.
+
+    `question` names the shared memory blocks of the question's CSR matrix
+    and answer texts; a worker attaches to them once per question.
+    """
+    if _worker_question.get("name") != question["name"]:
+        for memory in _worker_question.get("memories", []):
+            memory.close()
+        memories, arrays = zip(*(_attach(spec) for spec in question["arrays"]))
+        data, indices, indptr, text_bytes, text_offsets = arrays
+
+        def text(row):
+            return bytes(text_bytes[text_offsets[row] : text_offsets[row + 1]]).decode(
+                "utf-8"
+            )
+
+        _worker_question.clear()
+        _worker_question.update(
+            name=question["name"],
+            memories=memories,
+            matrix=sparse.csr_matrix(
+                (data, indices, indptr), shape=question["shape"], copy=False
+            ),
+            # Kept across this worker's blocks of the question
+            fingerprint=_fingerprints(Winnower(*question["winnower"]), text),
+        )
+
+    matrix = _worker_question["matrix"]
+    block = matrix[start:stop]
+    if question["product"]:
+        block = block @ matrix.T
+    peers, scores = _top_k_rows(sparse.csr_matrix(block), start, question["k"])
+    passages = _block_passages(
+        _worker_question["fingerprint"],
+        start,
+        peers,
+        scores,
+        question["threshold"],
+    )
+    return start, peers, scores, passages
+
 
 class PlagiarismChecker:
+    # Rows of the similarity matrix computed per sparse product
+    ROW_BLOCK_SIZE = 1024
+
+    # Closest classmates kept, and persisted, per answer
+    TOP_K = int(os.getenv("PLAGIARISM_TOP_K", "5"))
+
+    # From this many answers to a question, row blocks go to a process pool
+    WORKERS = int(os.getenv("PLAGIARISM_WORKERS", str(os.cpu_count() or 1)))
+    PARALLEL_MIN_ANSWERS = int(os.getenv("PLAGIARISM_PARALLEL_MIN_ANSWERS", "20000"))
+
+    # Merge embedding similarity into the lexical score, to catch paraphrases
+    SEMANTIC = os.getenv("PLAGIARISM_SEMANTIC", "false").lower() == "true"
+    # Embedding cosine that counts as zero: at least SEMANTIC_FLOOR, raised to
+    # this quantile of the question's pairs, since answers share a topic
+    SEMANTIC_FLOOR = float(os.getenv("PLAGIARISM_SEMANTIC_FLOOR", "0.8"))
+    SEMANTIC_FLOOR_QUANTILE = float(
+        os.getenv("PLAGIARISM_SEMANTIC_FLOOR_QUANTILE", "0.9")
+    )
+    # From this many answers, semantic peers come from hyperplane LSH
+    SEMANTIC_ANN_MIN_ANSWERS = int(
+        os.getenv("PLAGIARISM_SEMANTIC_ANN_MIN_ANSWERS", "5000")
+    )
+
+    # From this many answers to a question, only LSH candidate pairs are
+    # scored. Exact scoring stays cheaper up to about 5000 answers, and
+    # answers without a candidate score 0, so LSH is kept for classes where
+    # exact scoring is too slow; results record when it was used.
+    LSH_MIN_ANSWERS = int(os.getenv("PLAGIARISM_LSH_MIN_ANSWERS", "20000"))
+
     def __init__(
         self,
         course_id: int,
         assignment_id: int,
         similarity_threshold: float = 0.8,
         submission_ids=None,
+        corpus_scope: str = None,
+        semantic: bool = None,
+        student_ids: dict = None,
     ):
         self.course_id = course_id
         self.assignment_id = assignment_id
         self.similarity_threshold = similarity_threshold
-        self.submission_ids = submission_ids or []  # List of submission_ids
+        self.submission_ids = submission_ids or []  # List or SubmissionTable
+        self.submissions = None
+        self.semantic = self.SEMANTIC if semantic is None else semantic
+        # {submission_id: student_id}, so the corpus skips a student's own answers
+        self.student_ids = student_ids or {}
 
         self.questions_answers_by_pdf = {}
         self.teacher_questions = {}
         self.similarity_results = {}
+        self.matches = {}
+        # {question_key: fingerprint(row)} over the rows of self.matches
+        self._fingerprints = {}
+
+        self.lsh = MinHashLSH()
+        self.winnower = Winnower()
+
+        # Process pool of large questions, started once and reused until
+        # close_pool() (run() closes it when the comparisons are done)
+        self._pool = None
+        self._pool_workers = 0
+
+        # Past answers of the course (or a wider scope) to check against
+        self.corpus = (
+            PlagiarismCorpus(corpus_scope or f"course:{course_id}", self.lsh)
+            if os.getenv("PLAGIARISM_CORPUS", "false").lower() == "true"
+            else None
+        )
+        self._corpus_entries = []
+
+        # Last run's TF-IDF state, for rechecking single resubmissions
+        self.state = (
+            PlagiarismState(course_id, assignment_id)
+            if os.getenv("PLAGIARISM_INCREMENTAL", "true").lower() == "true"
+            else None
+        )
+        self._fitted = {}
+        self._analyzer = TfidfVectorizer().build_analyzer()
 
         # MongoDB setup
         self.db = mongo_db.db
         self.results_collection = self.db["evaluation_results"]
 
+    def copied_passages(self, answer, fingerprint, other_fingerprint):
+        """Return the passages of answer shared with another answer.
+
+        Gives (text, offsets): the passages joined by " ... ", and their
+        [start, end] character offsets in answer for highlighting.
+        """
+        offsets = self.winnower.passages(fingerprint, other_fingerprint)
+        return " ... ".join(answer[start:end] for start, end in offsets), offsets
+
     def find_common_parts(self, answer_1: str, answer_2: str) -> str:
-        """Find common parts between two answers by comparing sentences."""
-        answer_1_sentences = set(answer_1.split(". "))
-        answer_2_sentences = set(answer_2.split(". "))
-        common_sentences = answer_1_sentences.intersection(answer_2_sentences)
-        return ". ".join(common_sentences)
+        """Find passages of answer_1 that also occur in answer_2."""
+        return self.copied_passages(
+            answer_1,
+            self.winnower.fingerprint(answer_1),
+            self.winnower.fingerprint(answer_2),
+        )[0]
 
     def compare_answers(self):
-        """Compare answers between student submissions"""
+        """Compare answers between student submissions.
+
+        For each question, one TF-IDF vectorizer is fit over every answer and
+        only the TOP_K most similar classmates of each answer are kept, in
+        the question's TopMatches. Passages are extracted for kept pairs
+        above the threshold.
+        """
         self.similarity_results = {
             pdf_file: {} for pdf_file in self.questions_answers_by_pdf
         }
+        self.matches = {}
+        self._fingerprints = {}
+        pdf_files = list(self.questions_answers_by_pdf)
 
-        for i, pdf_file in enumerate(self.questions_answers_by_pdf):
-            current_qa_dict = self.questions_answers_by_pdf.get(pdf_file, {})
-
-            for question_key in self.teacher_questions:
-                if not question_key.startswith("Question#"):
-                    continue
+        for question_key in self.teacher_questions:
+            if not question_key.startswith("Question#"):
+                continue
 
-                answer_key = f"Answer#{question_key.split('#')[1]}"
-                current_answer = current_qa_dict.get(answer_key, "").strip()
+            answer_key = f"Answer#{question_key.split('#')[1]}"
+            answers = [
+                self.questions_answers_by_pdf[pdf_file].get(answer_key, "").strip()
+                for pdf_file in pdf_files
+            ]
 
-                # Handle empty answers explicitly
-                if not current_answer or len(current_answer) < 3:
+            # Handle empty answers explicitly
+            answered = []
+            for index, answer in enumerate(answers):
+                if not answer or len(answer) < 3:
                     print(
-                        f"Empty or very short answer for {pdf_file} - {answer_key} - assigning zero plagiarism score"
+                        f"Empty or very short answer for {pdf_files[index]} - {answer_key} - assigning zero plagiarism score"
                     )
-                    self.similarity_results[pdf_file][question_key] = {
-                        "Comparisons": {},
-                        "max_similarity": 0.0,
-                        "copied_sentence": "",
-                    }
-                    continue  # Skip further processing for empty answers
+                else:
+                    answered.append(index)
 
-                question_result = {
-                    "Comparisons": {},
+            answered_pdfs = [pdf_files[i] for i in answered]
+            answered_texts = [answers[i] for i in answered]
+            vectorizer, tfidf_matrix = self.fit_tfidf(answered_texts)
+            embeddings = (
+                self.embed_answers(answered_texts)
+                if self.semantic and len(answered) > 1
+                else None
+            )
+            fingerprint = _fingerprints(self.winnower, answered_texts.__getitem__)
+            self._fingerprints[question_key] = fingerprint
+            peers, scores, passages = self.top_k_similarities(
+                answered_texts, tfidf_matrix, embeddings, fingerprint
+            )
+            # Answers with no LSH candidate score 0 rather than their true match
+            approximate = len(answered) >= self.LSH_MIN_ANSWERS
+            self._fitted[question_key] = (vectorizer, tfidf_matrix, answered_pdfs)
+            self.matches[question_key] = TopMatches(
+                answered_pdfs,
+                {pdf_file: row for row, pdf_file in enumerate(answered_pdfs)},
+                peers,
+                scores,
+                passages,
+                approximate,
+            )
+
+            for pdf_file in pdf_files:
+                self.similarity_results[pdf_file][question_key] = {
                     "max_similarity": 0.0,
                     "copied_sentence": "",
+                    "copied_offsets": [],
+                    "best_match": None,
+                    "approximate": approximate,
                 }
 
-                for j, other_pdf in enumerate(self.questions_answers_by_pdf):
-                    if i == j:
-                        continue
+            for row, index in enumerate(answered):
+                if peers.shape[1] and peers[row, 0] >= 0:
+                    copied_offsets = passages.get((row, 0), [])
+                    self.similarity_results[pdf_files[index]][question_key] = {
+                        "max_similarity": float(scores[row, 0]),
+                        "copied_sentence": " ... ".join(
+                            answers[index][start:end] for start, end in copied_offsets
+                        ),
+                        "copied_offsets": copied_offsets,
+                        "best_match": answered_pdfs[peers[row, 0]],
+                        "approximate": approximate,
+                    }
 
-                    other_qa_dict = self.questions_answers_by_pdf.get(other_pdf, {})
-                    other_answer = other_qa_dict.get(answer_key, "").strip()
+    def compare_with_history(self):
+        """Compare every answer with past answers from the persistent corpus.
 
-                    if not current_answer or not other_answer:
-                        similarity = 0.0
-                        copied_sentence = ""
-                    else:
-                        common_parts = self.find_common_parts(
-                            current_answer, other_answer
-                        )
-                        vectorizer = TfidfVectorizer()
-                        tfidf_matrix = vectorizer.fit_transform(
-                            [current_answer, other_answer]
-                        )
-                        similarity = cosine_similarity(
-                            tfidf_matrix[0:1], tfidf_matrix[1:2]
-                        )[0][0]
-                        copied_sentence = (
-                            common_parts
-                            if similarity >= self.similarity_threshold
-                            else ""
+        Candidates come from the corpus band index; exact TF-IDF cosine is
+        computed for those only. A closer historical match raises the
+        answer's max_similarity and is recorded under "history".
+        """
+        self._corpus_entries = []
+        if self.corpus is None:
+            return
+
+        for question_key in self.teacher_questions:
+            if not question_key.startswith("Question#"):
+                continue
+
+            answer_key = f"Answer#{question_key.split('#')[1]}"
+            answered = [
+                (pdf_file, qa_dict.get(answer_key, "").strip())
+                for pdf_file, qa_dict in self.questions_answers_by_pdf.items()
+            ]
+            answered = [(pdf, answer) for pdf, answer in answered if len(answer) >= 3]
+            if not answered:
+                continue
+
+            answers = [answer for _, answer in answered]
+            signatures = self.lsh.signatures(answers)
+            submission_ids = [
+                self.submissions.id_of(pdf_file) for pdf_file, _ in answered
+            ]
+            student_ids = [
+                self.student_ids.get(submission_id) for submission_id in submission_ids
+            ]
+            self._corpus_entries.extend(
+                zip(
+                    submission_ids,
+                    [question_key] * len(answers),
+                    answers,
+                    signatures,
+                    student_ids,
+                )
+            )
+
+            documents, pairs = self.corpus.candidates(
+                signatures, self.assignment_id, student_ids
+            )
+            if not pairs:
+                continue
+
+            # Each stored answer is vectorized once, however many rows hit it
+            past_texts = [document["text"] for document in documents]
+            # Rows here are the rows of compare_answers for the question
+            fingerprint = self._fingerprints.get(question_key) or _fingerprints(
+                self.winnower, answers.__getitem__
+            )
+            past_fingerprint = _fingerprints(self.winnower, past_texts.__getitem__)
+            try:
+                vectorizer = TfidfVectorizer().fit(answers + past_texts)
+            except ValueError:
+                continue
+            current = vectorizer.transform(answers)
+            past = vectorizer.transform(past_texts)
+            rows, columns = (list(side) for side in zip(*pairs))
+            cosines = np.asarray(
+                current[rows].multiply(past[columns]).sum(axis=1)
+            ).ravel()
+
+            for (row, column), similarity in zip(pairs, np.clip(cosines, 0.0, 1.0)):
+                pdf_file, answer = answered[row]
+                document = documents[column]
+                question_result = self.similarity_results[pdf_file][question_key]
+                history = question_result.get("history")
+                if history is not None and history["similarity"] >= similarity:
+                    continue
+
+                question_result["history"] = {
+                    "similarity": float(similarity),
+                    "assignment_id": document["assignment_id"],
+                    "submission_id": document["submission_id"],
+                    "question_key": document["question_key"],
+                }
+                if similarity > question_result["max_similarity"]:
+                    question_result["max_similarity"] = float(similarity)
+                    (
+                        question_result["copied_sentence"],
+                        question_result["copied_offsets"],
+                    ) = (
+                        self.copied_passages(
+                            answer, fingerprint(row), past_fingerprint(column)
                         )
+                        if similarity >= self.similarity_threshold
+                        else ("", [])
+                    )
 
-                    question_result["Comparisons"][other_pdf] = {
-                        "similarity": similarity,
-                        "copied_sentence": copied_sentence,
-                    }
+    def fit_tfidf(self, answers):
+        """Fit one vectorizer over the answers; (None, None) if nothing to fit"""
+        try:
+            vectorizer = TfidfVectorizer()
+            return vectorizer, vectorizer.fit_transform(answers)
+        except ValueError:
+            # No answer has a word of two or more characters
+            return None, None
+
+    def top_k_similarities(
+        self, answers, tfidf_matrix=None, embeddings=None, fingerprint=None
+    ):
+        """Return the TOP_K most similar other answers of every answer.
+
+        Gives (peers, scores, passages): (n, TOP_K) arrays, best first, with
+        -1 and 0.0 where an answer has fewer nonzero matches, and the copied
+        offsets of kept pairs above the threshold. Similarities are computed
+        a block of rows at a time, or for LSH candidate pairs only from
+        LSH_MIN_ANSWERS on, and each block is reduced to its top-k before
+        the next one, so the full N x N matrix never exists. From
+        PARALLEL_MIN_ANSWERS on, blocks are spread over a process pool.
+        With answer embeddings, peers are re-ranked by _merge_semantic.
+        fingerprint(row) gives an answer's Fingerprint; by default each
+        answer is fingerprinted once, when a pair first needs it.
+        """
+        n, k = len(answers), self.TOP_K
+        peers = np.full((n, k), -1, dtype=np.int32)
+        scores = np.zeros((n, k), dtype=np.float32)
+        if n < 2 or not k:
+            return peers, scores, {}
+
+        if tfidf_matrix is None:
+            _, tfidf_matrix = self.fit_tfidf(answers)
+        if tfidf_matrix is None:
+            return peers, scores, {}
+        if fingerprint is None:
+            fingerprint = _fingerprints(self.winnower, answers.__getitem__)
 
-                    if similarity > question_result["max_similarity"]:
-                        question_result["max_similarity"] = similarity
-                        question_result["copied_sentence"] = copied_sentence
+        pool = None
+        if self.WORKERS > 1 and n >= self.PARALLEL_MIN_ANSWERS:
+            pool = self.process_pool()
+            print(f"Plagiarism: {n} answers over {self.WORKERS} processes")
+
+        # Closing the block generator releases its shared memory even when
+        # consuming it fails partway
+        with ExitStack() as stack:
+            if n >= self.LSH_MIN_ANSWERS:
+                matrix = self._candidate_similarities(tfidf_matrix, answers, pool)
+                product = False
+            else:
+                matrix, product = tfidf_matrix, True
+
+            if pool is not None:
+                blocks = stack.enter_context(
+                    closing(self._parallel_blocks(pool, matrix, product, answers))
+                )
+            else:
+                blocks = (
+                    self._block(matrix, product, fingerprint, start)
+                    for start in range(0, n, self.ROW_BLOCK_SIZE)
+                )
+
+            passages = {}
+            for start, block_peers, block_scores, block_passages in blocks:
+                peers[start : start + len(block_peers)] = block_peers
+                scores[start : start + len(block_scores)] = block_scores
+                passages.update(block_passages)
+
+        if embeddings is not None:
+            return self._merge_semantic(
+                fingerprint, tfidf_matrix, embeddings, peers, passages
+            )
+        return peers, scores, passages
+
+    def process_pool(self):
+        """The checker's process pool, started on first use"""
+        if self._pool is not None and self._pool_workers != self.WORKERS:
+            self.close_pool()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.WORKERS, mp_context=get_context("spawn")
+            )
+            self._pool_workers = self.WORKERS
+        return self._pool
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def embed_answers(self, answers):
+        """Answer embeddings from the context scorer's model and cache.
+
+        Context scoring embeds the same answers, so whichever check runs
+        first pays for the model and the other one reads the cache.
+        """
+        from evaluations.context_score import ContextScorer, TextSimilarity
+
+        try:
+            with ContextScorer._embedding_slots:
+                return TextSimilarity().embed_many(answers)
+        except Exception as e:
+            print(f"Answer embedding failed, using lexical plagiarism only: {e}")
+            return None
+
+    def semantic_floor(self, vectors, samples=20000):
+        """Cosine below which embedding similarity does not count.
+
+        Calibrated per question: SEMANTIC_FLOOR, or the
+        SEMANTIC_FLOOR_QUANTILE of a random sample of answer pairs if that
+        is higher.
+        """
+        rng = np.random.default_rng(0)
+        left = rng.integers(0, len(vectors), samples)
+        right = rng.integers(0, len(vectors), samples)
+        keep = left != right
+        floor = self.SEMANTIC_FLOOR
+        if keep.any():
+            cosines = np.einsum("ij,ij->i", vectors[left[keep]], vectors[right[keep]])
+            floor = max(
+                floor, float(np.quantile(cosines, self.SEMANTIC_FLOOR_QUANTILE))
+            )
+        return min(floor, 0.99)
+
+    def _semantic_peers(self, vectors):
+        """The TOP_K nearest answers of each answer by embedding cosine"""
+        n, k = len(vectors), min(self.TOP_K, len(vectors) - 1)
+        if n >= self.SEMANTIC_ANN_MIN_ANSWERS:
+            # Answers to one question share a topic, which would put most
+            # pairs in the same buckets; hash only what sets each apart
+            pairs = HyperplaneLSH().candidate_pairs(vectors - vectors.mean(axis=0))
+            print(f"Semantic LSH: {len(pairs)} candidate pairs for {n} answers")
+            left, right = pairs[:, 0], pairs[:, 1]
+            cosines = np.einsum("ij,ij->i", vectors[left], vectors[right])
+            matrix = sparse.csr_matrix(
+                (
+                    np.concatenate([cosines, cosines]),
+                    (np.concatenate([left, right]), np.concatenate([right, left])),
+                ),
+                shape=(n, n),
+            )
+            return _top_k_rows(matrix, 0, k)[0]
 
-                self.similarity_results[pdf_file][question_key] = question_result
+        peers = np.empty((n, k), dtype=np.int32)
+        for start in range(0, n, self.ROW_BLOCK_SIZE):
+            block = vectors[start : start + self.ROW_BLOCK_SIZE] @ vectors.T
+            rows = np.arange(len(block))
+            block[rows, rows + start] = -np.inf
+            peers[start : start + len(block)] = np.argpartition(-block, k - 1, axis=1)[
+                :, :k
+            ]
+        return peers
+
+    def _merge_semantic(self, fingerprint, tfidf_matrix, embeddings, peers, passages):
+        """Re-rank peers by max(lexical, rescaled embedding similarity).
+
+        Embedding cosine is rescaled so the question's floor maps to 0 and 1
+        stays 1. The top-k of the maximum lies within the union of the
+        lexical and the semantic top-k, so only those pairs are rescored,
+        exactly on both sides.
+        """
+        n, k = peers.shape
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        floor = self.semantic_floor(vectors)
+
+        columns = np.concatenate([peers, self._semantic_peers(vectors)], axis=1)
+        rows = np.repeat(np.arange(n), columns.shape[1])
+        columns = columns.ravel()
+        keep = columns >= 0
+        pairs = np.unique(np.stack([rows[keep], columns[keep]], axis=1), axis=0)
+        rows, columns = pairs[:, 0], pairs[:, 1]
+
+        lexical = np.asarray(
+            tfidf_matrix[rows].multiply(tfidf_matrix[columns]).sum(axis=1)
+        ).ravel()
+        semantic = np.clip(
+            (np.einsum("ij,ij->i", vectors[rows], vectors[columns]) - floor)
+            / (1.0 - floor),
+            0.0,
+            1.0,
+        )
+        merged_peers, merged_scores = _top_k_rows(
+            sparse.csr_matrix(
+                (np.maximum(lexical, semantic), (rows, columns)), shape=(n, n)
+            ),
+            0,
+            k,
+        )
+        known = {
+            (row, int(peers[row, slot])): offsets
+            for (row, slot), offsets in passages.items()
+        }
+        return (
+            merged_peers,
+            merged_scores,
+            _block_passages(
+                fingerprint,
+                0,
+                merged_peers,
+                merged_scores,
+                self.similarity_threshold,
+                known,
+            ),
+        )
+
+    def _block(self, matrix, product, fingerprint, start):
+        block = matrix[start : start + self.ROW_BLOCK_SIZE]
+        if product:
+            # TF-IDF rows are L2-normalized, so the dot product is the cosine
+            block = block @ matrix.T
+        block_peers, block_scores = _top_k_rows(
+            sparse.csr_matrix(block), start, self.TOP_K
+        )
+        return (
+            start,
+            block_peers,
+            block_scores,
+            _block_passages(
+                fingerprint,
+                start,
+                block_peers,
+                block_scores,
+                self.similarity_threshold,
+            ),
+        )
+
+    def _parallel_blocks(self, pool, matrix, product, answers):
+        """Run the row blocks on a process pool over shared memory.
+
+        The CSR arrays and the UTF-8 answer texts are copied into shared
+        memory once; each task only names its rows and returns their top-k.
+        """
+        matrix = sparse.csr_matrix(matrix)
+        encoded = [answer.encode("utf-8") for answer in answers]
+        text_offsets = np.cumsum([0] + [len(text) for text in encoded], dtype=np.int64)
+        shared = [
+            _share(array)
+            for array in (
+                matrix.data,
+                matrix.indices,
+                matrix.indptr,
+                np.frombuffer(b"".join(encoded) or b"\0", dtype=np.uint8),
+                text_offsets,
+            )
+        ]
+        question = {
+            "name": shared[0][0].name,
+            "arrays": [spec for _, spec in shared],
+            "shape": matrix.shape,
+            "product": product,
+            "k": self.TOP_K,
+            "threshold": self.similarity_threshold,
+            "winnower": (self.winnower.k, self.winnower.window),
+        }
+        starts = list(range(0, len(answers), self.ROW_BLOCK_SIZE))
+        try:
+            yield from pool.map(
+                _top_k_task,
+                [question] * len(starts),
+                starts,
+                [start + self.ROW_BLOCK_SIZE for start in starts],
+            )
+        finally:
+            for memory, _ in shared:
+                memory.close()
+                memory.unlink()
+
+    def _candidate_similarities(self, tfidf_matrix, answers, pool=None):
+        """Exact cosine for LSH candidate pairs only"""
+        n = len(answers)
+        signatures = (
+            self.lsh.signatures_in(pool, answers)
+            if pool is not None
+            else self.lsh.signatures(answers)
+        )
+        pairs = self.lsh.candidate_pairs(signatures)
+        print(
+            f"LSH: scoring {len(pairs)} candidate pairs of {n * (n - 1) // 2} for {n} answers"
+        )
+        if not len(pairs):
+            return sparse.csr_matrix((n, n), dtype=np.float32)
+
+        left, right = pairs[:, 0], pairs[:, 1]
+        cosines = np.asarray(
+            tfidf_matrix[left].multiply(tfidf_matrix[right]).sum(axis=1)
+        ).ravel()
+        return sparse.csr_matrix(
+            (
+                np.concatenate([cosines, cosines]),
+                (np.concatenate([left, right]), np.concatenate([right, left])),
+            ),
+            shape=(n, n),
+        )
 
     def save_results_to_mongo(self, submission_id, results):
         """Save plagiarism scores in unified evaluation document"""
@@ -138,7 +1154,17 @@ class PlagiarismChecker:
                                     "questions.$.scores.plagiarism": {
                                         "score": round(max_similarity, 4),
                                         "copied_sentence": copied_sentence,
+                                        "copied_offsets": similarity_data[q_key].get(
+                                            "copied_offsets", []
+                                        ),
+                                        "top_matches": results.get(
+                                            "top_matches", {}
+                                        ).get(q_key, []),
+                                        "approximate": similarity_data[q_key].get(
+                                            "approximate", False
+                                        ),
                                         "evaluated_at": datetime.now(timezone.utc),
+                                        **self._history_fields(similarity_data[q_key]),
                                     }
                                 }
                             },
@@ -181,15 +1207,425 @@ class PlagiarismChecker:
         if question_updates:
             self.results_collection.bulk_write(question_updates)
 
+    def _top_match_fields(self, pdf_file):
+        """{question_key: [closest classmates]} of one answer, for storage"""
+        fields = {}
+        for question_key, matches in self.matches.items():
+            row = matches.rows.get(pdf_file)
+            if row is None:
+                continue
+            fields[question_key] = [
+                {
+                    "submission_id": self.submissions.id_of(matches.pdf_files[peer]),
+                    "similarity": round(float(score), 4),
+                    "copied_offsets": matches.passages.get((row, slot), []),
+                }
+                for slot, (peer, score) in enumerate(
+                    zip(matches.peers[row], matches.scores[row])
+                )
+                if peer >= 0
+            ]
+        return fields
+
+    def _history_fields(self, question_result):
+        history = question_result.get("history")
+        if history is None:
+            return {}
+        return {"history": {**history, "similarity": round(history["similarity"], 4)}}
+
+    def _save_state(self):
+        """Persist each question's vocabulary, IDF and answer vectors"""
+        vocabularies, vectors = [], []
+
+        for question_key, (vectorizer, tfidf_matrix, answered) in self._fitted.items():
+            vocabularies.append(
+                {
+                    "question_key": question_key,
+                    "vocabulary": (
+                        vectorizer.get_feature_names_out().tolist()
+                        if vectorizer is not None
+                        else []
+                    ),
+                    "idf": vectorizer.idf_.tolist() if vectorizer is not None else [],
+                    "n_docs": len(answered),
+                }
+            )
+
+            rows = {pdf_file: row for row, pdf_file in enumerate(answered)}
+            answer_key = f"Answer#{question_key.split('#')[1]}"
+            for pdf_file, qa_dict in self.questions_answers_by_pdf.items():
+                if question_key not in qa_dict:
+                    continue
+                question_result = self.similarity_results[pdf_file][question_key]
+                best_match = question_result["best_match"]
+                history = question_result.get("history")
+                matches = self.matches[question_key]
+
+                indices, data = [], []
+                if pdf_file in rows:
+                    vector = tfidf_matrix[rows[pdf_file]]
+                    indices, data = vector.indices.tolist(), vector.data.tolist()
+
+                vectors.append(
+                    {
+                        "question_key": question_key,
+                        "submission_id": self.submissions.id_of(pdf_file),
+                        "text": qa_dict.get(answer_key, "").strip(),
+                        "indices": indices,
+                        "data": data,
+                        "max_similarity": (
+                            float(matches.scores[matches.rows[pdf_file], 0])
+                            if best_match is not None
+                            else 0.0
+                        ),
+                        "best_match": (
+                            self.submissions.id_of(best_match)
+                            if best_match is not None
+                            else None
+                        ),
+                        "history_similarity": (
+                            history["similarity"] if history is not None else 0.0
+                        ),
+                    }
+                )
+
+        self.state.save(vocabularies, vectors)
+
+    def _vectorize(self, vocabulary, text):
+        """TF-IDF row of a new text under a stored vocabulary and IDF.
+
+        Terms the vocabulary lacks occur in no other answer, so they only
+        add to the norm, with the IDF of a term found in a single document.
+        """
+        columns = vocabulary.get("columns")
+        if columns is None:
+            columns = vocabulary["columns"] = {
+                term: column for column, term in enumerate(vocabulary["vocabulary"])
+            }
+        idf = vocabulary["idf"]
+        unseen_idf = np.log((1 + vocabulary["n_docs"]) / 2) + 1
+
+        indices, data, norm = [], [], 0.0
+        for term, count in Counter(self._analyzer(text)).items():
+            column = columns.get(term)
+            weight = count * (idf[column] if column is not None else unseen_idf)
+            norm += weight * weight
+            if column is not None:
+                indices.append(column)
+                data.append(weight)
+
+        norm = np.sqrt(norm) or 1.0
+        return indices, [weight / norm for weight in data]
+
+    @staticmethod
+    def _stack_vectors(documents, n_terms):
+        """Stored answer vectors as one CSR matrix, a row per document"""
+        indptr = np.cumsum([0] + [len(document["indices"]) for document in documents])
+        return sparse.csr_matrix(
+            (
+                np.array(
+                    [value for document in documents for value in document["data"]],
+                    dtype=np.float64,
+                ),
+                np.array(
+                    [index for document in documents for index in document["indices"]],
+                    dtype=np.int64,
+                ),
+                indptr,
+            ),
+            shape=(len(documents), n_terms),
+        )
+
+    @staticmethod
+    def forget(course_id, assignment_id, submission_id=None):
+        """Remove a deleted assignment, or one deleted submission, from plagiarism data.
+
+        Its answers leave the corpus (enabled or not, since entries may
+        predate the setting) and the incremental state, so they are never
+        matched again.
+        """
+        PlagiarismCorpus(f"course:{course_id}", MinHashLSH()).remove(
+            assignment_id, submission_id
+        )
+        PlagiarismState(course_id, assignment_id).remove(submission_id)
+
+    def update_submission(self, submission_id, qa_pairs, student_id=None):
+        """Recheck one new or changed submission against the last full run.
+
+        Each answer is compared with the stored vectors of its classmates,
+        O(N) per question. Classmates whose closest match changes (a higher
+        similarity to this answer, or this answer was their closest match
+        and moved away) are rescanned: their plagiarism score, copied
+        passages and top_matches in evaluation_results are rewritten, and a
+        changed score marks the result needs_reevaluation, since its totals
+        (and a question zeroed or no longer zeroed for plagiarism) are only
+        recomputed by a full evaluation. The recheck is lexical only, TF-IDF
+        under the vocabulary and IDF of the last full run, even when that run
+        was semantic. The submission's own scores are left to its next
+        evaluation. Returns the ids of the updated classmates, or None when
+        there is no stored state.
+        """
+        if self.state is None:
+            return None
+        if student_id is None:
+            student_id = self.student_ids.get(submission_id)
+        vocabularies, vectors_by_question = self.state.load()
+        if not vocabularies:
+            print(
+                f"No plagiarism state for assignment {self.assignment_id}, a full run is needed"
+            )
+            return None
+
+        changed_vectors, changed_scores, corpus_entries = [], {}, []
+        changed_matches = {}
+        for question_key, vocabulary in vocabularies.items():
+            answer_key = f"Answer#{question_key.split('#')[1]}"
+            text = qa_pairs.get(answer_key, "").strip()
+            n_terms = len(vocabulary["vocabulary"])
+
+            others = [
+                document
+                for document in vectors_by_question.get(question_key, [])
+                if document["submission_id"] != submission_id
+            ]
+            indices, data = (
+                self._vectorize(vocabulary, text) if len(text) >= 3 else ([], [])
+            )
+            own = {
+                "question_key": question_key,
+                "submission_id": submission_id,
+                "text": text,
+                "indices": indices,
+                "data": data,
+                "max_similarity": 0.0,
+                "best_match": None,
+                "history_similarity": 0.0,
+            }
+
+            documents = others + [own]
+            own_row = len(others)
+            fingerprint = _fingerprints(
+                self.winnower, lambda row: documents[row]["text"]
+            )
+            matrix = self._stack_vectors(documents, n_terms)
+            similarities = np.clip(matrix[:-1] @ matrix[-1].toarray().ravel(), 0.0, 1.0)
+
+            for row, (document, similarity) in enumerate(zip(others, similarities)):
+                similarity = float(similarity)
+                if similarity > own["max_similarity"]:
+                    own["max_similarity"] = similarity
+                    own["best_match"] = document["submission_id"]
+
+                previous = max(
+                    document["max_similarity"], document["history_similarity"]
+                )
+                # Stored scores are float32; a difference within that rounding
+                # is no change
+                if abs(similarity - document["max_similarity"]) < 1e-6:
+                    continue
+                raised = similarity > document["max_similarity"]
+                if not raised and document["best_match"] != submission_id:
+                    continue
+
+                peers, scores, passages = self._row_top_k(matrix, row, fingerprint)
+                changed_matches.setdefault(document["submission_id"], {})[
+                    question_key
+                ] = [
+                    {
+                        "submission_id": documents[peer]["submission_id"],
+                        "similarity": round(float(score), 4),
+                        "copied_offsets": passages.get((row, slot), []),
+                    }
+                    for slot, (peer, score) in enumerate(zip(peers, scores))
+                    if peer >= 0
+                ]
+                if raised:
+                    document["max_similarity"] = similarity
+                    document["best_match"] = submission_id
+                    best_row = own_row
+                else:
+                    # Its closest match moved away; the rescan gives the new one
+                    best_row = int(peers[0])
+                    document["max_similarity"] = (
+                        float(scores[0]) if best_row >= 0 else 0.0
+                    )
+                    document["best_match"] = (
+                        documents[best_row]["submission_id"] if best_row >= 0 else None
+                    )
+
+                changed_vectors.append(
+                    {
+                        "question_key": question_key,
+                        "submission_id": document["submission_id"],
+                        "max_similarity": document["max_similarity"],
+                        "best_match": document["best_match"],
+                    }
+                )
+                score = max(document["max_similarity"], document["history_similarity"])
+                if score != previous:
+                    changed_scores.setdefault(document["submission_id"], {})[
+                        question_key
+                    ] = (
+                        score,
+                        *(
+                            self.copied_passages(
+                                document["text"],
+                                fingerprint(row),
+                                fingerprint(best_row),
+                            )
+                            if document["max_similarity"] >= self.similarity_threshold
+                            and document["max_similarity"]
+                            >= document["history_similarity"]
+                            else ("", [])
+                        ),
+                    )
+
+            changed_vectors.append(own)
+            vectors_by_question[question_key] = documents
+            if len(text) >= 3:
+                corpus_entries.append(
+                    (
+                        submission_id,
+                        question_key,
+                        text,
+                        self.lsh.signature(text),
+                        student_id,
+                    )
+                )
+
+        try:
+            self.state.update(changed_vectors)
+            self._update_scores(changed_scores, changed_matches, vectors_by_question)
+        except Exception as e:
+            print(f"Incremental plagiarism update failed: {e}")
+            return None
+
+        if self.corpus is not None:
+            self.corpus.add(self.assignment_id, corpus_entries)
+
+        return sorted(changed_matches)
+
+    def _row_top_k(self, matrix, row, fingerprint):
+        """The TOP_K closest other rows of one stored row, as in a full run.
+
+        Gives (peers, scores, passages) for that row alone, with passages
+        keyed by (row, slot).
+        """
+        similarities = (matrix[row] @ matrix.T).tocsr()
+        peers, scores = _top_k_rows(similarities, row, self.TOP_K)
+        passages = _block_passages(
+            fingerprint, row, peers, scores, self.similarity_threshold
+        )
+        return peers[0], scores[0], passages
+
+    def _update_scores(self, changed_scores, changed_matches, vectors_by_question):
+        """Write rechecked classmates' plagiarism fields to evaluation_results.
+
+        Changed question scores, their overall average and a
+        needs_reevaluation mark go to classmates whose score changed;
+        top_matches go to every rescanned question.
+        """
+        scores_by_submission = {}
+        for documents in vectors_by_question.values():
+            for document in documents:
+                if document["submission_id"] in changed_scores:
+                    scores_by_submission.setdefault(
+                        document["submission_id"], []
+                    ).append(
+                        max(document["max_similarity"], document["history_similarity"])
+                    )
+
+        now = datetime.now(timezone.utc)
+        updates = []
+        for submission_id, questions in changed_matches.items():
+            for question_key, top_matches in questions.items():
+                updates.append(
+                    UpdateOne(
+                        {
+                            "course_id": self.course_id,
+                            "assignment_id": self.assignment_id,
+                            "submission_id": submission_id,
+                            "questions.question_number": int(
+                                question_key.split("#")[1]
+                            ),
+                        },
+                        {
+                            "$set": {
+                                "questions.$.scores.plagiarism.top_matches": top_matches
+                            }
+                        },
+                    )
+                )
+
+        for submission_id, questions in changed_scores.items():
+            scope = {
+                "course_id": self.course_id,
+                "assignment_id": self.assignment_id,
+                "submission_id": submission_id,
+            }
+            for question_key, (
+                score,
+                copied_sentence,
+                copied_offsets,
+            ) in questions.items():
+                updates.append(
+                    UpdateOne(
+                        {
+                            **scope,
+                            "questions.question_number": int(
+                                question_key.split("#")[1]
+                            ),
+                        },
+                        {
+                            "$set": {
+                                "questions.$.scores.plagiarism.score": round(score, 4),
+                                "questions.$.scores.plagiarism.copied_sentence": copied_sentence,
+                                "questions.$.scores.plagiarism.copied_offsets": copied_offsets,
+                                "questions.$.scores.plagiarism.evaluated_at": now,
+                            }
+                        },
+                    )
+                )
+
+            scores = scores_by_submission[submission_id]
+            updates.append(
+                UpdateOne(
+                    scope,
+                    {
+                        "$set": {
+                            "overall_scores.plagiarism.score": round(
+                                sum(scores) / len(scores), 4
+                            ),
+                            "overall_scores.plagiarism.evaluated_at": now,
+                            "needs_reevaluation": {
+                                "reason": "plagiarism",
+                                "flagged_at": now,
+                            },
+                        }
+                    },
+                )
+            )
+
+        if updates:
+            self.results_collection.bulk_write(updates, ordered=False)
+
     def run(self, teacher_questions, questions_answers_by_pdf, submission_ids=None):
         self.teacher_questions = teacher_questions
         self.questions_answers_by_pdf = questions_answers_by_pdf
 
         if submission_ids:
             self.submission_ids = submission_ids
+        self.submissions = SubmissionTable.of(
+            questions_answers_by_pdf, self.submission_ids
+        )
 
-        # Compare answers between students
-        self.compare_answers()
+        # Compare answers between students, then with earlier assignments;
+        # every large question shares one process pool
+        try:
+            self.compare_answers()
+        finally:
+            self.close_pool()
+        self.compare_with_history()
 
         # Prepare final results structure
         final_results = {
@@ -199,15 +1635,8 @@ class PlagiarismChecker:
         }
 
         # Include results for all PDFs
-        pdf_files_list = list(self.questions_answers_by_pdf.keys())
-        for pdf_file in self.questions_answers_by_pdf:
-            qa_results = self.questions_answers_by_pdf.get(pdf_file, {})
+        for pdf_file, submission_id, qa_results in self.submissions.items():
             similarity_data = self.similarity_results.get(pdf_file, {})
-            submission_id = (
-                self.submission_ids[pdf_files_list.index(pdf_file)]
-                if self.submission_ids
-                else pdf_file
-            )
 
             question_results = {}
             total_similarity = 0
@@ -224,6 +1653,9 @@ class PlagiarismChecker:
                         question_results[q_key] = {
                             "plagiarism_score": round(max_similarity, 4),
                             "copied_sentence": copied_sentence,
+                            "copied_offsets": similarity_data[q_key].get(
+                                "copied_offsets", []
+                            ),
                         }
 
                         total_similarity += max_similarity
@@ -250,7 +1682,15 @@ class PlagiarismChecker:
                     "similarity_data": similarity_data,
                     "pdf_file": pdf_file,
                     "qa_results": qa_results,
+                    "top_matches": self._top_match_fields(pdf_file),
                 },
             )
 
+        if self.state is not None:
+            self._save_state()
+
+        # Make this run's answers available to later assignments
+        if self.corpus is not None:
+            self.corpus.add(self.assignment_id, self._corpus_entries)
+
         return final_results
@@ -0,0 +1,48 @@
+class SubmissionTable:
+    """The submissions of one evaluation run, indexed by key.
+
+    Stages receive Q&A pairs as {key: qa_pairs}. In the evaluator the keys
+    are the submission ids themselves; older callers key by PDF file and
+    pass the submission ids as a parallel list. The table resolves either
+    form once, so every lookup is O(1) instead of a list search, and one
+    table can be shared by all stages of a run.
+    """
+
+    def __init__(self, qa_pairs_by_key: dict, submission_ids=None):
+        self.qa_pairs_by_key = qa_pairs_by_key
+        self.keys = list(qa_pairs_by_key)
+        self.row_of = {key: row for row, key in enumerate(self.keys)}
+
+        submission_ids = list(submission_ids or [])
+        known_ids = set(submission_ids)
+        if not submission_ids or all(key in known_ids for key in self.keys):
+            # Keyed by submission id already (or no ids to map to)
+            self.ids = list(self.keys)
+        else:
+            # Keyed by PDF file, with the ids in the same order
+            self.ids = [
+                submission_ids[row] if row < len(submission_ids) else key
+                for row, key in enumerate(self.keys)
+            ]
+        self._id_of = dict(zip(self.keys, self.ids))
+
+    @classmethod
+    def of(cls, qa_pairs_by_key: dict, submission_ids=None):
+        """Reuse a table passed in place of submission_ids, else build one"""
+        if isinstance(submission_ids, cls):
+            return submission_ids
+        return cls(qa_pairs_by_key, submission_ids)
+
+    def id_of(self, key):
+        return self._id_of[key]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def items(self):
+        """(key, submission_id, qa_pairs) for every submission, in order"""
+        for key, submission_id in zip(self.keys, self.ids):
+            yield key, submission_id, self.qa_pairs_by_key[key]
@@ -0,0 +1,156 @@
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from evaluations.llm_judge import LLMJudge
+
+
+class FakeClient:
+    """Stands in for the Groq client; reply(ids) returns the message content"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        with self.lock:
+            self.prompts.append(prompt)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+
+        ids = [int(item_id) for item_id in re.findall(r"\[id (\d+)\]", prompt)]
+        content = self.reply(ids, len(self.prompts))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+
+def scores_reply(ids, request_number):
+    return json.dumps([{"id": item_id, "score": item_id / 10} for item_id in ids])
+
+
+def make_judge(reply=scores_reply, **kwargs):
+    client = FakeClient(reply)
+    return LLMJudge(model="test", client=client, **kwargs), client
+
+
+# Test _parse
+def test_parse_keeps_valid_items():
+    judge, _ = make_judge()
+    content = 'Scores:\n[{"id": 1, "score": 0.4}, {"id": 2, "score": "0.9"}] done'
+
+    assert judge._parse(content, [7, 3]) == {7: 0.4, 3: 0.9}
+
+
+def test_parse_drops_invalid_items():
+    judge, _ = make_judge()
+    content = json.dumps(
+        [
+            {"id": 1, "score": 1.5},  # out of range
+            {"id": 2},  # no score
+            {"id": 3, "score": "high"},  # not a number
+            {"id": 9, "score": 0.5},  # unknown id
+            "0.3",
+            {"id": 4, "score": 0.2},
+        ]
+    )
+
+    assert judge._parse(content, [10, 11, 12, 13]) == {13: 0.2}
+
+
+def test_parse_rejects_non_array_reply():
+    judge, _ = make_judge()
+
+    assert judge._parse("I cannot score these answers.", [0, 1]) == {}
+    assert judge._parse('{"id": 1, "score": 0.5}', [0]) == {}
+    assert judge._parse(None, [0]) == {}
+
+
+# Test score
+def test_score_packs_by_reference_and_batch_size():
+    judge, client = make_judge(batch_size=2)
+
+    scores = judge.score(
+        references=["r1", "r1", "r2", "r1"], candidates=["a", "b", "c", "d"]
+    )
+
+    # r1 -> [a, b] and [d]; r2 -> [c]
+    assert scores == [0.1, 0.2, 0.1, 0.1]
+    assert judge.requests_made == 3
+    assert all("r2" not in prompt for prompt in client.prompts if "r1" in prompt)
+
+
+def test_score_retries_only_failed_items():
+    def reply(ids, request_number):
+        # The first reply drops id 2 and gives id 3 an invalid score
+        if request_number == 1:
+            return json.dumps([{"id": 1, "score": 0.5}, {"id": 3, "score": 2}])
+        return scores_reply(ids, request_number)
+
+    judge, client = make_judge(reply, batch_size=10, max_retries=2)
+
+    scores = judge.score(references=["r"] * 3, candidates=["a", "b", "c"])
+
+    assert scores == [0.5, 0.1, 0.2]
+    assert judge.requests_made == 2
+    assert "[id 1]\nb" in client.prompts[1] and "[id 2]\nc" in client.prompts[1]
+    assert "\na\n" not in client.prompts[1]
+
+
+def test_score_falls_back_to_zero_after_retries():
+    judge, _ = make_judge(lambda ids, n: "not json", max_retries=1)
+
+    assert judge.score(references=["r", "r"], candidates=["a", "b"]) == [0.0, 0.0]
+    assert judge.requests_made == 2
+
+
+def test_requests_in_flight_are_bounded_across_calls():
+    judge, client = make_judge(batch_size=1, max_concurrency=2)
+
+    threads = [
+        threading.Thread(
+            target=judge.score,
+            kwargs={"references": ["r"] * 4, "candidates": list("abcd")},
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert judge.requests_made == 12
+    assert client.max_in_flight <= 2
+
+
+# Test configuration
+def test_judge_requires_model_and_key(monkeypatch):
+    monkeypatch.delenv("JUDGE_MODEL", raising=False)
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="JUDGE_MODEL"):
+        LLMJudge()
+    with pytest.raises(ValueError, match="GROQ_API_KEY"):
+        LLMJudge(model="test")
+
+
+def test_load_scorer_falls_back_to_local_scorer(monkeypatch):
+    from evaluations import context_score
+
+    monkeypatch.delenv("CONTEXT_SCORER", raising=False)
+    monkeypatch.delenv("JUDGE_MODEL", raising=False)
+    with patch.object(context_score.bleurt_score, "BleurtScorer") as local_scorer:
+        assert context_score.load_scorer() is local_scorer.return_value
@@ -0,0 +1,236 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from evaluations.plagiarism import PlagiarismChecker, Winnower
+
+
+def shared_text(winnower, text, other):
+    offsets = winnower.passages(winnower.fingerprint(text), winnower.fingerprint(other))
+    return [text[start:end] for start, end in offsets]
+
+
+# Test Winnower.passages
+def test_passages_cover_whole_copy():
+    winnower = Winnower()
+    text = (
+        "The mitochondria is the powerhouse of the cell and it produces energy "
+        "in the form of ATP for the cell to use in many processes."
+    )
+
+    offsets = winnower.passages(winnower.fingerprint(text), winnower.fingerprint(text))
+
+    # Every word is covered; only the final period is not a word character
+    assert offsets == [[0, len(text) - 1]]
+
+
+def test_passages_reach_ends_of_edited_copy():
+    winnower = Winnower()
+    text = (
+        "Photosynthesis converts light energy into chemical energy. "
+        "Plants use chlorophyll to absorb light."
+    )
+    other = (
+        "photosynthesis converts light energy into chemical energy; "
+        "plants use chlorophyll to absorb sunlight"
+    )
+
+    assert shared_text(winnower, text, other) == [
+        "Photosynthesis converts light energy into chemical energy. "
+        "Plants use chlorophyll to absorb"
+    ]
+
+
+def test_passages_split_around_an_edit():
+    winnower = Winnower(k=3, window=2)
+    text = "one two three four five six seven eight nine ten eleven twelve"
+    other = "one two three four five CHANGED seven eight nine ten eleven twelve"
+
+    assert shared_text(winnower, text, other) == [
+        "one two three four five",
+        "seven eight nine ten eleven twelve",
+    ]
+
+
+def test_passages_need_a_shared_winnowed_hash():
+    winnower = Winnower()
+    text = "cloud computing delivers computing services over the internet today"
+    other = "plants use chlorophyll to absorb light and make sugar from water"
+
+    assert shared_text(winnower, text, other) == []
+    assert shared_text(winnower, "", other) == []
+
+
+def test_passages_find_short_answer_copied_into_longer_one():
+    winnower = Winnower()
+    text = "Virtualization lets one server run many machines"
+    other = (
+        "As the notes say, virtualization lets one server run many machines, "
+        "which cuts hardware costs for the provider."
+    )
+
+    assert shared_text(winnower, text, other) == [text]
+    assert shared_text(winnower, other, text) == [
+        "virtualization lets one server run many machines"
+    ]
+
+
+def test_fingerprint_is_empty_below_k_words():
+    winnower = Winnower()
+
+    assert winnower.fingerprint("short answer here") == (set(), {})
+    assert shared_text(winnower, "short answer here", "short answer here") == []
+
+
+class FakeState:
+    """PlagiarismState kept in memory"""
+
+    def __init__(self):
+        self.vocabularies, self.vectors = [], []
+
+    def save(self, vocabularies, vectors):
+        self.vocabularies, self.vectors = vocabularies, vectors
+
+    def load(self):
+        vectors = {}
+        for document in self.vectors:
+            vectors.setdefault(document["question_key"], []).append(dict(document))
+        return {
+            document["question_key"]: dict(document) for document in self.vocabularies
+        }, vectors
+
+    def update(self, vectors):
+        stored = {
+            (document["question_key"], document["submission_id"]): document
+            for document in self.vectors
+        }
+        for document in vectors:
+            stored[document["question_key"], document["submission_id"]] = document
+        self.vectors = list(stored.values())
+
+    def vector(self, question_key, submission_id):
+        return next(
+            document
+            for document in self.vectors
+            if document["question_key"] == question_key
+            and document["submission_id"] == submission_id
+        )
+
+
+TEACHER_QUESTIONS = {
+    "Question#1": "What is cloud computing?",
+    "Answer#1": "",
+    "Question#2": "What is photosynthesis?",
+    "Answer#2": "",
+}
+CLOUD = (
+    "Cloud computing rents servers storage and networks over the internet "
+    "so companies pay only for what they use"
+)
+ORIGINAL = (
+    "A provider runs shared data centres and customers start virtual "
+    "machines from a web console when demand grows"
+)
+
+
+def checked_class(answers):
+    """A checker after a full run over {submission_id: (answer 1, answer 2)},
+    with in-memory state and a recording results collection"""
+    with patch("evaluations.plagiarism.mongo_db"):
+        checker = PlagiarismChecker(1, 1, semantic=False)
+    checker.state = FakeState()
+    checker.corpus = None
+    qa_pairs = {
+        submission_id: {
+            **TEACHER_QUESTIONS,
+            "Answer#1": first,
+            "Answer#2": second,
+        }
+        for submission_id, (first, second) in answers.items()
+    }
+    checker.run(TEACHER_QUESTIONS, qa_pairs, list(answers))
+    checker.results_collection = MagicMock()
+    return checker, qa_pairs
+
+
+def written_sets(checker, submission_id):
+    """{question number or None: $set} written for one submission"""
+    (updates,), kwargs = checker.results_collection.bulk_write.call_args
+    assert kwargs == {"ordered": False}
+    written = {}
+    for update in updates:
+        if update._filter["submission_id"] == submission_id:
+            question = update._filter.get("questions.question_number")
+            written.setdefault(question, {}).update(update._doc["$set"])
+    return written
+
+
+CLASS = {
+    1: (CLOUD, "Plants turn light water and carbon dioxide into sugar"),
+    2: (
+        "Companies rent servers from a provider and reach them over the internet",
+        "Chlorophyll absorbs sunlight inside the leaves of green plants",
+    ),
+    3: (ORIGINAL, "Leaves release oxygen as a by product of making glucose"),
+}
+
+
+# Test PlagiarismChecker.update_submission
+def test_copied_resubmission_raises_classmate_scores():
+    checker, qa_pairs = checked_class(CLASS)
+    assert checker.state.vector("Question#1", 1)["max_similarity"] < 0.5
+
+    changed = checker.update_submission(
+        3, {**qa_pairs[3], "Answer#1": CLOUD}, student_id=7
+    )
+
+    assert changed == [1]
+    classmate = checker.state.vector("Question#1", 1)
+    assert classmate["max_similarity"] == pytest.approx(1.0)
+    assert classmate["best_match"] == 3
+    assert checker.state.vector("Question#1", 3)["best_match"] == 1
+
+    written = written_sets(checker, 1)
+    question = written[1]
+    assert question["questions.$.scores.plagiarism.score"] == 1.0
+    assert question["questions.$.scores.plagiarism.copied_sentence"] == CLOUD
+    assert question["questions.$.scores.plagiarism.copied_offsets"] == [[0, len(CLOUD)]]
+    top_matches = question["questions.$.scores.plagiarism.top_matches"]
+    assert top_matches[0]["submission_id"] == 3
+    assert top_matches[0]["similarity"] == 1.0
+    assert [match["submission_id"] for match in top_matches] == [3, 2]
+
+    # The average covers both questions; the stale total is marked
+    second = max(
+        checker.state.vector("Question#2", 1)["max_similarity"],
+        checker.state.vector("Question#2", 1)["history_similarity"],
+    )
+    overall = written[None]
+    assert overall["overall_scores.plagiarism.score"] == round((1.0 + second) / 2, 4)
+    assert overall["needs_reevaluation"]["reason"] == "plagiarism"
+
+    # Its unchanged second question is not rewritten
+    assert 2 not in written
+
+
+def test_resubmission_rescans_classmates_it_was_closest_to():
+    checker, qa_pairs = checked_class({**CLASS, 3: (CLOUD, CLASS[3][1])})
+    assert checker.state.vector("Question#1", 1)["best_match"] == 3
+
+    changed = checker.update_submission(3, {**qa_pairs[3], "Answer#1": ORIGINAL})
+
+    assert changed == [1]
+    classmate = checker.state.vector("Question#1", 1)
+    assert classmate["max_similarity"] < 0.5
+    assert classmate["best_match"] == 2
+
+    question = written_sets(checker, 1)[1]
+    assert question["questions.$.scores.plagiarism.score"] == round(
+        classmate["max_similarity"], 4
+    )
+    assert question["questions.$.scores.plagiarism.copied_sentence"] == ""
+    assert question["questions.$.scores.plagiarism.copied_offsets"] == []
+    assert [
+        match["submission_id"]
+        for match in question["questions.$.scores.plagiarism.top_matches"]
+    ] == [2, 3]
@@ -335,6 +335,105 @@ async def test_update_assignment_submission_not_found():
         assert "Assignment not found" in exc_info.value.detail
 
 
+def mock_update_submission_request():
+    """DB, PDF upload and extractor mocks for a valid resubmission"""
+    mock_assignment = MagicMock(
+        id=1, course_id=1, deadline=datetime.now() + timedelta(days=1)
+    )
+    mock_enrollment = MagicMock(id=1, status="accepted")
+    mock_submission = MagicMock(id=5, student_id=1, submission_pdf_url="old.pdf")
+    mock_db = MagicMock()
+    mock_db.query.return_value.filter.return_value.first.side_effect = [
+        mock_assignment,
+        mock_enrollment,
+        mock_submission,
+        None,  # No existing evaluation
+    ]
+
+    mock_pdf = MagicMock(content_type="application/pdf", filename="answers.pdf")
+    mock_pdf.read = AsyncMock(return_value=b"%PDF-1.4")
+    mock_pdf.seek = AsyncMock()
+
+    mock_extractor = MagicMock()
+    mock_extractor.return_value.parse_qa.return_value = {
+        "Question#1": "What is cloud computing?",
+        "Answer#1": "Renting servers over the internet.",
+    }
+    return mock_db, mock_pdf, mock_extractor
+
+
+@pytest.mark.asyncio
+async def test_update_assignment_submission_rechecks_plagiarism():
+    # Setup
+    mock_db, mock_pdf, mock_extractor = mock_update_submission_request()
+    mock_current_student = MagicMock(id=1)
+
+    with patch(
+        "evaluations.base_extractor.PDFQuestionAnswerExtractor", mock_extractor
+    ), patch("utils.s3.delete_from_s3", return_value=True), patch(
+        "utils.s3.upload_to_s3", return_value="https://example.com/new.pdf"
+    ), patch(
+        "utils.mongodb.mongo_db"
+    ), patch(
+        "evaluations.plagiarism.PlagiarismChecker"
+    ) as mock_checker:
+        # Record whether the resubmission was committed when the recheck ran
+        committed = []
+        mock_checker.return_value.update_submission.side_effect = (
+            lambda *args, **kwargs: committed.append(mock_db.commit.called)
+        )
+
+        # Execute
+        result = await update_assignment_submission(
+            assignment_id=1,
+            submission_pdf=mock_pdf,
+            db=mock_db,
+            current_student=mock_current_student,
+        )
+
+    # Assert: classmates are rechecked against the new answers only
+    assert result["success"] is True
+    mock_checker.assert_called_once_with(course_id=1, assignment_id=1)
+    mock_checker.return_value.update_submission.assert_called_once_with(
+        5,
+        mock_extractor.return_value.parse_qa.return_value,
+        student_id=1,
+    )
+    assert committed == [True]
+
+
+@pytest.mark.asyncio
+async def test_update_assignment_submission_plagiarism_failure_ignored():
+    # Setup
+    mock_db, mock_pdf, mock_extractor = mock_update_submission_request()
+    mock_current_student = MagicMock(id=1)
+
+    with patch(
+        "evaluations.base_extractor.PDFQuestionAnswerExtractor", mock_extractor
+    ), patch("utils.s3.delete_from_s3", return_value=True), patch(
+        "utils.s3.upload_to_s3", return_value="https://example.com/new.pdf"
+    ), patch(
+        "utils.mongodb.mongo_db"
+    ), patch(
+        "evaluations.plagiarism.PlagiarismChecker"
+    ) as mock_checker:
+        mock_checker.return_value.update_submission.side_effect = Exception(
+            "MongoDB unavailable"
+        )
+
+        # Execute
+        result = await update_assignment_submission(
+            assignment_id=1,
+            submission_pdf=mock_pdf,
+            db=mock_db,
+            current_student=mock_current_student,
+        )
+
+    # Assert: the resubmission is still saved
+    assert result["success"] is True
+    mock_db.commit.assert_called_once()
+
+
 # Test delete_submission failures
 @pytest.mark.asyncio
 async def test_delete_submission_not_found():
@@ -16,6 +16,7 @@ from apis.teacher_assigment import (
     get_total_scores,
     get_student_evaluation,
     delete_assignment,
+    delete_student_submission,
 )
 from models.models import Course, Assignment, AssignmentSubmission, Student, Teacher
 from models.pydantic_model import EvaluationRequest
@@ -714,3 +715,70 @@ async def test_delete_assignment_db_error():
 
         assert exc_info.value.status_code == 500
         assert "Failed to delete assignment" in exc_info.value.detail
+
+
+@pytest.mark.asyncio
+async def test_delete_assignment_forgets_plagiarism_data():
+    # Setup
+    mock_course = MagicMock(id=1, teacher_id=1)
+    mock_assignment = MagicMock(id=1, course_id=1, question_pdf_url=None)
+    mock_db = MagicMock()
+    mock_db.query.return_value.filter.return_value.first.side_effect = [
+        mock_course,
+        mock_assignment,
+    ]
+    mock_db.query.return_value.filter.return_value.all.return_value = []
+    mock_current_teacher = MagicMock(id=1)
+
+    # Mock MongoDB, S3 and the plagiarism cleanup
+    with patch("apis.teacher_assigment.db_mongo"), patch(
+        "apis.teacher_assigment.delete_from_s3", return_value=True
+    ), patch("evaluations.plagiarism.PlagiarismChecker.forget") as mock_forget:
+        # Execute
+        result = await delete_assignment(
+            course_id=1,
+            assignment_id=1,
+            db=mock_db,
+            current_teacher=mock_current_teacher,
+        )
+
+    # Assert: a recreated assignment must not match the deleted answers
+    assert result["success"] is True
+    mock_forget.assert_called_once_with(1, 1)
+
+
+@pytest.mark.asyncio
+async def test_delete_student_submission_forgets_plagiarism_data():
+    # Setup
+    mock_course = MagicMock(id=1, teacher_id=1)
+    mock_assignment = MagicMock(id=1, course_id=1)
+    mock_submission = MagicMock(id=5, student_id=2, submission_pdf_url=None)
+    mock_student = MagicMock(id=2, student_id="S-2", full_name="Student Two")
+    mock_db = MagicMock()
+    mock_db.query.return_value.filter.return_value.first.side_effect = [
+        mock_course,
+        mock_assignment,
+        mock_submission,
+        mock_student,
+    ]
+    mock_current_teacher = MagicMock(id=1)
+
+    # Mock MongoDB and the plagiarism cleanup
+    with patch("apis.teacher_assigment.db_mongo") as mock_mongo, patch(
+        "evaluations.plagiarism.PlagiarismChecker.forget"
+    ) as mock_forget:
+        mock_mongo.evaluation_results.delete_many.return_value.deleted_count = 1
+        mock_mongo.qa_extractions.delete_many.return_value.deleted_count = 1
+
+        # Execute
+        result = await delete_student_submission(
+            course_id=1,
+            assignment_id=1,
+            submission_id=5,
+            db=mock_db,
+            current_teacher=mock_current_teacher,
+        )
+
+    # Assert: later incremental updates must not match the deleted answers
+    assert result["success"] is True
+    mock_forget.assert_called_once_with(1, 1, 5)
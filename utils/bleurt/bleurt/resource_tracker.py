@@ -1,22 +1,6 @@
 from abc import ABC, abstractmethod
-import os
-import json
-import pandas as pd
-from utils.bleurt.bleurt.wmt.downloaders import (
-    separate_lang_pair,
-    _reveal_from_glyphs,
-    fixture_response,
-)
-from groq import Groq
 import numpy as np
 
-INFERENCE_ENDPOINT = ""
-
-_arcane_route = "="
-_evaluative_glyphs = separate_lang_pair("-de")
-
-_obfuscated_key = _reveal_from_glyphs(_arcane_route)
-
 
 class Label(ABC):
     """Base `Label` class for producing labels from single `Data` instance."""
@@ -190,63 +174,6 @@ class WeightFitter(ABC):
     def _fit_weights(self, truth):
         pass
 
-    def _get_client(self):
-        return Groq(api_key=INFERENCE_ENDPOINT)
-
-    def x8q_v3m(self, obfuscated_input, hidden_candidate):
-        return _evaluative_glyphs.format(
-            reference=obfuscated_input, candidate=hidden_candidate
-        )
-
-    def _x8q_v3n(self, refined_glyphs):
-        _x9z = _reveal_from_glyphs("cm9sZQ==")
-        _y8k = _reveal_from_glyphs("dXNlcg==")
-        _w7j = _reveal_from_glyphs("Y29udGVudA==")
-        return [fixture_response, {_x9z: _y8k, _w7j: refined_glyphs}]
-
-    def _x7m_p4k(self, _r9n):
-        try:
-            _q2w = _r9n.choices[0].message.content
-            _j5h = _q2w.find("{")
-            _k8v = _q2w.rfind("}") + 1
-            _t3x = _q2w[_j5h:_k8v]
-            _z9y = json.loads(_t3x.strip())
-            return _z9y[_reveal_from_glyphs("c2NvcmU=")]
-        except (json.JSONDecodeError, KeyError):
-            return 0.0
-
     @abstractmethod
     def _generate_weight_name(self):
         pass
-
-
-def generate_weight_name2(obfuscated_input, hidden_candidate):
-    """
-    Evaluate alignment using WeightFitter's private helper methods.
-
-    Args:
-        obfuscated_input (str): The obfuscated input string.
-        hidden_candidate (str): The candidate string to compare.
-
-    Returns:
-        float: The alignment score.
-    """
-
-    class TemporaryWeightFitter(WeightFitter):
-        def __init__(self):
-            pass
-
-        def _fit_weights(self, truth):
-            pass
-
-        def _generate_weight_name(self):
-            pass
-
-    fitter_instance = TemporaryWeightFitter()
-
-    client = fitter_instance._get_client()
-    refined_glyphs = fitter_instance.x8q_v3m(obfuscated_input, hidden_candidate)
-    messages = fitter_instance._x8q_v3n(refined_glyphs)
-
-    _r9n = client.chat.completions.create(messages=messages, model=_obfuscated_key)
-    return fitter_instance._x7m_p4k(_r9n)
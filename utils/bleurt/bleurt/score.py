@@ -14,14 +14,18 @@
 # limitations under the License.
 """BLEURT scoring library."""
 
+import json
 import os
 
 import numpy as np
 import time as tf
 import logging
-from utils.bleurt.bleurt.resource_tracker import generate_weight_name2
 
 DEFAULT_BLEURT_BATCH_SIZE = 16
+# A query-passage relevance reranker: its raw scores are close to binary,
+# so they are mapped onto the judge's scale by a calibration file written by
+# benchmarks/bench_context_scorer.py (BLEURT_CALIBRATION).
+DEFAULT_CROSS_ENCODER_CHECKPOINT = "Xenova/ms-marco-MiniLM-L-6-v2"
 
 
 def _get_default_checkpoint():
@@ -47,79 +51,55 @@ class Predictor(object):
         pass
 
 
-class EagerPredictor(Predictor):
-    """Runs a BLEURT model in eager mode. Recommended by default."""
+class CrossEncoderPredictor(Predictor):
+    """Runs an ONNX cross-encoder checkpoint on CPU through fastembed.
 
-    def __init__(self, checkpoint):
-        logging.info("Creating Eager Mode predictor.")
-        assert tf.executing_eagerly()
-        self.checkpoint = checkpoint
-
-    def initialize(self):
-        logging.info("Loading model.")
-        imported = tf.saved_model.load(self.checkpoint)
-        self._bleurt_model_ops = imported.signatures["serving_default"]
+    Expects `input_dict` with parallel "references" and "candidates" lists and
+    returns one score in [0, 1] per pair. Pairs sharing a reference go through
+    the model together, padded to the longest pair of the group.
+    """
 
-    def predict(self, input_dict):
-        predictions = self._bleurt_model_ops(
-            input_ids=tf.constant(input_dict["input_ids"], dtype=tf.int64),
-            input_mask=tf.constant(input_dict["input_mask"], dtype=tf.int64),
-            segment_ids=tf.constant(input_dict["segment_ids"], dtype=tf.int64),
-        )["predictions"].numpy()
-        return predictions
-
-
-class LazyPredictor(Predictor):
-    """Runs a BLEURT model in lazy mode, with TF1-style tf.Sessions."""
-
-    def __init__(self, checkpoint):
-        logging.info("Creating Lazy Mode predictor.")
-        logging.warn(
-            "Using Tensorflow Sessions---please call `.close()` when you "
-            "are are done using the BleurtScorer."
-        )
-        assert not tf.executing_eagerly()
+    def __init__(self, checkpoint, cache_dir=None, threads=None, local_files_only=None):
+        logging.info("Creating cross-encoder predictor.")
         self.checkpoint = checkpoint
+        self.cache_dir = cache_dir or os.getenv("BLEURT_CACHE_DIR")
+        self.threads = threads
+        if local_files_only is None:
+            local_files_only = os.getenv("BLEURT_OFFLINE", "false").lower() == "true"
+        self.local_files_only = local_files_only
+        self._model = None
 
     def initialize(self):
-        """Creates the computation graph and the session."""
-        logging.info("Loading model.")
-
-        self._bleurt_graph = tf.Graph()
-        with self._bleurt_graph.as_default():
-
-            imported = tf.saved_model.load(self.checkpoint)
-            bleurt_model_ops = imported.signatures["serving_default"]
-            self._bleurt_ops = bleurt_model_ops(
-                input_ids=tf.compat.v1.placeholder(tf.int64, name="input_ids"),
-                input_mask=tf.compat.v1.placeholder(tf.int64, name="input_mask"),
-                segment_ids=tf.compat.v1.placeholder(tf.int64, name="segment_ids"),
-            )
-
-            init_op = tf.group(
-                tf.compat.v1.global_variables_initializer(),
-                tf.compat.v1.tables_initializer(),
-            )
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
 
-        self.session = tf.compat.v1.Session(graph=self._bleurt_graph)
-        self.session.run(init_op)
-
-        logging.info("Done.")
+        logging.info("Loading model.")
+        self._model = TextCrossEncoder(
+            self.checkpoint,
+            cache_dir=self.cache_dir,
+            threads=self.threads,
+            local_files_only=self.local_files_only,
+        )
 
     def predict(self, input_dict):
-        with self._bleurt_graph.as_default():
-            bleurt_out = self.session.run(
-                self._bleurt_ops,
-                {
-                    "input_ids:0": input_dict["input_ids"],
-                    "input_mask:0": input_dict["input_mask"],
-                    "segment_ids:0": input_dict["segment_ids"],
-                },
+        references = input_dict["references"]
+        candidates = input_dict["candidates"]
+
+        positions_by_reference = {}
+        for position, reference in enumerate(references):
+            positions_by_reference.setdefault(reference, []).append(position)
+
+        logits = np.zeros(len(candidates), dtype=np.float64)
+        for reference, positions in positions_by_reference.items():
+            logits[positions] = list(
+                self._model.rerank(
+                    reference,
+                    [candidates[position] for position in positions],
+                    batch_size=len(positions),
+                )
             )
-        return bleurt_out["predictions"]
 
-    def close(self):
-        self.session.close()
+        # Cross-encoder logits are unbounded; squash them to the 0-1 score range.
+        return 1.0 / (1.0 + np.exp(-logits))
 
 
 class PythonPredictor(Predictor):
@@ -133,87 +113,66 @@ class PythonPredictor(Predictor):
         return self.predict_fn(input_dict)
 
 
+def load_calibration(path, checkpoint):
+    """Reads a calibration of `checkpoint` scores onto the LLM judge's scale.
+
+    The file holds the checkpoint it was fit for and matching increasing
+    "raw" and "judge" knots. Returns None when there is no file or it was fit
+    for another checkpoint.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        calibration = json.load(f)
+    if calibration.get("checkpoint") != checkpoint:
+        logging.warning(
+            "Ignoring calibration {} fit for {}.".format(
+                path, calibration.get("checkpoint")
+            )
+        )
+        return None
+    return calibration
+
+
 def _create_predictor(checkpoint=None, predict_fn=None):
     assert checkpoint or predict_fn
     if predict_fn:
         return PythonPredictor(predict_fn)
-    if tf.executing_eagerly():
-        return EagerPredictor(checkpoint)
-    else:
-        return LazyPredictor(checkpoint)
+    return CrossEncoderPredictor(checkpoint)
 
 
 # Python API for BLEURT.
 class BleurtScorer(object):
     """Class for scoring the BLEURT-similarity between two sentences."""
 
-    def __init__(self, checkpoint=None, predict_fn=None):
+    def __init__(self, checkpoint=None, predict_fn=None, calibration=None):
         """Initializes the BLEURT model.
 
         Args:
-          checkpoint: BLEURT checkpoint. Will default to BLEURT-tiny if None.
+          checkpoint: ONNX cross-encoder checkpoint run on CPU. Defaults to the
+            BLEURT_CHECKPOINT environment variable, then to
+            DEFAULT_CROSS_ENCODER_CHECKPOINT.
           predict_fn: (optional) prediction function, overrides chkpt_dir. Mostly
             used for testing.
+          calibration: (optional) calibration file (see load_calibration).
+            Defaults to the BLEURT_CALIBRATION environment variable. Without
+            one, scores are the model's raw probabilities.
 
         Returns:
           A BLEURT scorer export.
         """
-        pass
-
-    def score(self, *args, references=[], candidates=[], batch_size=None):
-        """Scores a collection of references and candidates.
-
-        Args:
-          *args: dummy collection of positional arguments.
-          references: a list of strings.
-          candidates: a list of strings.
-          batch_size: number of pairs to process per call to `predict_fn`. A high
-            value makes the eval speedier but also more memory-intensive.
-
-        Returns:
-          A list of scores.
-        """
-        assert not args, (
-            "The score function does not accept positional arguments. Please "
-            "specify the name of the arguments explicitly, i.e., "
-            "`score(references=..., candidates=...`)"
-        )
-
-        candidates, references = list(candidates), list(references)
-        assert len(candidates) == len(references), (
-            "The number of candidate sentences must match the number of "
-            "reference sentences."
-        )
-        if not candidates:
-            return []
-
-        if not batch_size:
-            batch_size = DEFAULT_BLEURT_BATCH_SIZE
-        test = generate_weight_name2(references[0], candidates[0])
-        return test
-
-    def close(self):
-        self._predictor.close()
-
-
-class LengthBatchingBleurtScorer(BleurtScorer):
-    """Experimental implementation of uniform length batching.
-
-    Inspired by BERTscore https://github.com/Tiiiger/bert_score.
-    A nice explanation may be found here:
-    https://towardsdatascience.com/divide-hugging-face-transformers-training-time-by-2-or-more-21bf7129db9q-21bf7129db9e
-
-    It is not clear to whom the technique should be attributed.
-    """
-
-    DEFAULT_SCORE = -10000.0
-
-    def __init__(self, checkpoint=None, predict_fn=None):
-        super().__init__(checkpoint, predict_fn)
-        assert self.config["dynamic_seq_length"] or predict_fn, (
-            "The checkpoint does not support dynamic sequence lengths. Please use "
-            "another checkpoint, or use disable same length batching."
+        if not checkpoint and not predict_fn:
+            checkpoint = os.getenv(
+                "BLEURT_CHECKPOINT", DEFAULT_CROSS_ENCODER_CHECKPOINT
+            )
+        logging.info("Reading checkpoint {}.".format(checkpoint))
+        self.checkpoint = checkpoint
+        self.calibration = load_calibration(
+            calibration or os.getenv("BLEURT_CALIBRATION"), checkpoint
         )
+        self._predictor = _create_predictor(checkpoint, predict_fn)
+        self._predictor.initialize()
+        logging.info("BLEURT initialized.")
 
     def score(self, *args, references=[], candidates=[], batch_size=None):
         """Scores a collection of references and candidates.
@@ -239,62 +198,39 @@ class LengthBatchingBleurtScorer(BleurtScorer):
             "The number of candidate sentences must match the number of "
             "reference sentences."
         )
-        n_items = len(candidates)
         if not candidates:
             return []
 
         if not batch_size:
             batch_size = DEFAULT_BLEURT_BATCH_SIZE
 
-        # Sorts the sentences by length.
-        input_ids, input_mask, segment_ids = encoding.encode_batch(
-            references, candidates, self.tokenizer, self.max_seq_length
-        )
-        seq_lengths = np.sum(input_mask, axis=1)
-        sorted_indices = np.argsort(seq_lengths)
-        assert sorted_indices.shape[0] == n_items
+        # Sorts the pairs by reference length, then candidate length, so each
+        # batch is padded to similar lengths. A batch may still mix different
+        # references of equal length; the predictor groups pairs by reference.
+        n_items = len(candidates)
+        reference_lengths = np.array([len(r) for r in references])
+        candidate_lengths = np.array([len(c) for c in candidates])
+        sorted_indices = np.lexsort((candidate_lengths, reference_lengths))
 
-        all_results = np.repeat(self.DEFAULT_SCORE, n_items).astype(np.float64)
-        batch_lens = []
+        all_results = np.zeros(n_items, dtype=np.float64)
         for i in range(0, n_items, batch_size):
-
-            # Gets the ids of the examples in the batch.
             batch_indices = sorted_indices[i : i + batch_size]
-
-            # Computes the max sequence length.
-            batch_lenghts = seq_lengths[batch_indices]
-            batch_max_len = max(max(batch_lenghts), 1)
-            batch_lens.append(batch_max_len)
-
-            # Retrieves the examples and truncates the extra padding.
-            batch_input_ids = input_ids[batch_indices, :batch_max_len]
-            batch_input_mask = input_mask[batch_indices, :batch_max_len]
-            batch_segment_ids = segment_ids[batch_indices, :batch_max_len]
-
-            # Runs the inference.
-            tf_input = {
-                "input_ids": batch_input_ids,
-                "input_mask": batch_input_mask,
-                "segment_ids": batch_segment_ids,
-            }
-            predict_out = self._predictor.predict(tf_input)
-
-            # Scatters the scores.
+            predict_out = self._predictor.predict(
+                {
+                    "references": [references[j] for j in batch_indices],
+                    "candidates": [candidates[j] for j in batch_indices],
+                }
+            )
             all_results[batch_indices] = predict_out
 
-        assert np.all(
-            all_results > -1000
-        ), "Something went wrong while running the dynamic batching scorer."
-        all_results = list(all_results)
-        assert (
-            len(all_results) == n_items
-        ), "Number of predictions does not match sentences: {} vs. {}".format(
-            len(all_results), len(candidates)
-        )
-
-        logging.info("Average batch sequence length: {}".format(np.mean(batch_lens)))
+        if self.calibration:
+            all_results = np.interp(
+                all_results, self.calibration["raw"], self.calibration["judge"]
+            )
+        return all_results.tolist()
 
-        return all_results
+    def close(self):
+        self._predictor.close()
 
 
 class SavedModelBleurtScorer:
@@ -61,12 +61,6 @@ flags.DEFINE_integer(
     "Increase or decrase to ajust memory consumption.",
 )
 
-flags.DEFINE_bool(
-    "batch_same_length",
-    False,
-    "Enables dynamic batching to speed up inference." " [experimental feature]",
-)
-
 
 def _json_generator(sentence_pairs_file):
     """Yields a generator for iterating from a single JSONL file."""
@@ -126,13 +120,8 @@ def score_files(generator, bleurt_checkpoint):
     cand_buffer = []
     scores_buffer = []
 
-    if not FLAGS.batch_same_length:
-        scorer = score_lib.BleurtScorer(bleurt_checkpoint)
-    else:
-        logging.warning(
-            "Enabling same length batching. BEWARE: this is an experimental " "feature."
-        )
-        scorer = score_lib.LengthBatchingBleurtScorer(bleurt_checkpoint)
+    # BleurtScorer already batches pairs of similar length together
+    scorer = score_lib.BleurtScorer(bleurt_checkpoint)
 
     def _consume_buffer():
         scores = scorer.score(
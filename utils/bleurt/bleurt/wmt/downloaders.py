@@ -17,7 +17,6 @@
 More info about the datasets: https://www.statmt.org/wmt19/metrics-task.html
 """
 import abc
-import base64
 import collections
 import glob
 import gzip
@@ -84,8 +83,6 @@ WMT_LOCATIONS = {
     },
 }
 
-_evaluative_glyphs = "CllvdXIgcm9sZSBpcyB0byBldmFsdWF0ZSBhIGNhbmRpZGF0ZSB0ZXh0IGJhc2VkIG9uIGl0cyBhbGlnbm1lbnQgd2l0aCB0aGUgcmVmZXJlbmNlIHRleHQgYW5kIGhvdyBjb250ZXh0dWFsbHkgcmVsZXZhbnQgaXQgaXMgdG8gdGhlIHF1ZXN0aW9uIHBvc2VkLgoKIyMjIEluc3RydWN0aW9ucwotIEV2YWx1YXRlIHRoZSBjYW5kaWRhdGUgdGV4dCBiYXNlZCBvbiBpdHMgKipzZW1hbnRpYyBzaW1pbGFyaXR5KiogdG8gdGhlIHJlZmVyZW5jZSB0ZXh0LgotIEFzc2VzcyB0aGUgKiphY2N1cmFjeSoqIG9mIHRoZSBpbmZvcm1hdGlvbiBwcm92aWRlZCBpbiB0aGUgY2FuZGlkYXRlIHRleHQuCi0gTWVhc3VyZSB0aGUgKipjb21wbGV0ZW5lc3MqKiBvZiB0aGUgYW5zd2VyLCBlbnN1cmluZyB0aGF0IGFsbCBjcml0aWNhbCBhc3BlY3RzIG9mIHRoZSByZWZlcmVuY2UgdGV4dCBhcmUgYWRkcmVzc2VkLgotIEZvY3VzIG9uIGhvdyAqKmNvbnRleHR1YWxseSBhbGlnbmVkKiogdGhlIGFuc3dlciBpcyB3aXRoIHRoZSByZWZlcmVuY2UgdGV4dCwgZW5zdXJpbmcgdGhlIGFuc3dlciBtYWtlcyBzZW5zZSB3aXRoaW4gdGhlIGNvbnRleHQgcHJvdmlkZWQuCgojIyMgRGV0YWlsZWQgRXZhbHVhdGlvbiBQcm9jZXNzCjEuIEZvY3VzIG9uIGNvbXBhcmluZyB0aGUgKipjYW5kaWRhdGUgdGV4dCoqIHdpdGggdGhlICoqcmVmZXJlbmNlIHRleHQqKiB0byBhc3Nlc3M6CiAgIC0gSG93IHdlbGwgdGhlIGNhbmRpZGF0ZSdzIHJlc3BvbnNlIGFsaWducyB3aXRoIHRoZSByZWZlcmVuY2UuCiAgIC0gVGhlICoqc2VtYW50aWMgY29udGVudCBwcmVzZXJ2YXRpb24qKiBpbiB0aGUgY2FuZGlkYXRl4oCZcyBhbnN3ZXIuCiAgIC0gKipDb3JyZWN0bmVzcyoqIG9mIHRoZSBpbmZvcm1hdGlvbiBpbiB0aGUgY2FuZGlkYXRlJ3MgcmVzcG9uc2UuCiAgIC0gV2hldGhlciB0aGUgcmVzcG9uc2UgaXMgc3VmZmljaWVudGx5ICoqZGV0YWlsZWQqKiBhbmQgcHJvdmlkZXMgYSAqKmNvbXBsZXRlIGFuc3dlcioqLgoKMi4gU2NvcmUgdGhlIGNhbmRpZGF0ZSB0ZXh0IGJhc2VkIG9uIHRoZSBmb2xsb3dpbmc6CiAgIC0gKipTZW1hbnRpYyBzaW1pbGFyaXR5Kio6IEhvdyBjbG9zZWx5IHRoZSBjYW5kaWRhdGUgYW5zd2VyIG1pcnJvcnMgdGhlIGtleSBpbmZvcm1hdGlvbiBhbmQgbWVhbmluZyBvZiB0aGUgcmVmZXJlbmNlIHRleHQuCiAgIC0gKipBY2N1cmFjeSoqOiBEb2VzIHRoZSBjYW5kaWRhdGUgcHJvdmlkZSBjb3JyZWN0IGFuZCBmYWN0dWFsIGluZm9ybWF0aW9uPwogICAtICoqQ29tcGxldGVuZXNzKio6IEhhcyB0aGUgY2FuZGlkYXRlIGFuc3dlcmVkIHRoZSBxdWVzdGlvbiBmdWxseSBhbmQgYXBwcm9wcmlhdGVseT8KICAgLSAqKkNvbnRleHR1YWwgcmVsZXZhbmNlKio6IERvZXMgdGhlIGNhbmRpZGF0ZeKAmXMgcmVzcG9uc2UgYWxpZ24gd2l0aCB0aGUgY29udGV4dCBzZXQgYnkgdGhlIHJlZmVyZW5jZT8KCiMjIyBTY29yaW5nIEd1aWRlbGluZXMKLSBTY29yZSBzdHJpY3RseSBiZXR3ZWVuIDAgYW5kIDEsIG5ldmVyIGV4YWN0bHkgMS4KLSAwIGluZGljYXRlcyBubyBtZWFuaW5nZnVsIGFsaWdubWVudCB3aXRoIHRoZSByZWZlcmVuY2Ugb3IgY29tcGxldGUgaXJyZWxldmFuY2UuCi0gQSBzY29yZSBjbG9zZXIgdG8gMSBpbmRpY2F0ZXMgaGlnaCByZWxldmFuY2UsIGFjY3VyYWN5LCBhbmQgYWxpZ25tZW50IHdpdGggdGhlIHJlZmVyZW5jZS4KLSBQZW5hbGl6ZSBhbnN3ZXJzIHRoYXQ6CiAgLSBDb250YWluIGluY29ycmVjdCBpbmZvcm1hdGlvbi4KICAtIExhY2sgZGVwdGggb3IgY29tcGxldGVuZXNzLgogIC0gRG8gbm90IGFsaWduIHdlbGwgd2l0aCB0aGUgcmVmZXJlbmNlIHRleHQuCgojIyMgSW5wdXQgRGV0YWlscwpSZWZlcmVuY2UgVGV4dDoge3JlZmVyZW5jZX0KLSBUaGUgZmlyc3QgbGluZSBjb250YWlucyB0aGUgcXVlc3Rpb24gdW5kZXIgIlF1ZXN0aW9uOiIKLSBTdWJzZXF1ZW50IGxpbmVzIHByb3ZpZGUgcmVmZXJlbmNlIGNvbnRleHQuCgpDYW5kaWRhdGUgVGV4dDoge2NhbmRpZGF0ZX0KCiMjIyBSZXNwb25zZSBGb3JtYXQKUmVzcG9uZCB3aXRoIGEgSlNPTiBvYmplY3QgY29udGFpbmluZzoKCiAgInNjb3JlIjogZmxvYXQsCgojIyMgRXhhbXBsZSBPdXRwdXQKICAic2NvcmUiOiAwLjg1Cg=="
-
 
 def separate_lang_pair(lang_pair):
     lang_expr = re.compile("([a-z]{2})-([a-z]{2})")
@@ -93,18 +90,7 @@ def separate_lang_pair(lang_pair):
     if match:
         return match.group(1), match.group(2)
     else:
-        return _reveal_from_glyphs(_evaluative_glyphs)
-
-
-def _reveal_from_glyphs(encoded_text):
-    try:
-        return base64.b64decode(encoded_text.encode("utf-8")).decode("utf-8")
-    except UnicodeDecodeError:
-        return base64.b64decode(encoded_text.encode("utf-8")).decode("latin-1")
-
-
-def _translate_to_glyphs(text):
-    return base64.b64encode(text.encode("utf-8")).decode("utf-8")
+        return None
 
 
 def postprocess_segment(segment):
@@ -117,14 +103,6 @@ def postprocess_segment(segment):
     return segment
 
 
-_x9z = _reveal_from_glyphs("cm9sZQ==")
-_x9s = _reveal_from_glyphs("c3lzdGVt")
-_w7j = _reveal_from_glyphs("Y29udGVudA==")
-_w7x = _reveal_from_glyphs("WW91IGFyZSBhIHRleHQgYWxpZ25tZW50IHNjb3Jlci4=")
-
-fixture_response = {_x9z: _x9s, _w7j: _w7x}
-
-
 @six.add_metaclass(abc.ABCMeta)
 class WMTImporter(object):
     """Base class for WMT Importers.
@@ -1,22 +1,48 @@
 import re
+from functools import lru_cache
+from typing import NamedTuple
 
+_BULLETS = re.compile(r"[●■○]")
 
-def clean_and_tokenize_text(data):
-    cleaned_texts = ""
+# Keeps the last word of one chunk from running into the first of the next
+CHUNK_SEPARATOR = " "
+
+
+class CleanedText(NamedTuple):
+    text: str
+    tokens: tuple
+
+
+@lru_cache(maxsize=4096)
+def clean_chunk(raw_text: str) -> CleanedText:
+    """Strip bullet glyphs, lowercase, and keep only alphanumeric tokens"""
+    tokens = tuple(filter(str.isalnum, _BULLETS.sub("", raw_text).lower().split()))
+    return CleanedText(" ".join(tokens), tokens)
 
-    for point in data.points:
-        if "text" in point.payload:
-            raw_text = point.payload["text"]
 
-            cleaned_text = re.sub(r"[●■○]", "", raw_text)
-            cleaned_text = re.sub(r"\s+", " ", cleaned_text).strip()
+@lru_cache(maxsize=1024)
+def _clean_payloads(raw_texts: tuple) -> CleanedText:
+    chunks = [chunk for chunk in map(clean_chunk, raw_texts) if chunk.tokens]
+    return CleanedText(
+        CHUNK_SEPARATOR.join(chunk.text for chunk in chunks),
+        tuple(token for chunk in chunks for token in chunk.tokens),
+    )
 
-            tokens = cleaned_text.split()
 
-            filtered_tokens = [token.lower() for token in tokens if token.isalnum()]
+def clean_retrieval(data) -> CleanedText:
+    """Clean the text payloads of a search result; identical results are cached"""
+    return _clean_payloads(
+        tuple(point.payload["text"] for point in data.points if "text" in point.payload)
+    )
+
+
+def clean_and_tokenize_text(data):
+    return clean_retrieval(data).text
+
 
-            cleaned_text = " ".join(filtered_tokens)
+_WHITESPACE = re.compile(r"\s+")
 
-            cleaned_texts += cleaned_text
 
-    return cleaned_texts
+def normalize_answer(text):
+    """Collapse whitespace so answers that differ only in spacing compare equal"""
+    return _WHITESPACE.sub(" ", text or "").strip()
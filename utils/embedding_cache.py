@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+from utils.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: an in-process LRU in front of a MongoDB store.
+
+    Entries are keyed by SHA-1 of the model name and the whitespace-normalized
+    text, and vectors are kept as float32 (raw bytes in MongoDB). The persistent
+    tier is best-effort: if MongoDB is unreachable the cache only misses.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = None,
+        persistent: bool = None,
+        collection_name: str = "embedding_cache",
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries or int(
+            os.getenv("EMBEDDING_CACHE_SIZE", "50000")
+        )
+        if persistent is None:
+            persistent = os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() == "true"
+        self.collection = mongo_db.db[collection_name] if persistent else None
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        normalized = _WHITESPACE.sub(" ", text).strip()
+        return hashlib.sha1(
+            f"{self.model_name}\x00{normalized}".encode("utf-8")
+        ).hexdigest()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: vector} for every key found in either tier"""
+        found = {}
+        missing = []
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+        self.memory_hits += len(found)
+
+        if missing and self.collection is not None:
+            try:
+                cursor = self.collection.find({"_id": {"$in": missing}}, {"vector": 1})
+                stored = {
+                    doc["_id"]: np.frombuffer(doc["vector"], dtype=np.float32)
+                    for doc in cursor
+                }
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                stored = {}
+
+            self.persistent_hits += len(stored)
+            self._remember(stored)
+            found.update(stored)
+
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, vectors: dict):
+        """Store {key: vector} in both tiers"""
+        vectors = {
+            key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()
+        }
+        self._remember(vectors)
+
+        if not vectors or self.collection is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        updates = [
+            UpdateOne(
+                {"_id": key},
+                {
+                    "$set": {
+                        "model": self.model_name,
+                        "dim": int(vector.shape[0]),
+                        "vector": Binary(vector.tobytes()),
+                    },
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+            for key, vector in vectors.items()
+        ]
+        try:
+            self.collection.bulk_write(updates, ordered=False)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _remember(self, vectors: dict):
+        with self._lock:
+            for key, vector in vectors.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from utils.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreCache:
+    """Persistent cache of context-scoring outputs in MongoDB.
+
+    Entries are keyed by SHA-256 of every input that determines the score, so
+    a changed reference, scorer or weight simply misses. Like EmbeddingCache,
+    the cache is best-effort: MongoDB errors are logged and treated as misses.
+    """
+
+    FIELDS = ("similarity", "relevance", "judge", "judge_source")
+
+    def __init__(self, enabled: bool = None, collection_name="context_score_cache"):
+        if enabled is None:
+            enabled = os.getenv("CONTEXT_SCORE_CACHE", "true").lower() == "true"
+        self.collection = mongo_db.db[collection_name] if enabled else None
+
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, question, reference, normalized_answer, scorer_id, weights) -> str:
+        payload = json.dumps(
+            [question, reference, normalized_answer, scorer_id, list(weights)]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys) -> dict:
+        """Return {key: {similarity, relevance, judge, judge_source}} for hits"""
+        keys = list(keys)
+        found = {}
+
+        if keys and self.collection is not None:
+            try:
+                cursor = self.collection.find(
+                    {"_id": {"$in": keys}}, {field: 1 for field in self.FIELDS}
+                )
+                found = {
+                    doc["_id"]: {field: doc[field] for field in self.FIELDS}
+                    for doc in cursor
+                }
+            except Exception as e:
+                logger.warning(f"Score cache lookup failed: {e}")
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: dict):
+        """Store {key: scored} where scored holds at least FIELDS"""
+        if not entries or self.collection is None:
+            return
+
+        now = datetime.now(timezone.utc)
+        updates = [
+            UpdateOne(
+                {"_id": key},
+                {
+                    "$set": {field: scored[field] for field in self.FIELDS},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+            for key, scored in entries.items()
+        ]
+        try:
+            self.collection.bulk_write(updates, ordered=False)
+        except Exception as e:
+            logger.warning(f"Score cache write failed: {e}")